@@ -0,0 +1,6 @@
+"""Benchmark scripts for the CommunityRelief pipeline.
+
+Run from the repo root, e.g. `python -m benchmarks.bench_find_nearby`.
+"""
+
+__all__ = []
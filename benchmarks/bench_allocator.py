@@ -0,0 +1,70 @@
+"""
+Allocation engine throughput: one global pass vs incremental per-report calls.
+
+    python -m benchmarks.bench_allocator [incidents] [resources]
+"""
+import random
+import sys
+import time
+
+from src.tools import resource_db
+from src.tools.allocator import AllocationEngine
+
+from .bench_find_nearby import make_resources
+
+
+def make_incidents(n, seed=5):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"inc-{i}",
+            "severity": rnd.choice(["high", "medium", "medium", "low"]),
+            "lat": rnd.uniform(8.0, 32.0),
+            "lon": rnd.uniform(68.0, 88.0),
+        }
+        for i in range(n)
+    ]
+
+
+def _check(engine, incidents):
+    used, capacity = {}, {}
+    for inc in incidents:
+        for r in engine.assigned(inc["id"]):
+            used[r["id"]] = used.get(r["id"], 0) + 1
+            capacity[r["id"]] = int(r.get("capacity", 1))
+    over = [rid for rid, n in used.items() if n > capacity[rid]]
+    assert not over, f"over-allocated resources: {over[:5]}"
+    return sum(used.values())
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    m = int(argv[0]) if argv else 1_000
+    n = int(argv[1]) if len(argv) > 1 else 50_000
+    resource_db.resources = make_resources(n)
+    resource_db.rebuild_index()
+    incidents = make_incidents(m)
+
+    engine = AllocationEngine()
+    start = time.perf_counter()
+    engine.allocate_many(incidents)
+    batch_s = time.perf_counter() - start
+    batch_units = _check(engine, incidents)
+
+    engine = AllocationEngine()
+    start = time.perf_counter()
+    for inc in incidents:
+        engine.allocate(inc)
+    incr_s = time.perf_counter() - start
+    incr_units = _check(engine, incidents)
+
+    print(f"incidents={m:,} resources={n:,}")
+    print(f"  global allocate_many  {batch_s * 1000:8.1f} ms  "
+          f"{m / batch_s:9.0f} incidents/s  {batch_units} units assigned")
+    print(f"  incremental allocate  {incr_s * 1000:8.1f} ms  "
+          f"{m / incr_s:9.0f} incidents/s  {incr_units} units assigned")
+    print(f"  still unmet           {len(engine.unmet())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Bulk ingestion throughput on a generated JSONL fixture (1M lines by
+default), then a second pass over the same file to time the resume path
+where every row is already in seen_items. Peak RSS is printed after each
+pass; it should not grow with the fixture size.
+
+    python -m benchmarks.bench_bulk_ingest [lines]
+"""
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from benchmarks.bench_dedup import PLACES, WORDS  # noqa: E402
+from src.bulk_ingest import BulkIngestor, ingest_file  # noqa: E402
+
+
+def write_fixture(path, lines, rnd):
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(lines):
+            words = rnd.sample(WORDS, 6) + rnd.sample(PLACES, 2) + [f"street{i}"]
+            row = {"id": f"row-{i}", "text": " ".join(words),
+                   "reporter": f"feed-{i % 50}",
+                   "lat": round(rnd.uniform(8, 30), 5), "lon": round(rnd.uniform(68, 90), 5)}
+            fh.write(json.dumps(row) + "\n")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(path, label):
+    ingestor = BulkIngestor()
+    start = time.perf_counter()
+    stats = ingest_file(path, ingestor=ingestor)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<7} {elapsed:7.1f}s {stats['rows'] / elapsed:>10,.0f} rows/s  "
+          f"peak rss {peak_rss_mb():.0f} MB  {stats}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    lines = int(argv[0]) if argv else 1_000_000
+    path = os.path.join(tempfile.mkdtemp(prefix="cr-bench-"), "reports.jsonl")
+    write_fixture(path, lines, random.Random(21))
+    print(f"fixture {path}: {lines:,} lines, {os.path.getsize(path) / 1e6:.0f} MB")
+    run(path, "ingest")
+    run(path, "resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Concurrency stress test: parallel POST /api/incidents and GET / against a
+threaded server, reporting p50/p99 latency per endpoint.
+
+    python -m benchmarks.bench_concurrency [threads] [requests_per_thread]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from src.app import app  # noqa: E402
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _worker(port, n, kind, samples, errors):
+    conn = HTTPConnection("127.0.0.1", port, timeout=30)
+    body = json.dumps({"reporter": "bench", "text": "building collapsed, people trapped",
+                       "lat": 20.6, "lon": 72.6})
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            if kind == "post":
+                conn.request("POST", "/api/incidents", body,
+                             {"Content-Type": "application/json"})
+            else:
+                conn.request("GET", "/")
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 400:
+                errors.append(resp.status)
+        except Exception as exc:
+            errors.append(repr(exc))
+            conn.close()
+            conn = HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        samples.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(threads=16, per_thread=50):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    samples = {"post": [], "get": []}
+    errors = []
+    workers = [
+        threading.Thread(target=_worker, args=(port, per_thread, kind, samples[kind], errors))
+        for i in range(threads)
+        for kind in (("post", "get")[i % 2],)
+    ]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    total = sum(len(v) for v in samples.values())
+    print(f"threads={threads} requests={total:,} in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} req/s), errors={len(errors)}")
+    for kind, label in (("post", "POST /api/incidents"), ("get", "GET /")):
+        s = samples[kind]
+        print(f"  {label:<20} n={len(s):5}  p50={percentile(s, 50) * 1000:7.1f} ms  "
+              f"p99={percentile(s, 99) * 1000:7.1f} ms")
+    return errors
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    threads = int(argv[0]) if argv else 16
+    per_thread = int(argv[1]) if len(argv) > 1 else 50
+    run(threads, per_thread)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+GET / cost: the old query-and-render path vs the recent-incidents view,
+then over HTTP a fresh render after every new incident vs the cached page
+vs a conditional GET answered 304.
+
+    python -m benchmarks.bench_dashboard [rows] [requests]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src.memory import memory_bank  # noqa: E402
+
+from .bench_list_incidents import populate  # noqa: E402
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    per = (time.perf_counter() - start) / n
+    print(f"  {label:<34} {per * 1e6:9.0f} us/request")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rows = int(argv[0]) if argv else 200_000
+    n = int(argv[1]) if len(argv) > 1 else 500
+    populate(rows)
+    print(f"rows={rows:,}")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        from src import app as app_mod
+    print(f"  import src.app                     {(time.perf_counter() - start) * 1000:9.1f} ms")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        app_mod.ensure_started()
+    print(f"  feed bootstrap (first request)     {(time.perf_counter() - start) * 1000:9.1f} ms")
+    app, client = app_mod.app, app_mod.app.test_client()
+
+    def render(incidents):
+        def fn():
+            with app.test_request_context("/"):
+                app_mod.render_template("dashboard.html", pipeline=app_mod.PIPELINE_STEPS,
+                                        incidents=incidents(), events=app_mod.FEED.events(),
+                                        last_event_id=app_mod.FEED.last_seq)
+        return fn
+
+    counter = iter(range(10 ** 9))
+
+    def changed():
+        # a new incident lands before every request, so the page is rebuilt
+        i = next(counter)
+        memory_bank.save_incident({"id": f"bench-{i}", "text": "smoke near market",
+                                   "reporter": "bench", "severity": "medium"})
+        assert client.get("/").status_code == 200
+
+    def cached():
+        assert client.get("/").status_code == 200
+
+    etag = None
+
+    def conditional():
+        assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+    timed("query + render (before)", render(lambda: memory_bank.list_incidents(limit=12)), n)
+    timed("recent view + render", render(lambda: memory_bank.recent_incidents(12)), n)
+    print("  over HTTP (Flask test client):")
+    timed("render after each change", changed, n)
+    timed("unchanged, cached page", cached, n)
+    etag = client.get("/").headers["ETag"]
+    timed("unchanged, If-None-Match -> 304", conditional, n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Duplicate-report detection: observe() throughput and merge accuracy on
+synthetic report bursts, plus seen_items lookup latency once the table
+holds millions of fingerprints.
+
+    python -m benchmarks.bench_dedup [reports] [seen_rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src.memory.memory_bank import LSH_BANDS, find_fingerprints, flush  # noqa: E402
+from src.tools.dedup import _SIGNATURE, Deduplicator, _cell_band, _iso, bands  # noqa: E402
+from src.utils import get_conn  # noqa: E402
+
+WORDS = ("building collapsed fire flood water rising road bridge people trapped "
+         "families rooftop smoke injured near school market hospital station "
+         "river bank village sector colony temple power lines down tree blocked "
+         "need boats food medicine urgently since morning evening night").split()
+# place names and other rarer words, so reports look like more than a
+# forty-word vocabulary
+PLACES = [f"place{i}" for i in range(5_000)]
+
+
+def make_reports(n, incidents, rnd):
+    """`n` reports about `incidents` events; each report rewords its event a little."""
+    events = []
+    for _ in range(incidents):
+        words = rnd.sample(WORDS, 7) + rnd.sample(PLACES, 2) + [f"street{rnd.randrange(10 ** 6)}"]
+        events.append((words, rnd.uniform(8, 30), rnd.uniform(68, 90)))
+    reports = []
+    for _ in range(n):
+        label = rnd.randrange(incidents)
+        words, lat, lon = events[label]
+        words = list(words)
+        del words[rnd.randrange(len(words))]
+        words.insert(rnd.randrange(len(words)), rnd.choice(WORDS))
+        reports.append((label, " ".join(words), lat + rnd.uniform(-0.005, 0.005),
+                        lon + rnd.uniform(-0.005, 0.005)))
+    return reports
+
+
+def bulk_seen(rows, rnd):
+    """Insert `rows` fake cluster heads straight into seen_items."""
+    conn = get_conn()
+    band_cols = ", ".join(f"band{b}" for b in range(LSH_BANDS))
+    sql = (f"INSERT OR REPLACE INTO seen_items (item_hash, seen_at, incident_id, signature, "
+           f"lat, lon, reports, {band_cols}) VALUES (?, ?, ?, ?, ?, ?, 1, "
+           f"{', '.join('?' * LSH_BANDS)})")
+    now = time.time()
+    cell = Deduplicator()._cell
+    batch = []
+    for i in range(rows):
+        sig = tuple(rnd.getrandbits(64) for _ in range(16))
+        lat, lon = rnd.uniform(8, 30), rnd.uniform(68, 90)
+        batch.append((f"bulk:{i}", _iso(now - rnd.uniform(0, 3 * 86400)), f"bulk-{i}",
+                      _SIGNATURE.pack(*sig), lat, lon,
+                      *[_cell_band(key, cell(lat, lon)) for key in bands(sig)]))
+        if len(batch) == 50_000:
+            conn.executemany(sql, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        conn.commit()
+
+
+def run(reports, dedup, label):
+    heads = {}
+    clusters_by_label = {}
+    start = time.perf_counter()
+    for i, (label_, text, lat, lon) in enumerate(reports):
+        head, _ = dedup.observe(f"{label}-{i}", text, lat=lat, lon=lon)
+        heads[i] = head
+        clusters_by_label.setdefault(label_, set()).add(head)
+    elapsed = time.perf_counter() - start
+    flush()
+
+    # a report merged into another event's cluster is a false merge
+    label_of_head = {}
+    false_merges = sum(1 for i, (label_, *_rest) in enumerate(reports)
+                       if label_of_head.setdefault(heads[i], label_) != label_)
+    split = sum(len(h) - 1 for h in clusters_by_label.values())
+    print(f"  {label}")
+    print(f"    observe   {len(reports) / elapsed:,.0f} reports/s ({elapsed / len(reports) * 1e6:.0f} us each)")
+    print(f"    clusters  {len(set(heads.values())):,} (ideal {len(clusters_by_label):,}, "
+          f"{split:,} split, {false_merges:,} false merges)")
+    print(f"    stats     {dedup.stats}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 20_000
+    seen_rows = int(argv[1]) if len(argv) > 1 else 1_000_000
+    rnd = random.Random(13)
+
+    print(f"reports={n:,} events={n // 10:,}")
+    run(make_reports(n, n // 10, rnd), Deduplicator(), "in-memory")
+    # a tiny memory tier forces misses through the seen_items indexes
+    run(make_reports(n, n // 10, rnd), Deduplicator(max_clusters=n // 100), "mostly-db")
+
+    bulk_seen(seen_rows, rnd)
+    near = Deduplicator()._near_cells
+    probes = []
+    for _ in range(2_000):
+        cells = near(rnd.uniform(8, 30), rnd.uniform(68, 90))
+        sig = tuple(rnd.getrandbits(64) for _ in range(16))
+        probes.append([[_cell_band(key, cell) for cell in cells] for key in bands(sig)])
+    since = _iso(time.time() - 6 * 3600)
+    lat = []
+    for keys in probes:
+        t0 = time.perf_counter()
+        find_fingerprints(keys, since)
+        lat.append(time.perf_counter() - t0)
+    lat.sort()
+    print(f"seen_items lookups with {seen_rows:,} extra rows: "
+          f"p50={lat[len(lat) // 2] * 1e6:.0f} us p99={lat[int(len(lat) * 0.99)] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
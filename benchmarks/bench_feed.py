@@ -0,0 +1,133 @@
+"""
+Live feed load test: thousands of concurrent subscribers on the sequenced
+EventFeed, plus SSE subscribers over HTTP, compared with every dashboard
+re-polling the whole feed.
+
+    python -m benchmarks.bench_feed [subscribers] [events] [http_subscribers]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from src import app as app_mod  # noqa: E402
+from src.feed import EventFeed  # noqa: E402
+
+from .bench_concurrency import percentile  # noqa: E402
+
+
+def sample_event(i):
+    return {
+        "id": f"inc-{i}", "reporter": "sms-1", "text": "river breached, homes flooded " * 3,
+        "severity": "high", "lat": 20.6, "lon": 72.6, "stage": "Resources ready",
+        "created_at": "2026-01-01T00:00:00Z", "triage_ts": "2026-01-01T00:00:01Z",
+        "source": "bench", "allocation": {"volunteer": [{"id": f"vol-{j}", "lat": 20.5, "lon": 72.5}
+                                                       for j in range(3)]},
+        "timeline": [{"label": "Receiver", "ts": "2026-01-01T00:00:00Z"}],
+    }
+
+
+def in_process(subscribers, events):
+    feed = EventFeed(maxlen=60)
+    published = {}
+    lags = []
+    lock = threading.Lock()
+    ready = threading.Barrier(subscribers + 1)
+
+    def subscriber():
+        seq = 0
+        got = 0
+        ready.wait()
+        while got < events:
+            for entry in feed.wait(seq, 5.0):
+                lag = time.perf_counter() - published[entry.seq]
+                with lock:
+                    lags.append(lag)
+                seq = entry.seq
+                got += 1
+
+    threads = [threading.Thread(target=subscriber, daemon=True) for _ in range(subscribers)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    start = time.perf_counter()
+    for i in range(events):
+        published[feed.last_seq + 1] = time.perf_counter()
+        feed.publish(sample_event(i))
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    full_poll = len(json.dumps({"events": [sample_event(i) for i in range(60)]}))
+    delta = len(feed.since(feed.last_seq - 1)[0].json)
+    print(f"in-process: {subscribers:,} subscribers x {events} events in {elapsed:.2f}s, "
+          f"{len(lags):,} deliveries")
+    print(f"  fan-out lag p50={percentile(lags, 50) * 1000:.2f} ms "
+          f"p99={percentile(lags, 99) * 1000:.2f} ms")
+    print(f"  bytes per update per client: full re-poll={full_poll:,}  delta={delta:,}  "
+          f"(encoded once, {events} json.dumps calls total)")
+
+
+def over_http(clients, events):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app_mod.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    start_seq = app_mod.FEED.last_seq
+    received = []
+    lock = threading.Lock()
+    connected = threading.Barrier(clients + 1, timeout=60)
+
+    def client():
+        conn = HTTPConnection("127.0.0.1", port, timeout=60)
+        conn.request("GET", f"/api/stream/sse?since={start_seq}")
+        resp = conn.getresponse()
+        connected.wait()
+        got = 0
+        while got < events:
+            line = resp.fp.readline()
+            if not line:
+                break
+            if line.startswith(b"data:"):
+                got += 1
+        with lock:
+            received.append(got)
+        conn.close()
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    connected.wait()
+    start = time.perf_counter()
+    for i in range(events):
+        app_mod.FEED.publish(sample_event(i))
+    for t in threads:
+        t.join(30)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    complete = sum(1 for n in received if n == events)
+    print(f"http sse: {clients} subscribers, {events} events delivered to "
+          f"{complete}/{clients} clients in {elapsed:.2f}s")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    subscribers = int(argv[0]) if argv else 2_000
+    events = int(argv[1]) if len(argv) > 1 else 50
+    http_clients = int(argv[2]) if len(argv) > 2 else 200
+    in_process(subscribers, events)
+    over_http(http_clients, events)
+
+
+if __name__ == "__main__":
+    main()
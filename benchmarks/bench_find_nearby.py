@@ -0,0 +1,70 @@
+"""
+Compare the grid-indexed `find_nearby` with the original linear scan.
+
+    python -m benchmarks.bench_find_nearby [sizes...]
+
+Default sizes are 1k, 100k and 1M resources scattered around western India.
+"""
+import random
+import sys
+import time
+
+from src.tools import resource_db
+
+TYPES = ["volunteer", "shelter", "medical_kit"]
+
+
+def make_resources(n, seed=7):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"res-{i}",
+            "type": TYPES[i % len(TYPES)],
+            "lat": rnd.uniform(8.0, 32.0),
+            "lon": rnd.uniform(68.0, 88.0),
+            "available": True,
+        }
+        for i in range(n)
+    ]
+
+
+def _time_queries(fn, points, **kwargs):
+    start = time.perf_counter()
+    for lat, lon in points:
+        fn(lat, lon, **kwargs)
+    return (time.perf_counter() - start) / len(points)
+
+
+def run(n, queries=50):
+    resource_db.resources = make_resources(n)
+    start = time.perf_counter()
+    resource_db.rebuild_index()
+    build_s = time.perf_counter() - start
+
+    rnd = random.Random(11)
+    points = [(rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0))
+              for _ in range(queries)]
+    # fewer linear queries at large sizes to keep the run short
+    linear_points = points[: max(3, queries * 1000 // max(n, 1000))]
+
+    for lat, lon in linear_points:
+        a = [r["id"] for r in resource_db.find_nearby(lat, lon)]
+        b = [r["id"] for r in resource_db.find_nearby_linear(lat, lon)]
+        assert a == b, (a, b)
+
+    linear = _time_queries(resource_db.find_nearby_linear, linear_points)
+    indexed = _time_queries(resource_db.find_nearby, points)
+    print(f"n={n:>9,}  build={build_s * 1000:8.1f} ms  "
+          f"linear={linear * 1000:9.3f} ms/q  indexed={indexed * 1000:7.3f} ms/q  "
+          f"speedup={linear / indexed:8.1f}x")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or [1_000, 100_000, 1_000_000]
+    for n in sizes:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Batch nearest-resource queries: `find_nearby_many` vs per-incident lookups.
+
+    python -m benchmarks.bench_find_nearby_many [resources] [incidents]
+"""
+import random
+import sys
+import time
+
+from src.tools import resource_db
+
+from .bench_find_nearby import make_resources
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 50_000
+    m = int(argv[1]) if len(argv) > 1 else 500
+    resource_db.resources = make_resources(n)
+    resource_db.rebuild_index()
+    rnd = random.Random(3)
+    points = [(rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0))
+              for _ in range(m)]
+
+    start = time.perf_counter()
+    single = [resource_db.find_nearby(lat, lon) for lat, lon in points]
+    single_s = time.perf_counter() - start
+
+    resource_db.find_nearby_many(points[:1])  # build the array snapshot
+    start = time.perf_counter()
+    batch = resource_db.find_nearby_many(points)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear = [resource_db.find_nearby_linear(lat, lon) for lat, lon in points[:20]]
+    linear_s = (time.perf_counter() - start) / 20 * m
+
+    mismatches = sum(
+        [r["id"] for r in a] != [r["id"] for r in b] for a, b in zip(single, batch)
+    )
+    print(f"resources={n:,} incidents={m:,}")
+    print(f"  linear scan (est.) {linear_s * 1000:9.1f} ms")
+    print(f"  find_nearby loop   {single_s * 1000:9.1f} ms")
+    print(f"  find_nearby_many   {batch_s * 1000:9.1f} ms")
+    print(f"  mismatched results {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Offline gazetteer on a synthetic GeoNames-sized list (10M names by
+default): build time and index size, mmap open time and heap, then
+latency of exact hits, misses, prefix and one-typo fuzzy lookups, and of
+GeocodeService answering fresh places from the gazetteer.
+
+    python -m benchmarks.bench_gazetteer [names] [--index PATH] [--queries N]
+
+With --index, an index left by an earlier run (or built from a real
+GeoNames dump) is reused and the build is skipped.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src.tools import gazetteer  # noqa: E402
+from src.tools.geocode import GeocodeService, TokenBucket  # noqa: E402
+from src.tools.geocode_cache import GeocodeCache  # noqa: E402
+
+ONSETS = list("bcdfghjklmnpqrstvwxyz") + ["bh", "ch", "dh", "gh", "kh", "ph", "sh", "th", "tr", "st", "zh"]
+VOWELS = ["a", "e", "i", "o", "u", "y", "aa", "ai", "au", "ee", "oo", "ia"]
+CODAS = [""] * 6 + ["n", "r", "l", "m", "s", "t", "k", "ng", "x", "z"]
+SUFFIXES = [""] * 8 + ["pur", "nagar", "abad", "gaon", "ville", "burg", " east", " west", " road", " creek"]
+
+
+def make_name(rnd):
+    syllables = rnd.randint(2, 4)
+    return "".join(rnd.choice(ONSETS) + rnd.choice(VOWELS) + rnd.choice(CODAS)
+                   for _ in range(syllables)) + rnd.choice(SUFFIXES)
+
+
+def write_gazetteer(path, n, seed=3, sample_every=None):
+    """Write `n` synthetic rows; returns every `sample_every`-th name."""
+    rnd = random.Random(seed)
+    sample_every = sample_every or max(1, n // 5000)
+    samples = []
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            name = make_name(rnd)
+            f.write(f"{name}\t{rnd.uniform(-60, 70):.5f}\t{rnd.uniform(-180, 180):.5f}\t"
+                    f"{int(rnd.paretovariate(1.2) * 100)}\n")
+            if i % sample_every == 0:
+                samples.append(name)
+    return samples
+
+
+def typo(rnd, name):
+    i = rnd.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1:] if rnd.random() < 0.5 else name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def per_call(fn, queries):
+    start = time.perf_counter()
+    out = [fn(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries), out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", type=int, nargs="?", default=10_000_000)
+    parser.add_argument("--index")
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args(argv)
+    rnd = random.Random(17)
+
+    workdir = tempfile.mkdtemp(prefix="cr-gaz-")
+    index = args.index or os.path.join(workdir, "gazetteer.idx")
+    if args.index and os.path.exists(args.index):
+        samples = None
+        print(f"reusing {index}")
+    else:
+        tsv = os.path.join(workdir, "gazetteer.tsv")
+        start = time.perf_counter()
+        samples = write_gazetteer(tsv, args.names)
+        print(f"generated {args.names:,} names in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(tsv) / 1e6:.0f} MB TSV)")
+        start = time.perf_counter()
+        n = gazetteer.build(gazetteer.read_gazetteer(tsv), index)
+        print(f"  build                   {time.perf_counter() - start:9.1f} s   "
+              f"{n:,} names, {os.path.getsize(index) / 1e6:.0f} MB index")
+        os.remove(tsv)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    gaz = gazetteer.Gazetteer(index)
+    open_ms = (time.perf_counter() - start) * 1000
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  open (mmap)             {open_ms:9.2f} ms  {heap / 1e3:.0f} kB heap, {len(gaz):,} names")
+    if samples is None:
+        samples = [gaz._name(rnd.randrange(len(gaz))).decode("utf-8") for _ in range(5000)]
+
+    hits = [rnd.choice(samples) for _ in range(args.queries)]
+    misses = [make_name(rnd) + "qx" for _ in range(args.queries)]
+    prefixes = [h[:4] for h in hits]
+    typos = [typo(rnd, h) for h in hits]
+
+    per, out = per_call(gaz.exact, hits[:1])  # first touch of the mapped pages
+    print(f"  first lookup (cold)     {per * 1e6:9.1f} us")
+    per, out = per_call(gaz.exact, hits)
+    assert all(m is not None for m in out)
+    print(f"  exact hit               {per * 1e6:9.1f} us")
+    per, out = per_call(gaz.exact, misses)
+    print(f"  exact miss              {per * 1e6:9.1f} us")
+    per, out = per_call(gaz.prefix, prefixes)
+    print(f"  prefix (4 chars, top10) {per * 1e6:9.1f} us")
+    per, out = per_call(gaz.fuzzy, typos)
+    found = sum(any(m.name == h for m in ms) for h, ms in zip(hits, out))
+    print(f"  fuzzy (one typo)        {per * 1e6:9.1f} us   original in top 5: {found / len(hits):.0%}")
+    per, out = per_call(gaz.fuzzy_geocode, typos)
+    print(f"  fuzzy_geocode (typo)    {per * 1e6:9.1f} us   on a geocode worker")
+
+    service = GeocodeService(backend=None, limiter=TokenBucket(rate=1e6, burst=1000),
+                             cache=GeocodeCache(), offline=gaz)
+    fresh = [f"{h}, district {i}" for i, h in enumerate(hits)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        per, out = per_call(lambda q: service.submit(q).result(), fresh)
+    service.shutdown()
+    print(f"  GeocodeService, fresh   {per * 1e6:9.1f} us   gazetteer answered "
+          f"{service.stats['offline'] / len(fresh):.0%} (upstream: 1 request/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+POST /api/incidents in sync vs async (202 Accepted) ingestion mode:
+request latency as seen by reporters and sustained ingest rate until every
+report has been triaged and allocated.
+
+    python -m benchmarks.bench_ingest [clients] [reports_per_client]
+"""
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from src import app as app_mod  # noqa: E402
+from src.tools import resource_db  # noqa: E402
+from src.tools.allocator import get_engine  # noqa: E402
+
+from .bench_concurrency import percentile  # noqa: E402
+from .bench_find_nearby import make_resources  # noqa: E402
+
+
+def _client(port, n, path, hotspot, latencies, errors):
+    conn = HTTPConnection("127.0.0.1", port, timeout=30)
+    rnd = random.Random()
+    for _ in range(n):
+        if hotspot:
+            lat, lon = 20.6 + rnd.uniform(-0.05, 0.05), 72.6 + rnd.uniform(-0.05, 0.05)
+        else:
+            lat, lon = rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0)
+        body = json.dumps({"reporter": "bench", "text": "flooded road, people trapped",
+                           "lat": lat, "lon": lon})
+        start = time.perf_counter()
+        conn.request("POST", path, body, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        latencies.append(time.perf_counter() - start)
+        if resp.status not in (200, 202):
+            errors.append(resp.status)
+    conn.close()
+
+
+def run(port, mode, clients, per_client, hotspot):
+    path = "/api/incidents?async=" + ("1" if mode == "async" else "0")
+    latencies, errors = [], []
+    threads = [threading.Thread(target=_client, args=(port, per_client, path, hotspot, latencies, errors))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    accepted = time.perf_counter() - start
+    app_mod.INGEST.join()
+    processed = time.perf_counter() - start
+    n = clients * per_client
+    return (f"  {mode:<5} p50={percentile(latencies, 50) * 1000:6.1f} ms "
+          f"p99={percentile(latencies, 99) * 1000:6.1f} ms  "
+          f"accept rate={n / accepted:7.0f}/s  processed rate={n / processed:7.0f}/s  "
+          f"errors={len(errors)}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    clients = int(argv[0]) if argv else 8
+    per_client = int(argv[1]) if len(argv) > 1 else 100
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    # a realistic inventory so allocation is not free
+    resource_db.resources = make_resources(200_000)
+    resource_db.rebuild_index()
+    server = make_server("127.0.0.1", 0, app_mod.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"clients={clients} reports={clients * per_client:,}")
+    # "spread": reports across the region, allocation is cheap.
+    # "hotspot": one flooded district, nearby resources run out and every
+    # allocation has to search further, so inline processing gets slow.
+    for scenario in ("spread", "hotspot"):
+        print(f" {scenario}")
+        for mode in ("sync", "async"):
+            get_engine().reset()
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = run(server.server_port, mode, clients, per_client, scenario == "hotspot")
+            print(stats)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
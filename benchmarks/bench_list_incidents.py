@@ -0,0 +1,100 @@
+"""
+list_incidents at scale: keyset pagination and filters over a large
+incidents table, with the query plan of each (tests/test_list_incidents.py
+fails when a query stops being served by its index).
+
+    python -m benchmarks.bench_list_incidents [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["MEMORY_DB"] = os.path.join(tempfile.mkdtemp(prefix="cr-bench-"), "memory.db")
+
+from src.memory import memory_bank  # noqa: E402
+from src.utils import get_conn  # noqa: E402
+
+QUERIES = [
+    ("latest page", {}),
+    ("severity=high", {"severity": "high"}),
+    ("last 24h", {"since": "2026-03-30T00:00:00Z"}),
+    ("since+until window", {"since": "2026-02-01T00:00:00Z", "until": "2026-02-02T00:00:00Z"}),
+    ("bbox (1 deg)", {"bbox": (20.0, 72.0, 21.0, 73.0)}),
+]
+
+
+def populate(n, seed=1):
+    rnd = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    conn = get_conn()
+    batch = []
+    for i in range(n):
+        created = base + timedelta(seconds=i * 8)
+        triaged = None if i % 10 == 0 else (created + timedelta(seconds=3)).isoformat() + "Z"
+        batch.append((f"inc-{i:08d}", created.isoformat() + "Z", "bench", "report text",
+                      rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0),
+                      rnd.choice(["high", "medium", "low", "low"]), triaged, "{}"))
+        if len(batch) >= 50_000:
+            conn.executemany("INSERT INTO incidents(id, created_at, reporter, text, lat, lon, "
+                             "severity, triage_ts, raw_json) VALUES (?,?,?,?,?,?,?,?,?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO incidents(id, created_at, reporter, text, lat, lon, "
+                         "severity, triage_ts, raw_json) VALUES (?,?,?,?,?,?,?,?,?)", batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def query_plan(kwargs):
+    sql, params = memory_bank._incident_query(25, **kwargs)
+    return [row[3] for row in get_conn().execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def legacy_latest(limit=25):
+    return get_conn().execute(
+        "SELECT id FROM incidents ORDER BY COALESCE(triage_ts, created_at) DESC LIMIT ?",
+        (limit,)).fetchall()
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 1_000_000
+    start = time.perf_counter()
+    populate(n)
+    print(f"rows={n:,} (loaded in {time.perf_counter() - start:.1f}s)")
+
+    print(f"  {'legacy COALESCE sort':<22} {timed(legacy_latest, repeat=3):8.2f} ms")
+    for label, kwargs in QUERIES:
+        plan = query_plan(kwargs)
+        ms = timed(lambda: memory_bank.list_incidents(limit=25, **kwargs))
+        print(f"  {label:<22} {ms:8.2f} ms  plan={' / '.join(plan)}")
+
+    # walk 40 pages deep with the keyset cursor; cost per page stays flat
+    cursor, pages, seen = None, 0, set()
+    start = time.perf_counter()
+    for _ in range(40):
+        page = memory_bank.list_incidents_page(limit=25, cursor=cursor)
+        ids = [row["id"] for row in page["incidents"]]
+        assert not seen.intersection(ids)
+        seen.update(ids)
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    per_page = (time.perf_counter() - start) / pages * 1000
+    plan = query_plan({"cursor": cursor or "x|y"})
+    print(f"  {'keyset page (x40)':<22} {per_page:8.2f} ms/page  plan={' / '.join(plan)}")
+
+
+if __name__ == "__main__":
+    main()
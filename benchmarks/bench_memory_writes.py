@@ -0,0 +1,99 @@
+"""
+Write throughput of the memory bank: per-statement commits vs WAL + group
+commit. Each incident is saved three times, as Receiver, Triage and
+Coordinator do.
+
+    python -m benchmarks.bench_memory_writes [incidents]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+TMP_DIR = tempfile.mkdtemp(prefix="cr-bench-")
+os.environ["MEMORY_DB"] = os.path.join(TMP_DIR, "memory.db")
+
+from src.memory import memory_bank  # noqa: E402
+from src.memory.writer import GroupCommitWriter  # noqa: E402
+from src.utils import configure_conn, now_iso  # noqa: E402
+
+INSERT = '''REPLACE INTO incidents(id, created_at, reporter, text, lat, lon, severity, triage_ts, raw_json)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+
+def _incidents(n):
+    return [{"id": str(uuid.uuid4()), "created_at": now_iso(), "reporter": "bench",
+             "text": "flooded street, people trapped", "lat": 20.6, "lon": 72.6,
+             "severity": None, "triage_ts": None, "raw_json": {}}
+            for _ in range(n)]
+
+
+def _three_saves(save, incidents):
+    start = time.perf_counter()
+    for inc in incidents:
+        save(inc)
+        inc["severity"] = "high"
+        inc["triage_ts"] = now_iso()
+        save(inc)
+        save(inc)
+    return time.perf_counter() - start
+
+
+def _legacy_conn(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute("CREATE TABLE IF NOT EXISTS incidents(id TEXT PRIMARY KEY, created_at TEXT, "
+                 "reporter TEXT, text TEXT, lat REAL, lon REAL, severity TEXT, "
+                 "triage_ts TEXT, raw_json TEXT)")
+    return conn
+
+
+def _row(inc):
+    return (inc["id"], inc["created_at"], inc["reporter"], inc["text"], inc["lat"],
+            inc["lon"], inc["severity"], inc["triage_ts"], "{}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 2_000
+
+    legacy = _legacy_conn(os.path.join(TMP_DIR, "legacy.db"))
+
+    def legacy_save(inc):
+        legacy.execute(INSERT, _row(inc))
+        legacy.commit()
+
+    wal = configure_conn(sqlite3.connect(os.path.join(TMP_DIR, "wal.db"),
+                                         check_same_thread=False))
+    wal.executescript("CREATE TABLE IF NOT EXISTS incidents(id TEXT PRIMARY KEY, created_at TEXT, "
+                      "reporter TEXT, text TEXT, lat REAL, lon REAL, severity TEXT, "
+                      "triage_ts TEXT, raw_json TEXT)")
+    wal_sync = GroupCommitWriter(conn_factory=lambda: wal, durability="sync")
+
+    results = [
+        ("rollback journal, commit per write", _three_saves(legacy_save, _incidents(n)), None),
+        ("WAL, commit per write", _three_saves(
+            lambda inc: wal_sync.submit(("incidents", inc["id"]), INSERT, _row(inc)),
+            _incidents(n)), wal_sync.stats),
+    ]
+
+    memory_bank.set_durability("batch")
+    writer = memory_bank.writer
+    start = time.perf_counter()
+    _three_saves(memory_bank.save_incident, _incidents(n))
+    memory_bank.flush()
+    results.append(("WAL, group commit", time.perf_counter() - start, writer.stats))
+
+    print(f"incidents={n:,} (3 saves each)")
+    for label, secs, stats in results:
+        extra = ""
+        if stats:
+            extra = f"  commits={stats['batches']:,} coalesced={stats['coalesced']:,}"
+        print(f"  {label:<36} {secs * 1000:9.1f} ms  {3 * n / secs:10.0f} writes/s{extra}")
+
+
+if __name__ == "__main__":
+    main()
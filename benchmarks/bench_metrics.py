@@ -0,0 +1,72 @@
+"""
+Cost of the instrumentation: per-call overhead of `metrics.timer()` with
+metrics on and off, /metrics render time, and the slowdown of a
+CPU-bound loop (keyword triage) while the sampling profiler is running.
+
+    python -m benchmarks.bench_metrics [calls]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src import metrics  # noqa: E402
+from src.agents.triage import TriageAgent  # noqa: E402
+
+from .bench_triage import make_corpus  # noqa: E402
+
+
+def per_call(n, enabled):
+    metrics.METRICS_ENABLED = enabled
+    timer = metrics.timer
+    start = time.perf_counter()
+    for _ in range(n):
+        with timer("bench"):
+            pass
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    baseline = time.perf_counter() - start
+    return (elapsed - baseline) / n
+
+
+def classify_rate(texts, triage):
+    start = time.perf_counter()
+    for text in texts:
+        triage.classify(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 1_000_000
+    print(f"timer overhead over {n:,} calls")
+    print(f"  disabled {per_call(n, False) * 1e9:8.0f} ns/call")
+    print(f"  enabled  {per_call(n, True) * 1e9:8.0f} ns/call")
+
+    for stage in range(40):
+        metrics.observe(f"stage{stage}", 0.001 * stage)
+    start = time.perf_counter()
+    for _ in range(100):
+        body = metrics.render()
+    print(f"render    {(time.perf_counter() - start) / 100 * 1e3:8.2f} ms "
+          f"({len(body.splitlines()):,} lines)")
+
+    triage = TriageAgent()
+    texts = make_corpus(200_000)
+    classify_rate(texts[:10_000], triage)
+    off = classify_rate(texts, triage)
+    metrics.profiler.start()
+    on = classify_rate(texts, triage)
+    metrics.profiler.stop()
+    print(f"classify  {off:,.0f}/s profiler off, {on:,.0f}/s on "
+          f"({(1 - on / off) * 100:.1f}% slower, {metrics.profiler.samples} samples)")
+
+
+if __name__ == "__main__":
+    main()
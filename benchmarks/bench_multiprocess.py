@@ -0,0 +1,109 @@
+"""
+Several worker processes behind one database with FEED_STORE=sqlite:
+POST /api/incidents throughput for 1, 2 and 4 workers (reports spread
+round-robin over them), then whether every worker serves the same
+/api/stream and dashboard. The in-process feed with one worker is the
+baseline.
+
+    python -m benchmarks.bench_multiprocess [reports] [workers ...]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SERVE = r"""
+import io, logging, sys
+from werkzeug.serving import make_server
+from src.tools import geocode
+from src.tools.geocode import GeocodeService, TokenBucket, stub_backend
+from src.app import app
+geocode.set_service(GeocodeService(backend=stub_backend, limiter=TokenBucket(rate=1e6, burst=1000)))
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+server = make_server("127.0.0.1", 0, app, threaded=True)
+print(server.server_port, flush=True)
+sys.stdout = io.StringIO()
+server.serve_forever()
+"""
+
+
+def start_workers(n, store, db_path):
+    env = dict(os.environ, MEMORY_DB=db_path, FEED_STORE=store, DEDUP_ENABLED="0")
+    procs = [subprocess.Popen([sys.executable, "-c", _SERVE], cwd=ROOT, env=env,
+                              stdout=subprocess.PIPE, text=True) for _ in range(n)]
+    return procs, [int(p.stdout.readline()) for p in procs]
+
+
+def _get(port, path):
+    conn = HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp.status, body
+
+
+def _client(ports, offset, count, errors):
+    conns = {port: HTTPConnection("127.0.0.1", port, timeout=30) for port in ports}
+    for i in range(count):
+        port = ports[(offset + i) % len(ports)]
+        body = json.dumps({"reporter": f"bench-{offset}", "text": f"bridge collapsed ref{offset}-{i}",
+                           "lat": 18.0 + (i % 40) * 0.1, "lon": 73.0 + (offset % 20) * 0.1})
+        conns[port].request("POST", "/api/incidents", body, {"Content-Type": "application/json"})
+        resp = conns[port].getresponse()
+        resp.read()
+        if resp.status != 200:
+            errors.append(resp.status)
+    for conn in conns.values():
+        conn.close()
+
+
+def run(workers, store, reports, clients=8):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="cr-mp-"), "memory.db")
+    procs, ports = start_workers(workers, store, db_path)
+    try:
+        for port in ports:
+            _get(port, "/healthz")
+        errors = []
+        per_client = reports // clients
+        threads = [threading.Thread(target=_client, args=(ports, c, per_client, errors))
+                   for c in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        time.sleep(0.2)  # > FEED_POLL_MS, so every worker has pulled the last events
+        streams = {json.loads(_get(port, "/api/stream")[1])["last_id"] for port in ports}
+        feeds = {_get(port, "/api/stream")[1] for port in ports}
+        pages = {_get(port, "/")[1] for port in ports}
+        consistent = len(streams) == 1 and len(feeds) == 1 and len(pages) == 1
+        return per_client * clients / elapsed, errors, consistent, streams
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    reports = int(argv[0]) if argv else 2_000
+    counts = [int(a) for a in argv[1:]] or [1, 2, 4]
+    print(f"{reports:,} reports, {os.cpu_count()} CPU(s)")
+    rate, errors, _, _ = run(1, "memory", reports)
+    print(f"  memory feed, 1 worker   {rate:9,.0f} req/s  errors={len(errors)}")
+    for n in counts:
+        rate, errors, consistent, last_ids = run(n, "sqlite", reports)
+        print(f"  sqlite feed, {n} worker(s) {rate:9,.0f} req/s  errors={len(errors)}  "
+              f"workers agree: {'yes' if consistent else 'NO'} (last_id {sorted(last_ids)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+A season of incidents, seen markers and geocode rows in one database, then
+the same database after `partitions.maintain()`: file sizes, write and
+query latency, VACUUM and backup time, and the cost of a cold archive
+query.
+
+    python -m benchmarks.bench_partitions [incidents] [weeks]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = tempfile.mkdtemp(prefix="cr-bench-")
+os.environ.setdefault("MEMORY_DB", os.path.join(BENCH_DIR, "memory.db"))
+
+from src.memory import memory_bank, partitions  # noqa: E402
+from src.utils import DB_PATH, get_conn  # noqa: E402
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+def populate(n, weeks, seed=3):
+    rnd = random.Random(seed)
+    conn = get_conn()
+    start = NOW - timedelta(weeks=weeks)
+    step = weeks * 7 * 86400 / n
+    batch = []
+    for i in range(n):
+        created = start + timedelta(seconds=i * step)
+        raw = {"reporter": "bench", "text": f"flooding near ward {i % 500}, water rising",
+               "place_text": f"Ward {i % 500}, Surat", "source": "web",
+               "received_at": created.isoformat() + "Z", "tags": ["flood", "rescue"]}
+        batch.append((f"inc-{i:08d}", created.isoformat() + "Z", "bench", raw["text"],
+                      rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0),
+                      rnd.choice(["high", "medium", "low", "low"]),
+                      (created + timedelta(seconds=3)).isoformat() + "Z", json.dumps(raw)))
+        if len(batch) >= 50_000:
+            conn.executemany("INSERT INTO incidents(id, created_at, reporter, text, lat, lon, "
+                             "severity, triage_ts, raw_json) VALUES (?,?,?,?,?,?,?,?,?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO incidents(id, created_at, reporter, text, lat, lon, "
+                         "severity, triage_ts, raw_json) VALUES (?,?,?,?,?,?,?,?,?)", batch)
+    # one seen marker per report, a geocode row per 5 (a fifth of them stub fallbacks)
+    conn.executemany("INSERT INTO seen_items(item_hash, seen_at) VALUES (?, ?)",
+                     ((f"h{i:08d}", (start + timedelta(seconds=i * step)).isoformat() + "Z")
+                      for i in range(n)))
+    conn.executemany("INSERT INTO geocode_cache(place_text, lat, lon, cached_at, source) VALUES (?,?,?,?,?)",
+                     ((f"place {i}", 20.0, 72.0, (start + timedelta(seconds=i * step * 5)).isoformat() + "Z",
+                       "stub" if i % 5 == 0 else "upstream") for i in range(n // 5)))
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def db_bytes():
+    return sum(os.path.getsize(DB_PATH + suffix) for suffix in ("", "-wal") if os.path.exists(DB_PATH + suffix))
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def writes(n=5000):
+    """ms per incident upsert + seen marker, committed in group-commit batches."""
+    base = NOW.isoformat() + "Z"
+    start = time.perf_counter()
+    for i in range(n):
+        memory_bank.save_incident({"id": f"new-{random.random()}", "created_at": base, "text": "new report",
+                                   "severity": "low", "raw_json": {"text": "new report"}})
+        memory_bank.mark_seen(f"new-{random.random()}")
+    memory_bank.flush()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def measure(label):
+    out = {
+        "database MB": db_bytes() / 1e6,
+        "write ms": writes(),
+        "latest page ms": timed(lambda: memory_bank.list_incidents(limit=25)),
+        "severity page ms": timed(lambda: memory_bank.list_incidents(limit=25, severity="high")),
+        "seen lookup ms": timed(lambda: memory_bank.is_seen("h00000042"), repeat=200),
+    }
+    start = time.perf_counter()
+    partitions.vacuum(force=True)
+    out["VACUUM s"] = time.perf_counter() - start
+    out["database MB"] = db_bytes() / 1e6
+    start = time.perf_counter()
+    partitions.backup(os.path.join(BENCH_DIR, f"backup-{label}.db"))
+    out["backup s"] = time.perf_counter() - start
+    return out
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 500_000
+    weeks = int(argv[1]) if len(argv) > 1 else 26
+    start = time.perf_counter()
+    populate(n, weeks)
+    print(f"{n:,} incidents over {weeks} weeks (loaded in {time.perf_counter() - start:.1f}s)")
+    before = measure("before")
+
+    start = time.perf_counter()
+    result = partitions.maintain((NOW - datetime(1970, 1, 1)).total_seconds())
+    took = time.perf_counter() - start
+    parts = partitions.list_partitions()
+    archive_mb = sum(p["bytes"] for p in parts) / 1e6
+    print(f"maintain: archived {sum(result['archived'].values()):,} incidents into {len(parts)} files "
+          f"({archive_mb:.1f} MB), pruned {result['pruned']} in {took:.1f}s")
+    after = measure("after")
+
+    print(f"  {'':<18} {'one database':>14} {'partitioned':>14}")
+    for key in before:
+        print(f"  {key:<18} {before[key]:14.3f} {after[key]:14.3f}")
+
+    old = parts[len(parts) // 2]
+    window = {"since": old["min_ts"], "until": old["max_ts"]}
+    partitions.archives = partitions.ArchiveCache()
+    cold = timed(lambda: memory_bank.list_incidents(limit=25, **window), repeat=1)
+    warm = timed(lambda: memory_bank.list_incidents(limit=25, **window))
+    print(f"  archived week {old['week']} ({old['rows']:,} rows, {old['bytes'] / 1e6:.1f} MB): "
+          f"first page cold {cold:.1f} ms, warm {warm:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Stored report payloads (raw_json): bytes on disk and list latency with the
+old storage path (the payload as plain JSON text, decoded for every listed
+row) vs. `encode_raw` (serialized once, trimmed past RAW_JSON_MAX_BYTES,
+zlib past RAW_JSON_COMPRESS_BYTES) and the `raw=False` projection.
+
+    python -m benchmarks.bench_raw_json [incidents]
+
+The payload mix is 70% web form posts, 28% feed/CSV rows with an HTML
+description, and 2% mobile reports carrying a base64 photo.
+"""
+import base64
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MEMORY_DB", os.path.join(tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src.memory import memory_bank  # noqa: E402
+from src.utils import DB_PATH, get_conn  # noqa: E402
+
+INSERT = ("INSERT INTO incidents(id, created_at, reporter, text, lat, lon, severity, triage_ts, raw_json) "
+          "VALUES (?,?,?,?,?,?,?,?,?)")
+
+
+def make_payload(rnd, i):
+    kind = rnd.random()
+    text = f"water entering houses near ward {i % 500}, families on rooftops"
+    report = {"reporter": f"user{i % 977}", "text": text, "place_text": f"Ward {i % 500}, Surat",
+              "lat": None, "lon": None}
+    if kind < 0.70:
+        return report
+    if kind < 0.98:
+        report.update(source="feed", guid=f"urn:uuid:{rnd.getrandbits(128):032x}",
+                      title=text[:40], link=f"https://news.example.org/flood/{i}",
+                      description="<p>" + " ".join(rnd.choice(WORDS) for _ in range(180)) + "</p>")
+        return report
+    report.update(source="mobile", photo=base64.b64encode(rnd.randbytes(30_000)).decode("ascii"))
+    return report
+
+
+WORDS = ("flood rescue boats water level rising river embankment ward residents relief camp "
+         "evacuated district collector said teams deployed overnight rain heavy").split()
+
+
+def populate(n, encode, seed=5):
+    rnd = random.Random(seed)
+    conn = get_conn()
+    conn.execute("DELETE FROM incidents")
+    base = datetime(2026, 10, 1)
+    encode_s = 0.0
+    batch = []
+    for i in range(n):
+        payload = make_payload(rnd, i)
+        start = time.perf_counter()
+        raw = encode(payload)
+        encode_s += time.perf_counter() - start
+        created = (base + timedelta(seconds=i * 5)).isoformat() + "Z"
+        batch.append((f"inc-{i:08d}", created, payload["reporter"], payload["text"],
+                      rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0), rnd.choice(["high", "low"]),
+                      created, raw))
+        if len(batch) >= 10_000:
+            conn.executemany(INSERT, batch)
+            batch = []
+    conn.executemany(INSERT, batch)
+    conn.commit()
+    conn.execute("VACUUM")
+    stored = conn.execute("SELECT SUM(LENGTH(raw_json)) FROM incidents").fetchone()[0]
+    memory_bank.recent.invalidate()
+    return encode_s / n * 1e6, stored, os.path.getsize(DB_PATH)
+
+
+def legacy_list(limit):
+    """The old read path: every row's payload read and json.loads'ed."""
+    sql, params = memory_bank._incident_query(limit)
+    with memory_bank.read_conn() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    out = []
+    for row in rows:
+        payload = dict(row)
+        payload.pop("sort_ts")
+        payload["raw_json"] = json.loads(payload["raw_json"])
+        allocation = payload.pop("allocation_json")
+        payload["allocation"] = json.loads(allocation) if allocation else None
+        out.append(payload)
+    return out
+
+
+def timed(fn, repeat=50):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 50_000
+    print(f"{n:,} incidents")
+    results = {}
+
+    def legacy_encode(payload):
+        return json.dumps(payload, ensure_ascii=False)
+
+    enc_us, stored, size = populate(n, legacy_encode)
+    results["plain JSON, decoded"] = (enc_us, stored, size, {
+        limit: timed(lambda: legacy_list(limit)) for limit in (25, 200)})
+
+    enc_us, stored, size = populate(n, lambda payload: memory_bank.encode_raw(payload).stored)
+    for label, raw in (("encode_raw, decoded", True), ("encode_raw, raw=False", False)):
+        results[label] = (enc_us, stored, size, {
+            limit: timed(lambda: memory_bank.list_incidents(limit=limit, archived=False, raw=raw))
+            for limit in (25, 200)})
+
+    print(f"  {'':<24} {'encode us':>10} {'raw_json MB':>12} {'file MB':>9} {'25 rows ms':>11} {'200 rows ms':>12}")
+    for label, (enc_us, stored, size, lists) in results.items():
+        print(f"  {label:<24} {enc_us:10.1f} {stored / 1e6:12.1f} {size / 1e6:9.1f} "
+              f"{lists[25]:11.3f} {lists[200]:12.3f}")
+    for raw in (True, False):
+        ms = timed(lambda: memory_bank.recent_incidents(12, raw=raw), repeat=500)
+        print(f"  dashboard view, 12 rows{'' if raw else ', raw=False'}: {ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Columnar ResourceStore vs the list of resource dicts + GridIndex it
+replaced: Python heap held by the inventory (tracemalloc), build time,
+nearest-k query time, availability flips, and persist / mmap load against
+rebuilding from dicts.
+
+    python -m benchmarks.bench_resource_store [resources] [queries]
+"""
+import gc
+import heapq
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.tools.resource_store import ResourceStore
+from src.tools.spatial_index import KM_PER_DEG_LAT, candidate_cells, cell_of, haversine_km
+
+from .bench_find_nearby import make_resources
+
+
+class GridIndex:
+    """
+    Incremental grid index keyed by resource id: the dict-based index that
+    ResourceStore replaced, kept here as the baseline.
+
+    Each entry stores (lat, lon, available, item) where `item` is the
+    object handed back from queries (normally the resource dict).
+    """
+
+    def __init__(self, cell_deg=0.25):
+        self.cell_deg = float(cell_deg)
+        self._lon_cells = int(math.ceil(360.0 / self.cell_deg))
+        self._cells = {}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        return entry[3] if entry else None
+
+    def _cell(self, lat, lon):
+        return cell_of(lat, lon, self.cell_deg, self._lon_cells)
+
+    def insert(self, key, lat, lon, item, available=True):
+        """Add or move an entry. Re-inserting an existing key relocates it."""
+        if key in self._entries:
+            self.remove(key)
+        cell = self._cell(lat, lon)
+        self._entries[key] = [lat, lon, bool(available), item, cell]
+        self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        bucket = self._cells.get(entry[4])
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[entry[4]]
+        return True
+
+    def set_available(self, key, available):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        entry[2] = bool(available)
+        return True
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        return candidate_cells(lat, lon, radius_km, self.cell_deg, self._lon_cells)
+
+    def within(self, lat, lon, radius_km, available_only=False):
+        """Return [(distance_km, item), ...] within `radius_km`, unsorted."""
+        out = []
+        cells = self._cells
+        entries = self._entries
+        for cell in self._candidate_cells(lat, lon, radius_km):
+            bucket = cells.get(cell)
+            if not bucket:
+                continue
+            for key in bucket:
+                elat, elon, avail, item, _ = entries[key]
+                if available_only and not avail:
+                    continue
+                d = haversine_km(lat, lon, elat, elon)
+                if d <= radius_km:
+                    out.append((d, item))
+        return out
+
+    def nearest(self, lat, lon, k=5, radius_km=50, available_only=False):
+        """
+        Return up to `k` (distance_km, item) pairs within `radius_km`,
+        closest first. The search radius grows from one cell outwards so
+        dense areas stop early instead of scanning the full radius.
+        """
+        if k <= 0:
+            return []
+        r = min(radius_km, self.cell_deg * KM_PER_DEG_LAT)
+        while True:
+            found = self.within(lat, lon, r, available_only=available_only)
+            if len(found) >= k or r >= radius_km:
+                break
+            r = min(radius_km, r * 2)
+        return heapq.nsmallest(k, found, key=lambda x: x[0])
+
+
+def timed_build(build):
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    return result, time.perf_counter() - start
+
+
+def traced_bytes(build):
+    """Bytes `build()` leaves allocated (a separate run: tracing slows it down)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def dict_index(n):
+    resources = make_resources(n)
+    index = GridIndex()
+    for r in resources:
+        index.insert(r["id"], float(r.get("lat")), float(r.get("lon")), r,
+                     available=r.get("available", True))
+    return resources, index
+
+
+def with_id_table(store):
+    store.current.get("res-0")
+    return store
+
+
+def per_call(fn, args):
+    start = time.perf_counter()
+    for a in args:
+        fn(*a)
+    return (time.perf_counter() - start) / len(args)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 500_000
+    queries = int(argv[1]) if len(argv) > 1 else 2_000
+    rnd = random.Random(11)
+    points = [(rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0)) for _ in range(queries)]
+    print(f"{n:,} resources, {queries:,} queries")
+
+    dict_bytes = traced_bytes(lambda: dict_index(n))
+    store_bytes = traced_bytes(lambda: ResourceStore.from_dicts(make_resources(n)))
+    ids_bytes = traced_bytes(lambda: with_id_table(ResourceStore.from_dicts(make_resources(n))))
+    (resources, index), dict_s = timed_build(lambda: dict_index(n))
+    store, store_s = timed_build(lambda: ResourceStore.from_dicts(make_resources(n)))
+    print(f"  {'':<28} {'heap MB':>9} {'build s':>9}")
+    print(f"  {'dict list + GridIndex':<28} {dict_bytes / 1e6:9.1f} {dict_s:9.2f}")
+    print(f"  {'ResourceStore':<28} {store_bytes / 1e6:9.1f} {store_s:9.2f}")
+    print(f"  {'  + id table (lookups by id)':<28} {ids_bytes / 1e6:9.1f}")
+
+    snap = store.current
+    for lat, lon in points[:200]:
+        a = [r["id"] for _, r in index.nearest(lat, lon, k=5, radius_km=50)]
+        b = [r["id"] for _, r in snap.nearest(lat, lon, k=5, radius_km=50)]
+        assert a == b, (a, b)
+
+    print("  nearest k=5 within 50 km (us/query):")
+    args = [(lat, lon, 5, 50) for lat, lon in points]
+    print(f"    {'dict list + GridIndex':<26} {per_call(index.nearest, args) * 1e6:9.1f}")
+    print(f"    {'ResourceStore snapshot':<26} {per_call(snap.nearest, args) * 1e6:9.1f}")
+    args = [(lat, lon, 5, 50, True) for lat, lon in points]
+    print(f"    {'  available_only, dicts':<26} {per_call(index.nearest, args) * 1e6:9.1f}")
+    print(f"    {'  available_only, store':<26} {per_call(snap.nearest, args) * 1e6:9.1f}")
+
+    def scan_dicts(lat, lon):
+        return [r for r in resources
+                if haversine_km(lat, lon, float(r.get("lat")), float(r.get("lon"))) <= 50]
+
+    def scan_columns(lat, lon):
+        lat_col, lon_col = snap.lat, snap.lon
+        return [row for row in snap.rows()
+                if haversine_km(lat, lon, lat_col[row], lon_col[row]) <= 50]
+
+    few = points[:3]
+    print("  full scan (ms/query):")
+    print(f"    {'dict list, float() per row':<26} {per_call(scan_dicts, few) * 1e3:9.1f}")
+    print(f"    {'columns':<26} {per_call(scan_columns, few) * 1e3:9.1f}")
+
+    start = time.perf_counter()
+    store.current.get("res-0")
+    print(f"  first lookup by id           {(time.perf_counter() - start) * 1000:9.1f} ms  (builds the id table)")
+    ids = [(f"res-{rnd.randrange(n)}", i % 2 == 0) for i in range(5_000)]
+    print("  set_available (us/op):")
+    print(f"    {'GridIndex entry':<26} {per_call(index.set_available, ids) * 1e6:9.1f}")
+    print(f"    {'new snapshot (COW chunk)':<26} {per_call(store.set_available, ids) * 1e6:9.1f}")
+    adds = [({"id": f"new-{i}", "type": "boat", "lat": rnd.uniform(8.0, 32.0),
+              "lon": rnd.uniform(68.0, 88.0)},) for i in range(2_000)]
+    print(f"  add resource (us/op)         {per_call(store.add, adds) * 1e6:9.1f}")
+    del resources, index
+    gc.collect()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="cr-store-"), "resources.store")
+    start = time.perf_counter()
+    store.persist(path)
+    persist_s = time.perf_counter() - start
+    load_bytes = traced_bytes(lambda: ResourceStore.load(path))
+    loaded, load_s = timed_build(lambda: ResourceStore.load(path))
+    start = time.perf_counter()
+    loaded.current.nearest(*points[0])
+    first_ms = (time.perf_counter() - start) * 1000
+    mapped = loaded.current
+    for lat, lon in points[:200]:
+        a = [r["id"] for _, r in store.current.nearest(lat, lon)]
+        assert a == [r["id"] for _, r in mapped.nearest(lat, lon)]
+    print(f"  persist                      {persist_s * 1000:9.1f} ms  ({os.path.getsize(path) / 1e6:.1f} MB file)")
+    print(f"  mmap load                    {load_s * 1000:9.1f} ms  ({load_bytes / 1e6:.2f} MB heap)")
+    print(f"  first query after load       {first_ms:9.2f} ms")
+    args = [(lat, lon, 5, 50) for lat, lon in points]
+    print(f"  nearest on mapped store      {per_call(mapped.nearest, args) * 1e6:9.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load test for the agent message bus: end-to-end messages/sec and per-hop
+queue latency for a burst of reports pushed through
+Receiver -> Triage -> Coordinator -> Resource.
+
+    python -m benchmarks.bench_router [reports] [workers_per_agent...]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src import router as router_mod  # noqa: E402
+from src.tools import resource_db  # noqa: E402
+from src.tools.allocator import get_engine  # noqa: E402
+from src.tools.dedup import get_deduplicator  # noqa: E402
+from src.utils import now_iso  # noqa: E402
+
+from .bench_find_nearby import make_resources  # noqa: E402
+
+TEXTS = [
+    "building collapsed, people trapped",
+    "minor injury near the market, need help",
+    "water level rising slowly",
+    "fire spreading in warehouse",
+]
+
+
+def make_reports(n, seed=4):
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "timestamp": now_iso(),
+            "sender": "bench",
+            "receiver": "receiver",
+            "kind": "report",
+            "payload": {
+                "reporter": f"sms-{i}",
+                "text": rnd.choice(TEXTS),
+                "lat": rnd.uniform(8.0, 32.0),
+                "lon": rnd.uniform(68.0, 88.0),
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def run(n, workers):
+    get_engine().reset()
+    # every run replays the same seeded reports; don't merge them into the
+    # previous run's clusters
+    get_deduplicator().reset()
+    router = router_mod.build_default_router(
+        concurrency={name: workers for name in ("receiver", "triage", "coordinator", "resource")})
+    router_mod.set_router(router)
+    reports = make_reports(n)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for msg in reports:
+            router.route_message(msg)
+        router.join()
+        elapsed = time.perf_counter() - start
+    router.stop()
+    stats = router.stats()
+    total = sum(s["processed"] for s in stats.values())
+    print(f"workers/agent={workers}: {n:,} reports, {total:,} messages in {elapsed:.2f}s "
+          f"-> {total / elapsed:,.0f} msg/s, {n / elapsed:,.0f} reports/s")
+    for name, s in stats.items():
+        print(f"    {name:<12} processed={s['processed']:>6} errors={s['errors']} "
+              f"overflows={s['overflows']} wait p50={s['wait_p50_ms']:.2f} ms "
+              f"p99={s['wait_p99_ms']:.2f} ms max={s['wait_max_ms']:.2f} ms")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 2_000
+    levels = [int(a) for a in argv[1:]] or [1, 2, 4]
+    resource_db.resources = make_resources(20_000)
+    resource_db.rebuild_index()
+    for workers in levels:
+        run(n, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Replay a mixed-severity burst of reports (POST /api/incidents?async=1)
+and report time-to-allocation by severity, with the ingest queue in plain
+arrival order vs the severity scheduler.
+
+    python -m benchmarks.bench_scheduler [reports] [clients] [--hotspot]
+
+Time-to-allocation runs from the POST to the end of the allocation job.
+The default mix is 10% high, 20% medium and 70% low reports.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+# every report in the burst is distinct
+os.environ.setdefault("DEDUP_ENABLED", "0")
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from src import app as app_mod  # noqa: E402
+from src.ingest import IngestQueue  # noqa: E402
+from src.scheduler import SeverityScheduler  # noqa: E402
+from src.tools import resource_db  # noqa: E402
+from src.tools.allocator import get_engine  # noqa: E402
+
+from .bench_concurrency import percentile  # noqa: E402
+from .bench_find_nearby import make_resources  # noqa: E402
+
+TEXTS = {
+    "high": "building collapsed, people trapped",
+    "medium": "two injured, need help",
+    "low": "power line down on the street",
+}
+MIX = ["high"] * 1 + ["medium"] * 2 + ["low"] * 7
+
+
+def make_burst(n, hotspot, seed=13):
+    rnd = random.Random(seed)
+    burst = []
+    for i in range(n):
+        severity = rnd.choice(MIX)
+        if hotspot:
+            lat, lon = 20.6 + rnd.uniform(-0.05, 0.05), 72.6 + rnd.uniform(-0.05, 0.05)
+        else:
+            lat, lon = rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0)
+        burst.append((severity, {"reporter": "bench", "text": f"{TEXTS[severity]} (report {i})",
+                                 "lat": lat, "lon": lon}))
+    return burst
+
+
+def _client(port, reports, posted):
+    conn = HTTPConnection("127.0.0.1", port, timeout=60)
+    for severity, report in reports:
+        start = time.perf_counter()
+        conn.request("POST", "/api/incidents?async=1", json.dumps(report),
+                     {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        body = json.loads(resp.read())
+        assert resp.status == 202, body
+        posted[body["incident_id"]] = (severity, start)
+    conn.close()
+
+
+def run(port, burst, clients, head_start):
+    app_mod.INGEST = IngestQueue(max_pending=len(burst),
+                                 scheduler=SeverityScheduler("ingest", head_start=head_start, severity=None))
+    get_engine().reset()
+    finished = {}
+    finish = app_mod._finish_incident
+
+    def timed_finish(incident, source="web"):
+        try:
+            return finish(incident, source)
+        finally:
+            finished[incident["id"]] = time.perf_counter()
+
+    app_mod._finish_incident = timed_finish
+    posted = {}
+    threads = [threading.Thread(target=_client, args=(port, burst[i::clients], posted))
+               for i in range(clients)]
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            app_mod.INGEST.join()
+    finally:
+        app_mod._finish_incident = finish
+    elapsed = time.perf_counter() - start
+    latencies = {}
+    for iid, (severity, posted_at) in posted.items():
+        latencies.setdefault(severity, []).append(finished[iid] - posted_at)
+    return elapsed, latencies, app_mod.INGEST.stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("reports", type=int, nargs="?", default=2_000)
+    parser.add_argument("clients", type=int, nargs="?", default=8)
+    parser.add_argument("--hotspot", action="store_true",
+                        help="every report in one district, whose resources run out")
+    args = parser.parse_args(argv)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    resource_db.resources = make_resources(200_000)
+    resource_db.rebuild_index()
+    server = make_server("127.0.0.1", 0, app_mod.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    burst = make_burst(args.reports, args.hotspot)
+    print(f"{args.reports:,} reports from {args.clients} clients "
+          f"({'hotspot' if args.hotspot else 'spread'})")
+    fifo = dict.fromkeys(("high", "medium", "low"), 0.0)
+    for policy, head_start in (("arrival order", fifo), ("severity", None)):
+        elapsed, latencies, stats = run(server.server_port, burst, args.clients, head_start)
+        print(f"  {policy} (drained in {elapsed:.1f} s)")
+        for severity in ("high", "medium", "low"):
+            lat = latencies.get(severity, [])
+            print(f"    {severity:<7} n={len(lat):>5}  time-to-allocation "
+                  f"p50={percentile(lat, 50) * 1000:8.1f} ms  p99={percentile(lat, 99) * 1000:8.1f} ms  "
+                  f"queue p99={stats[severity]['wait_p99_ms']:8.1f} ms  "
+                  f"missed SLO={stats[severity]['slo_missed']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold start of the web app: wall time to `import src.app` in a fresh
+interpreter, how many modules that pulls in, and the first request (which
+opens the database and replays the feed). Import must stay under a time
+budget and must not open the database or load geopy; the exit status is
+1 when it does not.
+
+    python -m benchmarks.bench_startup [runs] [--rows N] [--budget-ms MS]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "400"))
+
+_CHILD = r"""
+import contextlib, io, json, os, sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import src.app as app_mod
+imported = time.perf_counter()
+from src import utils
+db_opened = utils._conn is not None
+geopy = "geopy" in sys.modules
+modules = len(set(sys.modules) - before)
+client = app_mod.app.test_client()
+with contextlib.redirect_stdout(io.StringIO()):
+    status = client.get("/").status_code
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "modules": modules,
+                  "first_request_ms": (done - imported) * 1000, "status": status,
+                  "db_opened_on_import": db_opened, "geopy_on_import": geopy}))
+"""
+
+
+def measure(db_path=None):
+    """One cold start in a child interpreter; returns the child's numbers."""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="cr-startup-"), "memory.db")
+    env = dict(os.environ, MEMORY_DB=db_path)
+    out = subprocess.run([sys.executable, "-c", _CHILD], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(n=8):
+    """Top `n` modules by their own import time (python -X importtime)."""
+    env = dict(os.environ, MEMORY_DB=os.path.join(tempfile.mkdtemp(prefix="cr-startup-"), "memory.db"))
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.app"],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    top = sorted(rows, key=lambda r: r[1], reverse=True)[:n]
+    return [(name, self_us / 1000, cumulative_us / 1000) for cumulative_us, self_us, name in top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("runs", type=int, nargs="?", default=5)
+    parser.add_argument("--rows", type=int, default=0,
+                        help="incidents stored before starting (bootstrap cost)")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    db_path = None
+    if args.rows:
+        from .bench_list_incidents import populate
+        populate(args.rows)
+        db_path = os.environ["MEMORY_DB"]
+    runs = [measure(db_path) for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    first_ms = statistics.median(r["first_request_ms"] for r in runs)
+    print(f"cold start over {args.runs} runs (rows={args.rows:,})")
+    print(f"  import src.app      {import_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"  modules imported    {runs[0]['modules']:8d}")
+    print(f"  first request (GET /) {first_ms:6.1f} ms")
+    print("  slowest imports (self / cumulative ms):")
+    for name, self_ms, cumulative_ms in slowest_imports():
+        print(f"    {name:<40} {self_ms:7.1f} {cumulative_ms:8.1f}")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import took {import_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+    if any(r["db_opened_on_import"] for r in runs):
+        failures.append("importing src.app opened the database")
+    if any(r["geopy_on_import"] for r in runs):
+        failures.append("importing src.app loaded geopy")
+    if any(r["status"] != 200 for r in runs):
+        failures.append("first request failed")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
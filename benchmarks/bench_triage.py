@@ -0,0 +1,69 @@
+"""
+Triage classifier throughput over a synthetic corpus: the old per-keyword
+substring scans vs the compiled matcher and classify_batch.
+
+    python -m benchmarks.bench_triage [reports]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src.agents.triage import TriageAgent  # noqa: E402
+
+HIGH = ['fire', 'trapped', 'dead', 'collapsed', 'bleeding', 'tsunami', 'drowning', 'flooded']
+MEDIUM = ['injury', 'injured', 'hurt', 'help', 'evacuate', 'smoke']
+FILLER = ("near the main road the water level keeps rising and the power is out "
+          "since morning several families are waiting on rooftops for boats to arrive "
+          "and the local school has opened as a shelter").split()
+TOKENS = HIGH + MEDIUM + ['firework', 'helpline', 'surat', 'district', 'bridge']
+
+
+def legacy_classify(text):
+    t = (text or '').lower()
+    if any(w in t for w in HIGH):
+        return 'high'
+    if any(w in t for w in MEDIUM):
+        return 'medium'
+    return 'low'
+
+
+def make_corpus(n, seed=12):
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        words = rnd.sample(FILLER, rnd.randint(8, 20))
+        if rnd.random() < 0.6:
+            words.insert(rnd.randrange(len(words)), rnd.choice(TOKENS))
+        corpus.append(' '.join(words).capitalize())
+    return corpus
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    result = fn()
+    secs = time.perf_counter() - start
+    print(f"  {label:<26} {secs:7.2f}s  {n / secs:12,.0f} reports/s")
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 1_000_000
+    corpus = make_corpus(n)
+    agent = TriageAgent()
+    print(f"reports={n:,}")
+    legacy = timed("legacy substring scan", lambda: [legacy_classify(t) for t in corpus], n)
+    single = timed("compiled classify()", lambda: [agent.classify(t) for t in corpus], n)
+    batch = timed("classify_batch()", lambda: agent.classify_batch(corpus), n)
+    assert single == batch
+    diff = sum(a != b for a, b in zip(legacy, batch))
+    print(f"  labels differing from legacy (substring false hits like 'firework'): {diff:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Benchmark suite over the pipeline's hot paths, with machine-readable
+results and a regression check between two runs.
+
+    python -m benchmarks.suite run [--quick] [--only CASE ...] [--out results.json]
+    python -m benchmarks.suite compare baseline.json current.json [--threshold 0.1]
+
+Cases: find_nearby at growing resource counts, TriageAgent.classify
+throughput, save_incident / list_incidents as the incidents table grows,
+geocoding against a local stub, POST /api/incidents end to end
+through the Flask app, and cold-start import time and module count. All inputs come from seeded generators, every
+measurement is repeated and the median is kept, and `compare` exits with
+status 1 when a metric moved the wrong way by more than the threshold.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MEMORY_DB", os.path.join(
+    tempfile.mkdtemp(prefix="cr-bench-"), "memory.db"))
+
+from src.agents.triage import TriageAgent  # noqa: E402
+from src.memory import memory_bank  # noqa: E402
+from src.tools import resource_db  # noqa: E402
+from src.tools.geocode import GeocodeService, TokenBucket, stub_backend  # noqa: E402
+from src.utils import get_conn  # noqa: E402
+
+from .bench_find_nearby import make_resources  # noqa: E402
+from .bench_geocode import slow_stub  # noqa: E402
+from .bench_startup import measure as measure_startup  # noqa: E402
+from .bench_triage import make_corpus  # noqa: E402
+
+SCHEMA_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+
+
+class Results:
+    """Collects named measurements; each keeps all samples and their median."""
+
+    def __init__(self, repeats):
+        self.repeats = repeats
+        self.metrics = {}
+
+    def add(self, name, samples, unit, better):
+        samples = [float(s) for s in samples]
+        self.metrics[name] = {
+            "value": statistics.median(samples),
+            "unit": unit,
+            "better": better,
+            "samples": samples,
+        }
+        print(f"  {name:<44} {self.metrics[name]['value']:>14,.2f} {unit}")
+
+    def measure(self, name, fn, unit, better):
+        """Run `fn()` (which returns one sample) `repeats` times."""
+        self.add(name, [fn() for _ in range(self.repeats)], unit, better)
+
+
+def _rate(n, fn):
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def _per_call_us(calls, fn):
+    start = time.perf_counter()
+    for args in calls:
+        fn(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def _pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p / 100.0 * len(samples)))]
+
+
+# Cases
+
+def case_find_nearby(res, quick):
+    rnd = random.Random(31)
+    points = [(rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0)) for _ in range(500)]
+    sizes = (1_000, 10_000, 100_000) if quick else (1_000, 10_000, 100_000, 1_000_000)
+    saved = resource_db.resources
+    try:
+        for n in sizes:
+            resource_db.resources = make_resources(n)
+            resource_db.rebuild_index()
+            label = f"{n // 1000}k"
+            res.measure(f"find_nearby.{label}.query", lambda: _per_call_us(
+                points, lambda lat, lon: resource_db.find_nearby(lat, lon, radius_km=50, limit=5)),
+                "us", "lower")
+            if resource_db.np is not None:
+                res.measure(f"find_nearby_many.{label}.per_point", lambda: _per_call_us(
+                    [(points,)], lambda pts: resource_db.find_nearby_many(pts, radius_km=50, limit=5))
+                    / len(points), "us", "lower")
+    finally:
+        resource_db.resources = saved
+        resource_db.rebuild_index()
+
+
+def case_triage(res, quick):
+    texts = make_corpus(50_000 if quick else 200_000)
+    triage = TriageAgent()
+    triage.classify(texts[0])
+
+    def one_by_one():
+        classify = triage.classify
+        for text in texts:
+            classify(text)
+
+    res.measure("triage.classify", lambda: _rate(len(texts), one_by_one), "reports/s", "higher")
+    res.measure("triage.classify_batch", lambda: _rate(
+        len(texts), lambda: triage.classify_batch(texts)), "reports/s", "higher")
+
+
+def _grow_incidents(start, stop, rnd):
+    base = datetime(2026, 1, 1)
+    conn = get_conn()
+    sql = ("INSERT OR REPLACE INTO incidents(id, created_at, reporter, text, lat, lon, severity, "
+           "triage_ts, raw_json) VALUES (?,?,?,?,?,?,?,?,?)")
+    for chunk in range(start, stop, 50_000):
+        rows = []
+        for i in range(chunk, min(stop, chunk + 50_000)):
+            created = (base + timedelta(seconds=i * 8)).isoformat() + "Z"
+            rows.append((f"suite-{i:08d}", created, "bench", "report text",
+                         rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0),
+                         rnd.choice(("high", "medium", "low", "low")), created, "{}"))
+        conn.executemany(sql, rows)
+        conn.commit()
+    conn.execute("ANALYZE")
+
+
+def case_memory(res, quick):
+    rnd = random.Random(32)
+    sizes = (10_000, 100_000) if quick else (10_000, 100_000, 1_000_000)
+    batch = 2_000
+    have = 0
+    for n in sizes:
+        _grow_incidents(have, n, rnd)
+        have = n
+        label = f"{n // 1000}k"
+
+        def saves():
+            incidents = [{"id": f"save-{n}-{rnd.getrandbits(48):x}", "reporter": "bench",
+                          "text": "water rising near the bridge", "lat": rnd.uniform(8, 32),
+                          "lon": rnd.uniform(68, 88), "severity": "medium",
+                          "raw_json": {"source": "suite"}} for _ in range(batch)]
+
+            def run():
+                for inc in incidents:
+                    memory_bank.save_incident(inc)
+                memory_bank.flush()
+            return _rate(batch, run)
+
+        res.measure(f"save_incident.{label}", saves, "rows/s", "higher")
+        for query, kwargs in (("latest", {}), ("severity", {"severity": "high"}),
+                              ("bbox", {"bbox": (20.0, 72.0, 21.0, 73.0)})):
+            res.measure(f"list_incidents.{label}.{query}", lambda: _per_call_us(
+                [()] * 50, lambda: memory_bank.list_incidents(limit=25, **kwargs)) / 1000,
+                "ms", "lower")
+
+
+def case_geocode(res, quick):
+    lookups = 2_000 if quick else 10_000
+    rnd = random.Random(33)
+    places = [f"Suite Place {rnd.randrange(lookups // 10)}" for _ in range(lookups)]
+    runs = iter(range(1_000_000))
+
+    def cold():
+        # new place names each repeat, so every distinct place goes upstream
+        # (1 ms stub) and repeats within the run are coalesced or cached
+        tag = next(runs)
+        run_places = [f"{p} r{tag}" for p in places]
+        service = GeocodeService(backend=slow_stub(0.001), workers=8,
+                                 limiter=TokenBucket(rate=1e6, burst=1000))
+        try:
+            return _rate(lookups, lambda: [f.result() for f in [service.submit(p) for p in run_places]])
+        finally:
+            service.shutdown()
+
+    res.measure("geocode.cold_stub", cold, "lookups/s", "higher")
+
+    service = GeocodeService(backend=stub_backend, workers=8,
+                             limiter=TokenBucket(rate=1e6, burst=1000))
+    for fut in [service.submit(p) for p in places]:
+        fut.result()
+    res.measure("geocode.cached", lambda: _per_call_us(
+        [(p,) for p in places], lambda p: service.submit(p).result()), "us", "lower")
+    service.shutdown()
+
+
+def case_pipeline(res, quick):
+    from src import app as app_mod
+    from src.tools import geocode
+    from src.tools.allocator import get_engine
+
+    geocode.set_service(GeocodeService(backend=stub_backend, workers=8,
+                                       limiter=TokenBucket(rate=1e6, burst=1000)))
+    resource_db.resources = make_resources(20_000)
+    resource_db.rebuild_index()
+    client = app_mod.app.test_client()
+    rnd = random.Random(34)
+    n = 500 if quick else 2_000
+    words = make_corpus(n, seed=35)
+
+    def reports(count):
+        # a unique token per report keeps the dedup stage from merging them
+        return [{"text": f"{words[i % len(words)]} ref{rnd.getrandbits(40):x}",
+                 "reporter": f"sms-{i}",
+                 **({"place_text": f"Suite Town {i % 50}"} if i % 4 == 0 else
+                    {"lat": rnd.uniform(8.0, 32.0), "lon": rnd.uniform(68.0, 88.0)})}
+                for i in range(count)]
+
+    def single():
+        get_engine().reset()
+        latencies = []
+        payloads = reports(n)
+        start = time.perf_counter()
+        for body in payloads:
+            t0 = time.perf_counter()
+            resp = client.post("/api/incidents", json=body)
+            latencies.append(time.perf_counter() - t0)
+            assert resp.status_code == 200, resp.data
+        elapsed = time.perf_counter() - start
+        return n / elapsed, _pct(latencies, 50) * 1000, _pct(latencies, 99) * 1000
+
+    def batched():
+        get_engine().reset()
+        payloads = reports(n)
+
+        def run():
+            for i in range(0, n, 100):
+                resp = client.post("/api/incidents/batch", json={"incidents": payloads[i:i + 100]})
+                assert resp.status_code == 200, resp.data
+        return _rate(n, run)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        single()  # warm-up: templates, caches, allocator state
+        runs = [single() for _ in range(res.repeats)]
+        batch_runs = [batched() for _ in range(res.repeats)]
+    res.add("pipeline.post_incident", [r[0] for r in runs], "req/s", "higher")
+    res.add("pipeline.post_incident.p50", [r[1] for r in runs], "ms", "lower")
+    res.add("pipeline.post_incident.p99", [r[2] for r in runs], "ms", "lower")
+    res.add("pipeline.post_batch", batch_runs, "reports/s", "higher")
+
+
+def case_startup(res, quick):
+    # fresh interpreters against an empty database each
+    runs = [measure_startup() for _ in range(res.repeats)]
+    res.add("startup.import", [r["import_ms"] for r in runs], "ms", "lower")
+    res.add("startup.modules", [r["modules"] for r in runs], "modules", "lower")
+    res.add("startup.first_request", [r["first_request_ms"] for r in runs], "ms", "lower")
+
+
+CASES = {
+    "find_nearby": case_find_nearby,
+    "triage": case_triage,
+    "memory": case_memory,
+    "geocode": case_geocode,
+    "pipeline": case_pipeline,
+    "startup": case_startup,
+}
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=10, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    res = Results(args.repeats or (1 if args.quick else 3))
+    names = args.only or list(CASES)
+    started = time.time()
+    for name in names:
+        print(f"{name}:")
+        case_start = time.perf_counter()
+        CASES[name](res, args.quick)
+        print(f"  ({time.perf_counter() - case_start:.1f}s)")
+    report = {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "started_at": datetime.utcfromtimestamp(started).isoformat() + "Z",
+            "duration_s": round(time.time() - started, 1),
+            "commit": _git_commit(),
+            "quick": args.quick,
+            "repeats": res.repeats,
+            "cases": names,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "metrics": res.metrics,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+    print(f"wrote {args.out}")
+    return report
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Return rows of (name, old, new, change, status) where status is
+    'regressed', 'improved', 'ok', 'new' or 'missing'. `change` is the
+    relative difference oriented so that positive always means better.
+    """
+    old, new = baseline["metrics"], current["metrics"]
+    rows = []
+    for name in sorted(set(old) | set(new)):
+        if name not in new:
+            rows.append((name, old[name]["value"], None, None, "missing"))
+            continue
+        if name not in old:
+            rows.append((name, None, new[name]["value"], None, "new"))
+            continue
+        a, b = old[name]["value"], new[name]["value"]
+        if a == 0:
+            change = 0.0
+        else:
+            change = (b - a) / a
+            if new[name]["better"] == "lower":
+                change = -change
+        status = "regressed" if change < -threshold else "improved" if change > threshold else "ok"
+        rows.append((name, a, b, change, status))
+    return rows
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare_main(args):
+    baseline, current = _load(args.baseline), _load(args.current)
+    for label, report in (("baseline", baseline), ("current", current)):
+        meta = report.get("meta", {})
+        print(f"{label:<9} {meta.get('commit') or '?':<10} {meta.get('started_at', '?')} "
+              f"python {meta.get('python', '?')} quick={meta.get('quick')}")
+    if baseline.get("meta", {}).get("quick") != current.get("meta", {}).get("quick"):
+        print("warning: comparing a --quick run with a full run")
+    rows = compare(baseline, current, args.threshold)
+    for name, a, b, change, status in rows:
+        fmt = lambda v: "-" if v is None else f"{v:,.2f}"  # noqa: E731
+        pct = "" if change is None else f"{change * 100:+.1f}%"
+        flag = {"regressed": "REGRESSION", "improved": "improved"}.get(status, status if status != "ok" else "")
+        print(f"  {name:<44} {fmt(a):>14} {fmt(b):>14} {pct:>8}  {flag}")
+    regressed = [row[0] for row in rows if row[4] == "regressed"]
+    print(f"{len(regressed)} regression(s) beyond {args.threshold * 100:.0f}%")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="run the suite and write a JSON report")
+    p_run.add_argument("--quick", action="store_true", help="smaller sizes, one repeat")
+    p_run.add_argument("--repeats", type=int)
+    p_run.add_argument("--only", nargs="+", choices=sorted(CASES), metavar="CASE")
+    p_run.add_argument("--out", default="bench-results.json")
+    p_cmp = sub.add_parser("compare", help="flag regressions between two reports")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="relative change counted as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    return compare_main(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@
 from collections import deque
 import uuid
 from ..utils import now_iso
-from ..memory.memory_bank import save_incident
+from ..memory.memory_bank import save_allocation, save_incident
 # ...existing code...
 
 
@@ -36,7 +36,7 @@ class CoordinatorAgent:
                 router.route_message(out)
                 return out
         # handle resource allocations or other messages as needed
-        if kind == 'resource_allocation':
-            save_incident(payload)
+        if kind == 'resource_allocation' and payload.get('incident_id'):
+            save_allocation(payload['incident_id'], payload.get('allocation') or {})
         return None
 # ...existing code...
@@ -1,8 +1,10 @@
 # ...existing code...
-from ..utils import now_iso
-from ..memory.memory_bank import save_incident
-from ..tools.geocode import geocode
-from ..utils import save_json_field
+from .. import metrics
+from ..utils import epoch, now_iso
+from ..memory.memory_bank import encode_raw, save_incident, save_report
+from ..tools.dedup import get_deduplicator
+from ..tools.geocode import geocode_async
+from .triage import classify
 import uuid
 
 
@@ -10,24 +12,27 @@ class ReceiverAgent:
 
     name = 'receiver'
 
-    def __init__(self):
-        pass
+    def __init__(self, dedup=None):
+        self.dedup = dedup or get_deduplicator()
+        # callables invoked with the incident once deferred geocoding fills
+        # in its coordinates
+        self.located_listeners = []
 
     def receive_report(self, reporter, text, place_text=None, lat=None, lon=None, raw=None, autopush=True):
+        pending = None
         if (lat is None or lon is None) and place_text:
-            lat, lon = geocode(place_text)
-        inc = {
-            'id': str(uuid.uuid4()),
-            'created_at': now_iso(),
-            'reporter': reporter,
-            'text': text,
-            'lat': lat,
-            'lon': lon,
-            'severity': None,
-            'triage_ts': None,
-            'raw_json': save_json_field(raw or {})
-        }
-        save_incident(inc)
+            with metrics.timer('geocode'):
+                fut = geocode_async(place_text)
+            if fut.done():
+                lat, lon = fut.result()
+            else:
+                # accept the report now; coordinates are filled in later
+                pending = fut
+        inc = self._intake(str(uuid.uuid4()), reporter, text, place_text, lat, lon, raw)
+        if inc.get('duplicate_of'):
+            return self._merged(inc)
+        if pending is not None:
+            pending.add_done_callback(lambda fut: self._located(inc, fut))
         msg = {
             'id': str(uuid.uuid4()),
             'timestamp': now_iso(),
@@ -45,6 +50,109 @@ class ReceiverAgent:
             print(f"Receiver: incident {inc['id']} staged for manual routing")
         return msg
 
+    def receive_many(self, reports, geocode_timeout=None, save=True):
+        """
+        Bulk intake: geocode every distinct place in `reports` concurrently,
+        then create (or merge) one incident per report. Each report is a
+        dict with 'text' and optionally 'id', 'reporter', 'place_text',
+        'lat', 'lon', 'created_at' and 'raw'. Returns the payloads in order;
+        merged duplicates carry 'duplicate_of'. Nothing is routed; with
+        `save=False` the caller persists the incidents and duplicate
+        reports itself.
+        """
+        futures = {}
+        for r in reports:
+            place = r.get('place_text')
+            if (r.get('lat') is None or r.get('lon') is None) and place and place not in futures:
+                futures[place] = geocode_async(place)
+        out = []
+        for r in reports:
+            lat, lon = r.get('lat'), r.get('lon')
+            if (lat is None or lon is None) and r.get('place_text'):
+                try:
+                    with metrics.timer('geocode_wait'):
+                        lat, lon = futures[r['place_text']].result(geocode_timeout)
+                except Exception as exc:
+                    print(f"Receiver: geocoding {r['place_text']!r} failed: {exc}")
+                    lat = lon = None
+            out.append(self._intake(r.get('id') or str(uuid.uuid4()), r.get('reporter') or 'unknown',
+                                    r.get('text') or '', r.get('place_text'), lat, lon,
+                                    r.get('raw'), r.get('created_at'), save))
+        return out
+
+    def _intake(self, report_id, reporter, text, place_text, lat, lon, raw, created_at=None, save=True):
+        # classified up front so a more severe report is never folded into
+        # a less severe incident; triage still owns the incident's severity
+        severity = classify(text)
+        with metrics.timer('dedup'):
+            # imported reports are compared at the time they were made
+            incident_id, reports = self.dedup.observe(
+                report_id, text, lat=lat, lon=lon, place_text=place_text, severity=severity,
+                now=epoch(created_at) or None)
+        if incident_id != report_id:
+            # near-duplicate of a recent report: no new incident, triage or
+            # allocation, just a bump of the cluster's report count; the
+            # report itself is kept under the incident
+            dup = {
+                'id': report_id,
+                'created_at': created_at or now_iso(),
+                'reporter': reporter,
+                'text': text,
+                'lat': lat,
+                'lon': lon,
+                'severity': severity,
+                'raw_json': encode_raw(raw or {}),
+                'duplicate_of': incident_id,
+                'reports': reports,
+            }
+            if save:
+                save_report(dup)
+            return dup
+        inc = {
+            'id': report_id,
+            'created_at': created_at or now_iso(),
+            'reporter': reporter,
+            'text': text,
+            'lat': lat,
+            'lon': lon,
+            'severity': None,
+            'triage_ts': None,
+            'raw_json': encode_raw(raw or {})
+        }
+        if save:
+            save_incident(inc)
+        return inc
+
+    def _merged(self, report):
+        print(f"Receiver: report {report['id']} merged into incident "
+              f"{report['duplicate_of']} ({report['reports']} reports)")
+        return {
+            'id': str(uuid.uuid4()),
+            'timestamp': now_iso(),
+            'sender': self.name,
+            'receiver': None,
+            'kind': 'duplicate',
+            'payload': report,
+        }
+
+    def _located(self, inc, fut):
+        try:
+            lat, lon = fut.result()
+        except Exception as exc:
+            print(f"Receiver: geocoding failed for {inc['id']}: {exc}")
+            return
+        if lat is None or lon is None:
+            return
+        inc['lat'], inc['lon'] = lat, lon
+        save_incident(inc)
+        self.dedup.locate(inc['id'], lat, lon)
+        print(f"Receiver: located incident {inc['id']} at ({lat}, {lon})")
+        for listener in list(self.located_listeners):
+            try:
+                listener(inc)
+            except Exception as exc:
+                print(f"Receiver: located listener failed: {exc}")
+
     def receive(self, msg):
         # adapter for router -> call receive_report when router routes to 'receiver'
         payload = msg.get('payload', {})
@@ -1,22 +1,17 @@
 import uuid
-from ..tools.resource_db import find_nearby
+from ..tools.allocator import get_engine
 from ..utils import now_iso
 
 
 class ResourceAgent:
     name = 'resource'
 
-    def __init__(self):
-        pass
+    def __init__(self, engine=None):
+        self.engine = engine or get_engine()
 
-    def receive(self, msg):
-        if msg.get('kind') != 'resource_request':
-            return
-        inc = msg['payload']['incident']
-        lat, lon = inc.get('lat'), inc.get('lon')
-        nearby = find_nearby(lat, lon)
+    def _allocate(self, inc, assigned):
         allocation = {}
-        for r in nearby:
+        for r in assigned:
             allocation.setdefault(r['type'], []).append(r['id'])
         out = {'id': str(uuid.uuid4()), 'timestamp': now_iso(), 'sender': self.name, 'receiver': 'coordinator',
                'kind': 'resource_allocation', 'payload': {'incident_id': inc['id'], 'allocation': allocation}}
@@ -25,3 +20,19 @@ class ResourceAgent:
         from .. import router
         router.route_message(out)
         return out
+
+    def receive(self, msg):
+        if msg.get('kind') != 'resource_request':
+            return
+        inc = msg['payload']['incident']
+        return self._allocate(inc, self.engine.allocate(inc))
+
+    def receive_many(self, msgs):
+        """
+        Handle a backlog of resource requests with one global assignment so
+        the most severe incidents get first pick of shared resources.
+        """
+        incs = [m['payload']['incident']
+                for m in msgs if m.get('kind') == 'resource_request']
+        assigned = self.engine.allocate_many(incs)
+        return [self._allocate(inc, assigned[inc['id']]) for inc in incs]
@@ -1,7 +1,126 @@
+import json
+import os
+import re
+import threading
+import time
 import uuid
+from .. import metrics
 from ..utils import now_iso
 from ..memory.memory_bank import save_incident
 
+# Default keyword sets. Words match whole tokens, so "firework" does not
+# count as "fire", but inflected forms of a listed word do: the English
+# endings in _SUFFIXES ("deadly", "floods") and any trailing Indic vowel
+# signs ("ढही" for "ढह"). Override with a JSON file of the same shape via
+# TRIAGE_KEYWORDS_FILE; it is re-read when its mtime changes.
+DEFAULT_KEYWORDS = {
+    'high': [
+        'fire', 'wildfire', 'trapped', 'dead', 'death', 'collapsed', 'collapse',
+        'bleeding', 'tsunami', 'drowning', 'flood', 'flooded',
+        # hindi / gujarati
+        'आग', 'फंस', 'मृत', 'मृतक', 'बाढ़', 'ढह', 'આગ', 'ફસાય', 'પૂર',
+        # spanish
+        'incendio', 'atrapado', 'muerto', 'derrumbe', 'inundado', 'inundación',
+    ],
+    'medium': [
+        'injury', 'injuries', 'injured', 'hurt', 'help', 'evacuate', 'evacuated',
+        'evacuation', 'smoke',
+        'घायल', 'मदद', 'धुआं', 'ઘાયલ', 'મદદ',
+        'herido', 'ayuda', 'evacuar', 'humo',
+    ],
+}
+KEYWORDS_FILE = os.getenv('TRIAGE_KEYWORDS_FILE')
+RELOAD_CHECK_S = 2.0
+# distinct texts remembered within one classify_batch call
+BATCH_MEMO_SIZE = 10000
+
+# letters, digits and the combining marks used by Indic scripts all count as
+# "inside a word" for boundary purposes
+_WORD = r'\w\u0300-\u036f\u0900-\u0dff'
+# endings a keyword may carry: English inflections, or a run of Devanagari /
+# Gujarati vowel signs and other combining marks
+_SUFFIXES = (r'(?:s|es|ed|ing|ly|less|'
+             r'[\u0900-\u0903\u093a-\u093c\u093e-\u094f\u0951-\u0957\u0962\u0963'
+             r'\u0a81-\u0a83\u0abc\u0abe-\u0acd\u0ae2\u0ae3]+)?')
+
+
+class KeywordMatcher:
+    """
+    All severity keywords compiled into one regex over lower-cased text.
+    A plain word boundary in front keeps the scan fast; after the keyword
+    and an optional inflection (_SUFFIXES), the word must end.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = {level: [w.lower() for w in words] for level, words in keywords.items()}
+        alternatives = []
+        for level in ('high', 'medium'):
+            words = sorted(set(self.keywords.get(level, [])), key=len, reverse=True)
+            if words:
+                alternatives.append('(?P<%s>%s)' % (level, '|'.join(map(re.escape, words))))
+        if alternatives:
+            self.pattern = re.compile(
+                r'\b(?:%s)%s(?![%s])' % ('|'.join(alternatives), _SUFFIXES, _WORD))
+        else:
+            self.pattern = None
+
+    def classify(self, text):
+        if not text or self.pattern is None:
+            return 'low'
+        severity = 'low'
+        for m in self.pattern.finditer(text.lower()):
+            if m.lastgroup == 'high':
+                return 'high'
+            severity = 'medium'
+        return severity
+
+
+def _load_keywords(path):
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    return {level: data.get(level, []) for level in ('high', 'medium')}
+
+
+class TriageRules:
+    """Holds the active matcher and hot-reloads it from KEYWORDS_FILE."""
+
+    def __init__(self, path=KEYWORDS_FILE):
+        self.path = path
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.matcher = KeywordMatcher(DEFAULT_KEYWORDS)
+        self.maybe_reload(force=True)
+
+    def set_keywords(self, keywords):
+        self.matcher = KeywordMatcher(keywords)
+
+    def maybe_reload(self, force=False):
+        if not self.path:
+            return self.matcher
+        now = time.monotonic()
+        if not force and now - self._checked < RELOAD_CHECK_S:
+            return self.matcher
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime != self._mtime:
+                    self.matcher = KeywordMatcher(_load_keywords(self.path))
+                    self._mtime = mtime
+                    print(f"Triage: loaded keywords from {self.path}")
+            except (OSError, ValueError) as exc:
+                print(f"Triage: keeping current keywords, reload failed: {exc}")
+        return self.matcher
+
+
+rules = TriageRules()
+
+
+def classify(text):
+    """Severity of `text` under the active keyword rules."""
+    return rules.maybe_reload().classify(text)
+
 
 class TriageAgent:
 
@@ -11,12 +130,26 @@ class TriageAgent:
         pass
 
     def classify(self, text):
-        t = (text or '').lower()
-        if any(w in t for w in ['fire', 'trapped', 'dead', 'collapsed', 'bleeding', 'tsunami', 'drowning', 'flooded']):
-            return 'high'
-        if any(w in t for w in ['injury', 'injured', 'hurt', 'help', 'evacuate', 'smoke']):
-            return 'medium'
-        return 'low'
+        with metrics.timer('classify'):
+            return classify(text)
+
+    def classify_batch(self, texts):
+        """Classify many reports with one matcher lookup; repeats are scored once."""
+        with metrics.timer('classify_batch'):
+            return self._classify_batch(texts)
+
+    def _classify_batch(self, texts):
+        classify = rules.maybe_reload().classify
+        seen = {}
+        out = []
+        for text in texts:
+            severity = seen.get(text)
+            if severity is None:
+                severity = classify(text)
+                if len(seen) < BATCH_MEMO_SIZE:
+                    seen[text] = severity
+            out.append(severity)
+        return out
 
     def receive(self, msg):
         if msg.get('kind') != 'report':
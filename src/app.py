@@ -5,29 +5,48 @@ Run locally with:
     python -m src.app
 or
     flask --app src.app run
+
+`create_app()` builds the Flask app; the module-level `app` is one built
+at import for the commands above. Importing this module opens no database
+connection and does no I/O: the schema is created when the first query
+runs, and the feed is replayed from stored incidents on the first request
+(`ensure_started()`).
 """
 
-from collections import deque
+import os
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from flask import Flask, jsonify, render_template, request
+from flask import Blueprint, Flask, Response, jsonify, render_template, request, stream_with_context, url_for
 
+from . import metrics
 from .agents.receiver import ReceiverAgent
 from .agents.triage import TriageAgent
-from .memory.memory_bank import list_incidents, save_incident
-from .tools.resource_db import find_nearby
+from .feed import SharedEventFeed, make_feed
+from .ingest import IngestBusy, IngestQueue
+from .memory import partitions
+from .memory.memory_bank import (close_incident, list_incidents_page, list_reports, load_open_allocations,
+                                  recent, recent_incidents, save_allocation, save_incident)
+from .memory.writer import writer as memory_writer
+from .router import router_stats
+from .tools.allocator import HOLD_S, get_engine
+from .tools.geocode import get_cache as get_geocode_cache
+from .tools.geocode import get_service as get_geocode_service
+from .tools.resource_db import find_nearby_many
 from .utils import now_iso
 
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATE_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
 
-app = Flask(
-    __name__,
-    template_folder=str(TEMPLATE_DIR),
-    static_folder=str(STATIC_DIR),
-)
+web = Blueprint("web", __name__)
+# /debug routes (the sampling profiler); registered only when enabled or when
+# the app runs in debug mode, since they are unauthenticated
+debug = Blueprint("debug", __name__, url_prefix="/debug")
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0").lower() in ("1", "true", "yes")
 
 receiver_agent = ReceiverAgent()
 triage_agent = TriageAgent()
@@ -37,7 +56,26 @@ PIPELINE_STEPS = [
     {"label": "Coordinator", "description": "Contextualize incident timeline"},
     {"label": "Resource", "description": "Allocate nearest responders"},
 ]
-EVENT_FEED = deque(maxlen=60)
+# "memory" keeps the live feed in this process; "sqlite" keeps it in the
+# database so every worker process (or node on a shared volume) serves the
+# same feed and dashboard
+FEED_STORE = os.getenv("FEED_STORE", "memory")
+# sequenced copy of every feed change, encoded once and fanned out to
+# /api/stream long-polls and SSE subscribers; also the live events by
+# incident, so late geocoding results and duplicates update them in place
+FEED = make_feed(FEED_STORE, maxlen=60)
+# "sync" runs the whole pipeline before responding; "async" persists the
+# report, answers 202 and finishes triage/allocation in the background.
+# Clients can also opt in per request with ?async=1 or Prefer: respond-async.
+INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+INGEST = IngestQueue()
+# orders the persist-and-publish of allocations; the engine, writer and feed
+# lock themselves, so allocation runs outside it
+FEED_LOCK = threading.RLock()
+# last rendered dashboard as (etag, html)
+_DASHBOARD_CACHE: Dict[str, Any] = {}
+_STARTED = threading.Event()
+_START_LOCK = threading.Lock()
 
 
 def _safe_float(value: Any) -> Optional[float]:
@@ -61,8 +99,8 @@ def _format_resources(raw_resources: List[Dict[str, Any]]) -> Dict[str, List[Dic
     return allocation
 
 
-def _record_event(incident: Dict[str, Any], allocation: Dict[str, List[Dict[str, Any]]], source: str) -> Dict[str, Any]:
-    event = {
+def _build_event(incident: Dict[str, Any], allocation: Dict[str, List[Dict[str, Any]]], source: str) -> Dict[str, Any]:
+    return {
         "id": incident.get("id"),
         "reporter": incident.get("reporter"),
         "text": incident.get("text"),
@@ -73,6 +111,7 @@ def _record_event(incident: Dict[str, Any], allocation: Dict[str, List[Dict[str,
         "triage_ts": incident.get("triage_ts"),
         "stage": "Resources ready" if allocation else "Triaged",
         "allocation": allocation,
+        "reports": 1,
         "source": source,
         "timeline": [
             {"label": "Receiver", "ts": incident.get("created_at")},
@@ -80,20 +119,112 @@ def _record_event(incident: Dict[str, Any], allocation: Dict[str, List[Dict[str,
             {"label": "Resource", "ts": now_iso() if allocation else None},
         ],
     }
-    EVENT_FEED.appendleft(event)
+
+
+def _record_event(incident: Dict[str, Any], allocation: Dict[str, List[Dict[str, Any]]], source: str) -> Dict[str, Any]:
+    event = _build_event(incident, allocation, source)
+    with FEED_LOCK:
+        FEED.publish(event)
+    return event
+
+
+def _current_allocation(incident_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    # read under FEED_LOCK right before persisting, so a retry or release
+    # that landed since the caller allocated is never overwritten
+    return _format_resources(get_engine().assigned(incident_id))
+
+
+def _set_allocation(incident_id: str) -> None:
+    with FEED_LOCK:
+        allocation = _current_allocation(incident_id)
+        save_allocation(incident_id, allocation)
+
+        def allocated(event: Dict[str, Any]) -> None:
+            event["allocation"] = allocation
+            if allocation:
+                event["stage"] = "Resources ready"
+                event["timeline"][-1]["ts"] = now_iso()
+        FEED.update(incident_id, allocated)
+
+
+def _retry_unmet() -> None:
+    """Retry incidents short of resources and persist whatever they gained."""
+    for incident_id in get_engine().retry_unmet():
+        _set_allocation(incident_id)
+
+
+def _on_located(incident: Dict[str, Any]) -> None:
+    """Allocate for an incident whose coordinates arrived after triage."""
+    incident_id = incident.get("id")
+    _retry_unmet()
+    with FEED_LOCK:
+        if "allocation" not in incident:
+            # located before allocation ran: _allocate sees the coordinates
+            return
+        # persisted whether or not the event is still in the live feed
+        allocation = _current_allocation(incident_id)
+        incident["allocation"] = allocation
+        save_allocation(incident_id, allocation)
+
+        def located(event: Dict[str, Any]) -> None:
+            event["lat"] = incident.get("lat")
+            event["lon"] = incident.get("lon")
+            event["allocation"] = allocation
+            if allocation:
+                event["stage"] = "Resources ready"
+                event["timeline"][-1]["ts"] = now_iso()
+        FEED.update(incident_id, located)
+
+
+def _merge_duplicate(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold a near-duplicate report into its cluster's feed event."""
+    incident_id = report["duplicate_of"]
+    with FEED_LOCK:
+        event = FEED.update(incident_id, lambda event: event.update(reports=report["reports"]))
+    if event is None:
+        # the cluster head has already scrolled out of the live feed
+        return {"id": incident_id, "stage": "Merged", "reports": report["reports"]}
     return event
 
 
 def _bootstrap_feed() -> None:
-    historical = list_incidents(limit=8)
-    for inc in historical:
-        allocation = _format_resources(
-            find_nearby(inc.get("lat"), inc.get("lon"), radius_km=80, limit=3)
+    # retention and archiving of closed weeks, in the background
+    partitions.start_maintenance()
+    get_geocode_cache().warm()
+    # resources held by open incidents stay held across restarts
+    since = datetime.utcfromtimestamp(time.time() - HOLD_S).isoformat() + "Z"
+    get_engine().restore(load_open_allocations(since))
+    historical = recent_incidents(8, raw=False)
+    # rows saved before allocations were persisted: show nearby resources
+    legacy = [inc for inc in historical if inc.get("allocation") is None]
+    if legacy:
+        nearby = find_nearby_many(
+            [(inc.get("lat"), inc.get("lon")) for inc in legacy], radius_km=80, limit=3
         )
-        _record_event(inc, allocation, source="history")
+        for inc, hits in zip(legacy, nearby):
+            inc["allocation"] = _format_resources(hits)
+    # a shared feed that already has events needs no replay
+    FEED.seed([_build_event(inc, inc["allocation"], source="history") for inc in historical])
 
 
-def _process_incident(payload: Dict[str, Any], source: str = "web") -> Dict[str, Any]:
+def _on_remote_events(entries: List[Any]) -> None:
+    # incidents behind other processes' events are committed with them
+    recent.invalidate()
+
+
+def ensure_started() -> None:
+    """Warm the geocode cache and replay recent incidents into the feed, once."""
+    if _STARTED.is_set():
+        return
+    with _START_LOCK:
+        if not _STARTED.is_set():
+            with metrics.timer("startup"):
+                _bootstrap_feed()
+            _STARTED.set()
+
+
+@metrics.timed("receive")
+def _receive(payload: Dict[str, Any]) -> Dict[str, Any]:
     reporter = payload.get("reporter") or "web_user"
     text = payload.get("text") or ""
     place_text = payload.get("place_text")
@@ -108,50 +239,351 @@ def _process_incident(payload: Dict[str, Any], source: str = "web") -> Dict[str,
         raw=payload,
         autopush=False,
     )
-    incident = msg["payload"]
+    return msg["payload"]
+
+
+@metrics.timed("triage")
+def _triage(incident: Dict[str, Any]) -> Dict[str, Any]:
     severity = triage_agent.classify(incident.get("text"))
     incident["severity"] = severity
     incident["triage_ts"] = now_iso()
-    save_incident(incident)
-    allocation = _format_resources(
-        find_nearby(incident.get("lat"), incident.get("lon"), radius_km=120, limit=5)
-    )
-    return _record_event(incident, allocation, source=source)
+    # persisted together with the allocation by _allocate / _process_backlog
+    return incident
+
+
+def _allocate(incident: Dict[str, Any], source: str) -> Dict[str, Any]:
+    with metrics.timer("allocate"):
+        get_engine().allocate(incident)
+    with FEED_LOCK:
+        allocation = _current_allocation(incident["id"])
+        incident["allocation"] = allocation
+        save_incident(incident)
+        return _record_event(incident, allocation, source=source)
+
+
+@metrics.timed("finish")
+def _finish_incident(incident: Dict[str, Any], source: str = "web") -> Dict[str, Any]:
+    # triaged on acceptance, so the ingest queue can order it by severity
+    return _allocate(incident, source)
+
+
+@metrics.timed("pipeline")
+def _process_incident(payload: Dict[str, Any], source: str = "web") -> Dict[str, Any]:
+    incident = _receive(payload)
+    if incident.get("duplicate_of"):
+        return _merge_duplicate(incident)
+    _triage(incident)
+    return _allocate(incident, source)
+
+
+@metrics.timed("pipeline_batch")
+def _process_backlog(payloads: List[Dict[str, Any]], source: str = "web") -> List[Dict[str, Any]]:
+    """Triage a batch of reports, then allocate for all of them in one pass."""
+    received = [_receive(payload) for payload in payloads]
+    incidents = [_triage(inc) for inc in received if not inc.get("duplicate_of")]
+    with metrics.timer("allocate_many"):
+        get_engine().allocate_many(incidents)
+    with FEED_LOCK:
+        for inc in incidents:
+            inc["allocation"] = _current_allocation(inc["id"])
+            save_incident(inc)
+        # input order, so duplicates within the batch find their head's event
+        return [
+            _merge_duplicate(inc) if inc.get("duplicate_of")
+            else _record_event(inc, inc["allocation"], source=source)
+            for inc in received
+        ]
+
+
+receiver_agent.located_listeners.append(_on_located)
+if isinstance(FEED, SharedEventFeed):
+    FEED.remote_listeners.append(_on_remote_events)
+
+
+def _runtime_metrics():
+    """Gauges and counters owned by other components, read at scrape time."""
+    cache = get_geocode_cache().stats()
+    yield ("geocode_cache_lookups_total", "counter", "Geocode cache lookups by tier and result.", [
+        ({"tier": "memory", "result": "hit"}, cache["hits"]),
+        ({"tier": "memory", "result": "miss"}, cache["misses"]),
+        ({"tier": "sqlite", "result": "hit"}, cache["db_hits"]),
+        ({"tier": "sqlite", "result": "miss"}, cache["db_misses"]),
+    ])
+    yield ("geocode_cache_hit_ratio", "gauge", "In-memory geocode cache hit ratio.", [({}, cache["hit_rate"])])
+    yield ("geocode_cache_entries", "gauge", "Places held in the in-memory geocode cache.", [({}, cache["size"])])
+    service = get_geocode_service().stats
+    yield ("geocode_requests_total", "counter", "Geocode requests, coalesced duplicates, gazetteer hits and upstream calls.",
+           [({"kind": kind}, value) for kind, value in service.items()])
+
+    queues = router_stats()
+    yield ("agent_queue_depth", "gauge", "Messages waiting in each agent queue.",
+           [({"agent": name}, q["depth"]) for name, q in queues.items()])
+    yield ("agent_queue_wait_p99_seconds", "gauge", "99th percentile queue wait per agent.",
+           [({"agent": name}, q["wait_p99_ms"] / 1000.0) for name, q in queues.items()])
+    yield ("agent_messages_total", "counter", "Messages processed per agent and outcome.",
+           [({"agent": name, "outcome": outcome}, q[outcome])
+            for name, q in queues.items() for outcome in ("processed", "errors", "overflows", "rejected")])
+    yield ("ingest_pending", "gauge", "Reports accepted with 202 and not finished yet.", [({}, INGEST.pending())])
+    scheduled = {"ingest": INGEST.stats()}
+    scheduled.update((name, q["by_severity"]) for name, q in queues.items() if q["by_severity"])
+    yield ("scheduler_queue_depth", "gauge", "Work waiting in severity-scheduled queues.",
+           [({"queue": name, "severity": sev}, s["depth"]) for name, by in scheduled.items() for sev, s in by.items()])
+    yield ("scheduler_slo_missed_total", "counter", "Work started later than its severity's latency target.",
+           [({"queue": name, "severity": sev}, s["slo_missed"]) for name, by in scheduled.items() for sev, s in by.items()])
+    yield ("scheduler_slo_seconds", "gauge", "Latency target from enqueue to start, by severity.",
+           [({"queue": name, "severity": sev}, s["slo_ms"] / 1000.0) for name, by in scheduled.items() for sev, s in by.items()])
 
+    writes = memory_writer.stats
+    yield ("memory_writes_total", "counter", "Writes submitted to the group-commit writer.", [
+        ({"kind": "submitted"}, writes["writes"]),
+        ({"kind": "coalesced"}, writes["coalesced"]),
+        ({"kind": "committed"}, writes["rows"]),
+        ({"kind": "dropped"}, writes["dropped"]),
+    ])
+    yield ("memory_write_batches_total", "counter", "Group commits.", [({}, writes["batches"])])
 
-@app.get("/")
+    dedup = receiver_agent.dedup.stats
+    yield ("dedup_reports_total", "counter", "Reports checked for duplicates and merged.",
+           [({"result": "checked"}, dedup["checked"]), ({"result": "merged"}, dedup["merged"])])
+    yield ("dedup_db_lookups_total", "counter", "Duplicate lookups that reached or skipped SQLite.", [
+        ({"result": "lookup"}, dedup["db_lookups"]),
+        ({"result": "hit"}, dedup["db_hits"]),
+        ({"result": "skipped"}, dedup["db_skipped"]),
+    ])
+    yield ("feed_subscribers", "gauge", "Open SSE and long-poll subscribers.", [({}, FEED.subscribers)])
+    yield ("feed_last_seq", "gauge", "Sequence number of the newest feed event.", [({}, FEED.last_seq)])
+
+
+metrics.add_collector(_runtime_metrics)
+
+
+@web.get("/")
 def dashboard():
-    incidents = list_incidents(limit=12)
-    events = list(EVENT_FEED)
-    return render_template(
-        "dashboard.html",
-        pipeline=PIPELINE_STEPS,
-        incidents=incidents,
-        events=events,
-    )
+    # the page is a function of the recent-incidents view and the feed, so
+    # their versions identify it: unchanged dashboards cost neither a query
+    # nor a render
+    etag = f"{FEED.origin}-{recent.version}-{FEED.last_seq}"
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+    cached = _DASHBOARD_CACHE.get("page")
+    if cached is None or cached[0] != etag:
+        # data read after `etag` can only be newer than it, which costs at
+        # most one extra render on the next request
+        html = render_template(
+            "dashboard.html",
+            pipeline=PIPELINE_STEPS,
+            incidents=recent_incidents(12, raw=False),
+            events=FEED.events(),
+            last_event_id=FEED.last_seq,
+        )
+        cached = (etag, html)
+        _DASHBOARD_CACHE["page"] = cached
+    response = Response(cached[1], mimetype="text/html")
+    response.set_etag(cached[0])
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
-@app.post("/api/incidents")
+@web.post("/api/incidents")
 def create_incident():
     data = request.get_json(silent=True) or request.form.to_dict()
     if not data or not data.get("text"):
         return jsonify({"status": "error", "message": "Text field is required"}), 400
+    if _wants_async():
+        incident = _receive(data)
+        if incident.get("duplicate_of"):
+            return jsonify({"status": "ok", "event": _merge_duplicate(incident)})
+        _triage(incident)
+        try:
+            job = INGEST.submit(incident["id"], _finish_incident, incident, source="web",
+                                severity=incident["severity"])
+        except IngestBusy as exc:
+            # the raw report is already stored; only the processing is refused
+            return jsonify({"status": "busy", "incident_id": incident["id"], "message": str(exc)}), 503, {"Retry-After": "1"}
+        status_url = url_for(".incident_status", incident_id=incident["id"])
+        return jsonify({"status": "accepted", "incident_id": incident["id"], "job": job, "status_url": status_url}), 202, {"Location": status_url}
     event = _process_incident(data, source="web")
     return jsonify({"status": "ok", "event": event})
 
 
-@app.get("/api/stream")
+def _wants_async() -> bool:
+    flag = request.args.get("async")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    if "respond-async" in request.headers.get("Prefer", ""):
+        return True
+    return INGEST_MODE == "async"
+
+
+@web.get("/api/incidents/<incident_id>/status")
+def incident_status(incident_id: str):
+    wait = min(_safe_float(request.args.get("wait")) or 0.0, 30.0)
+    job = INGEST.status(incident_id, wait=wait)
+    if job is None:
+        # accepted by another worker process: finished once its event is out
+        event = FEED.get(incident_id)
+        if event is None:
+            return jsonify({"status": "error", "message": "Unknown incident"}), 404
+        job = {"id": incident_id, "status": "done", "event": event}
+    return jsonify({"status": "ok", "job": job})
+
+
+@web.post("/api/incidents/<incident_id>/close")
+def close_incident_route(incident_id: str):
+    """Close an incident: its resources go back to the pool for unmet ones."""
+    freed = get_engine().release(incident_id, retry=False)
+    close_incident(incident_id)
+
+    def closed(event: Dict[str, Any]) -> None:
+        event["stage"] = "Closed"
+    with FEED_LOCK:
+        FEED.update(incident_id, closed)
+    _retry_unmet()
+    return jsonify({"status": "ok", "id": incident_id, "released": len(freed)})
+
+
+@web.post("/api/incidents/batch")
+def create_incidents_batch():
+    data = request.get_json(silent=True) or {}
+    reports = data.get("incidents") if isinstance(data, dict) else data
+    if not isinstance(reports, list) or not reports:
+        return jsonify({"status": "error", "message": "A list of incidents is required"}), 400
+    if any(not isinstance(r, dict) or not r.get("text") for r in reports):
+        return jsonify({"status": "error", "message": "Text field is required"}), 400
+    events = _process_backlog(reports, source="web")
+    return jsonify({"status": "ok", "events": events})
+
+
+@web.get("/api/incidents")
+def query_incidents():
+    args = request.args
+    bbox = None
+    if args.get("bbox"):
+        parts = [_safe_float(p) for p in args["bbox"].split(",")]
+        if len(parts) != 4 or None in parts:
+            return jsonify({"status": "error", "message": "bbox must be min_lat,min_lon,max_lat,max_lon"}), 400
+        bbox = tuple(parts)
+    try:
+        limit = max(1, min(int(args.get("limit", 25)), 200))
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+    page = list_incidents_page(
+        limit=limit,
+        cursor=args.get("cursor"),
+        severity=args.getlist("severity") or None,
+        since=args.get("since"),
+        until=args.get("until"),
+        bbox=bbox,
+        raw=args.get("raw") != "0",
+    )
+    return jsonify({"status": "ok", **page})
+
+
+@web.get("/api/incidents/<incident_id>/reports")
+def incident_reports(incident_id: str):
+    """Near-duplicate reports merged into an incident, oldest first."""
+    return jsonify({"status": "ok", "id": incident_id,
+                    "reports": list_reports(incident_id, archived=request.args.get("archived") != "0")})
+
+
+def _since_arg() -> Optional[int]:
+    # EventSource reconnects send Last-Event-ID, which beats the original URL
+    raw = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        return int(raw) if raw not in (None, "") else None
+    except ValueError:
+        return None
+
+
+@web.get("/api/stream")
 def stream_events():
-    return jsonify({"events": list(EVENT_FEED)})
+    """
+    Without `since` this returns the whole feed (newest first). With
+    `since=<last_id>` it returns only newer events, and `wait=<seconds>`
+    long-polls until there is something new. A `since` the feed no longer
+    covers gets the whole feed with `"reset": true`.
+    """
+    since = _since_arg()
+    if since is None:
+        return jsonify({"events": FEED.events(), "last_id": FEED.last_seq})
+    wait = min(_safe_float(request.args.get("wait")) or 0.0, 30.0)
+    entries = FEED.wait(since, wait) if wait else FEED.since(since)
+    return Response(FEED.encode(entries, since), mimetype="application/json")
+
 
+@web.get("/api/stream/sse")
+def stream_events_sse():
+    return Response(
+        stream_with_context(FEED.stream(_since_arg())),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@app.get("/healthz")
+
+@web.get("/healthz")
 def healthcheck():
-    return jsonify({"status": "ok", "timestamp": now_iso()})
+    return jsonify({
+        "status": "ok",
+        "timestamp": now_iso(),
+        "geocode_cache": get_geocode_cache().stats(),
+        "dedup": receiver_agent.dedup.stats,
+        "partitions": partitions.stats(),
+    })
+
+
+@web.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@debug.get("/profiler")
+def profiler_report():
+    """Collapsed stacks from the sampling profiler, or its status with ?format=json."""
+    if request.args.get("format") == "json":
+        return jsonify({"status": "ok", "profiler": metrics.profiler.status()})
+    limit = request.args.get("limit", type=int)
+    return Response(metrics.profiler.collapsed(limit), mimetype="text/plain")
+
+
+@debug.post("/profiler/start")
+def profiler_start():
+    """Start sampling; the profiler clamps interval_ms and duration_s to its limits."""
+    interval_ms = _safe_float(request.args.get("interval_ms"))
+    duration_s = _safe_float(request.args.get("duration_s"))
+    started = metrics.profiler.start(interval=interval_ms / 1000.0 if interval_ms else None,
+                                     duration=duration_s)
+    return jsonify({"status": "ok" if started else "already running", "profiler": metrics.profiler.status()})
+
+
+@debug.post("/profiler/stop")
+def profiler_stop():
+    stopped = metrics.profiler.stop()
+    return jsonify({"status": "ok" if stopped else "not running", "profiler": metrics.profiler.status()})
+
+
+def create_app(profiler: Optional[bool] = None) -> Flask:
+    """
+    Build the web app. Every app built here serves the same module-level
+    agents, feed and ingest queue. The /debug routes are included when
+    `profiler` is true; by default, with PROFILER_ENABLED=1 or FLASK_DEBUG=1.
+    """
+    flask_app = Flask(
+        __name__,
+        template_folder=str(TEMPLATE_DIR),
+        static_folder=str(STATIC_DIR),
+    )
+    flask_app.register_blueprint(web)
+    if profiler is None:
+        profiler = PROFILER_ENABLED or flask_app.debug
+    if profiler:
+        flask_app.register_blueprint(debug)
+    # a flag check once the first request has paid for the bootstrap
+    flask_app.before_request(ensure_started)
+    return flask_app
 
 
-_bootstrap_feed()
+app = create_app()
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
+    create_app(profiler=True).run(host="0.0.0.0", port=8000, debug=True)
@@ -0,0 +1,301 @@
+"""
+Bulk ingestion of exported reports from RSS/Atom, CSV and JSONL files.
+
+Rows are streamed (never loaded whole), grouped into chunks and pushed
+through Receiver -> Triage -> persistence: places in a chunk are geocoded
+concurrently, severities come from one `classify_batch` call, and the
+chunk's writes are committed together. Every row is marked in
+`seen_items` once its chunk is stored, so an interrupted import can simply
+be re-run and skips what it already did. Report times are stored as ISO
+UTC, and duplicates are detected by report time rather than import time.
+
+    python -m src.bulk_ingest reports.jsonl feed.xml export.csv
+"""
+
+import argparse
+import csv
+import email.utils
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+from .agents.receiver import ReceiverAgent
+from .agents.triage import TriageAgent
+from .memory.memory_bank import BULK_SEEN_PREFIX, flush, mark_seen, save_incident, save_report, seen_many
+from .tools.dedup import Deduplicator
+from .utils import now_iso
+
+CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '2000'))
+PROGRESS_EVERY_S = 5.0
+# incident ids are derived from the row key, so re-imports replace rows
+# instead of duplicating them
+_ID_NAMESPACE = uuid.UUID('5b0f9c1e-2f55-4c55-9d7e-4d1f1b1c0a11')
+_TAGS = re.compile(r'<[^>]+>')
+
+TEXT_FIELDS = ('text', 'description', 'summary', 'content', 'message', 'title')
+ID_FIELDS = ('id', 'guid', 'item_id', 'link')
+REPORTER_FIELDS = ('reporter', 'author', 'source', 'sender')
+PLACE_FIELDS = ('place_text', 'place', 'location', 'address')
+LAT_FIELDS = ('lat', 'latitude')
+LON_FIELDS = ('lon', 'lng', 'long', 'longitude')
+TIME_FIELDS = ('created_at', 'published', 'pubDate', 'updated', 'timestamp')
+# epoch seconds outside 2000-01-01 .. 2100-01-01 are not taken as times, so
+# numbers such as '2024' are not read as moments in 1970
+EPOCH_MIN = 946684800
+EPOCH_MAX = 4102444800
+
+
+def _first(row, fields):
+    for field in fields:
+        value = row.get(field)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _float(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def to_utc(value):
+    """
+    An ISO 8601, RFC 822 (RSS pubDate) or epoch-seconds timestamp as an
+    ISO UTC string in the `now_iso()` format, or None if it is not one.
+    Times without a zone are taken as UTC; epoch seconds count only within
+    EPOCH_MIN..EPOCH_MAX.
+    """
+    if value in (None, ''):
+        return None
+    text = str(value).strip()
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            dt = email.utils.parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            try:
+                seconds = float(text)
+            except ValueError:
+                return None
+            if not EPOCH_MIN <= seconds < EPOCH_MAX:
+                return None
+            dt = datetime.fromtimestamp(seconds, timezone.utc)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat() + 'Z'
+
+
+def _local(tag):
+    # '{http://www.w3.org/2005/Atom}entry' -> 'entry', 'geo:lat' stays qualified
+    return tag.rsplit('}', 1)[-1]
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                print(f"BulkIngest: {path}:{lineno} skipped, bad JSON: {exc}")
+                continue
+            if isinstance(row, dict):
+                yield row
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as fh:
+        # cells past the header of a ragged row go under '_extra', not None
+        yield from csv.DictReader(fh, restkey='_extra')
+
+
+def read_feed(path):
+    """RSS <item> and Atom <entry> elements, parsed incrementally."""
+    open_elems = []
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            open_elems.append(elem)
+            continue
+        open_elems.pop()
+        if _local(elem.tag) not in ('item', 'entry'):
+            continue
+        row = {}
+        for child in elem:
+            name = _local(child.tag)
+            if name == 'link' and child.get('href'):
+                row.setdefault('link', child.get('href'))
+            elif name == 'author' and len(child):
+                row['author'] = ''.join(child.itertext()).strip()
+            elif child.text and child.text.strip():
+                row.setdefault(name, child.text.strip())
+        if 'point' in row:
+            # georss:point is "lat lon"
+            parts = row['point'].split()
+            if len(parts) == 2:
+                row['lat'], row['lon'] = parts
+        for field in ('description', 'summary', 'content'):
+            if field in row:
+                row[field] = html.unescape(_TAGS.sub(' ', row[field])).strip()
+        yield row
+        # detach the item as well, or its parent keeps one (empty) element
+        # per item and memory grows with the feed
+        elem.clear()
+        if open_elems:
+            open_elems[-1].remove(elem)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv, 'rss': read_feed}
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if ext == '.csv':
+        return 'csv'
+    return 'rss'
+
+
+def to_report(row, source):
+    """Map an input row onto the fields ReceiverAgent.receive_many expects."""
+    text = _first(row, TEXT_FIELDS)
+    if not text:
+        return None
+    if 'title' in row and text != row['title'] and row['title'] not in text:
+        text = f"{row['title']}. {text}"
+    key = _first(row, ID_FIELDS)
+    if key is None:
+        key = hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    key = f'{BULK_SEEN_PREFIX}{source}:{key}'
+    return {
+        'key': key,
+        'id': str(uuid.uuid5(_ID_NAMESPACE, key)),
+        'text': str(text),
+        'reporter': _first(row, REPORTER_FIELDS) or source,
+        'place_text': _first(row, PLACE_FIELDS),
+        'lat': _float(_first(row, LAT_FIELDS)),
+        'lon': _float(_first(row, LON_FIELDS)),
+        'created_at': to_utc(_first(row, TIME_FIELDS)),
+        'raw': row,
+    }
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkIngestor:
+
+    def __init__(self, receiver=None, triage=None, chunk_size=CHUNK_SIZE, geocode_timeout=30.0):
+        self.receiver = receiver or ReceiverAgent()
+        self.triage = triage or TriageAgent()
+        self.chunk_size = chunk_size
+        self.geocode_timeout = geocode_timeout
+        self.stats = {'rows': 0, 'skipped': 0, 'invalid': 0, 'incidents': 0, 'merged': 0}
+        self._started = None
+        self._reported = 0.0
+
+    def process_chunk(self, reports):
+        seen = seen_many(r['key'] for r in reports)
+        fresh = [r for r in reports if r['key'] not in seen]
+        self.stats['skipped'] += len(reports) - len(fresh)
+        if fresh:
+            payloads = self.receiver.receive_many(fresh, geocode_timeout=self.geocode_timeout,
+                                                  save=False)
+            incidents = [p for p in payloads if not p.get('duplicate_of')]
+            severities = self.triage.classify_batch([inc['text'] for inc in incidents])
+            triage_ts = now_iso()
+            for inc, severity in zip(incidents, severities):
+                inc['severity'] = severity
+                inc['triage_ts'] = triage_ts
+                save_incident(inc)
+            for dup in payloads:
+                if dup.get('duplicate_of'):
+                    save_report(dup)
+            for r in fresh:
+                mark_seen(r['key'])
+            self.stats['incidents'] += len(incidents)
+            self.stats['merged'] += len(payloads) - len(incidents)
+        # incidents were queued before their seen markers, so a crash never
+        # leaves a row marked done without its incident
+        flush()
+
+    def ingest(self, rows, source):
+        if self._started is None:
+            self._started = time.perf_counter()
+        reports = self._reports(rows, source)
+        for chunk in chunked(reports, self.chunk_size):
+            self.process_chunk(chunk)
+            self._progress()
+        return self.stats
+
+    def _reports(self, rows, source):
+        for row in rows:
+            self.stats['rows'] += 1
+            report = to_report(row, source)
+            if report is None:
+                self.stats['invalid'] += 1
+                continue
+            yield report
+
+    def rate(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return self.stats['rows'] / elapsed if elapsed else 0.0
+
+    def _progress(self, final=False):
+        now = time.perf_counter()
+        if not final and now - self._reported < PROGRESS_EVERY_S:
+            return
+        self._reported = now
+        s = self.stats
+        print(f"BulkIngest: {s['rows']:,} rows ({self.rate():,.0f} rows/s), "
+              f"{s['incidents']:,} incidents, {s['merged']:,} merged, "
+              f"{s['skipped']:,} already seen, {s['invalid']:,} invalid")
+
+
+def ingest_file(path, fmt=None, ingestor=None):
+    ingestor = ingestor or BulkIngestor()
+    fmt = fmt or detect_format(path)
+    return ingestor.ingest(READERS[fmt](path), os.path.basename(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.bulk_ingest',
+                                     description='Stream reports from RSS/Atom, CSV or JSONL files.')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--format', choices=sorted(READERS), help='default: from the file extension')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='skip near-duplicate merging (about 3x faster on trusted exports)')
+    args = parser.parse_args(argv)
+
+    receiver = ReceiverAgent(dedup=Deduplicator(enabled=False)) if args.no_dedup else None
+    ingestor = BulkIngestor(receiver=receiver, chunk_size=args.chunk_size)
+    for path in args.paths:
+        print(f"BulkIngest: reading {path}")
+        ingest_file(path, args.format, ingestor)
+    ingestor._progress(final=True)
+    return ingestor.stats
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,372 @@
+"""
+Sequenced live event feed for dashboards.
+
+Every published event gets a monotonically increasing sequence number and
+is JSON-encoded exactly once; the encoded bytes (and a ready-made SSE
+frame) are shared by every subscriber. Clients ask for "everything after
+sequence N", either by long-polling `wait()` or by streaming `stream()` as
+Server-Sent Events, so they only receive deltas.
+
+The feed also holds the current version of the last `maxlen` incidents
+(`events()`, `get()`), which is what the dashboard shows. Stored events are
+never modified: an update publishes a new copy, and readers get their own.
+A client whose position is older than the buffer (or from before a
+restart) gets one reset carrying every live incident instead of a delta.
+`EventFeed` keeps all of it in process; `SharedEventFeed` keeps it in an
+append-only SQLite table so several worker processes serve the same feed.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from .memory.writer import writer
+from .utils import DB_PATH, now_iso, open_conn, read_conn, register_schema
+
+SSE_HEARTBEAT_S = 15.0
+# how often a shared feed checks the database for other processes' events
+FEED_POLL_S = float(os.getenv('FEED_POLL_MS', '25')) / 1000.0
+# rows kept in the events table; older ones are deleted as new ones land
+FEED_RETAIN_EVENTS = int(os.getenv('FEED_RETAIN_EVENTS', '10000'))
+PRUNE_EVERY = 500
+
+
+class FeedEntry:
+    __slots__ = ('seq', 'id', 'json', 'frame')
+
+    def __init__(self, seq, event, encoded=None):
+        self.seq = seq
+        if encoded is None:
+            encoded = json.dumps(event, separators=(',', ':'))
+        elif event is None:
+            event = json.loads(encoded)
+        self.id = event.get('id')
+        self.json = encoded
+        self.frame = f"id: {seq}\nevent: incident\ndata: {self.json}\n\n".encode('utf-8')
+
+    @property
+    def event(self):
+        """A private copy of the event, decoded from the shared encoding."""
+        return json.loads(self.json)
+
+
+class FeedReset:
+    """
+    Sent instead of the entries a client missed: the current version of
+    every live incident (newest first) as of `seq`, to replace its list.
+    """
+    __slots__ = ('seq', 'json', 'frame')
+
+    def __init__(self, seq, live):
+        self.seq = seq
+        events = ','.join(entry.json for entry in reversed(live))
+        self.json = f'{{"events":[{events}],"last_id":{seq},"reset":true}}'
+        self.frame = f"id: {seq}\nevent: reset\ndata: {self.json}\n\n".encode('utf-8')
+
+
+class EventFeed:
+
+    def __init__(self, maxlen=60):
+        self.maxlen = maxlen
+        self._entries = deque(maxlen=maxlen)
+        # incident id -> entry holding its latest version, oldest incident first
+        self._events = OrderedDict()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.subscribers = 0
+        # tells this process's feed apart from others' (and from itself
+        # before a restart), e.g. in cache validators
+        self.origin = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+    def _ensure_open(self):
+        pass
+
+    @property
+    def last_seq(self):
+        self._ensure_open()
+        return self._seq
+
+    def _apply(self, entry, created):
+        # caller holds self._cond; entries arrive in sequence order
+        key = entry.id
+        if created:
+            self._events.pop(key, None)
+            self._events[key] = entry
+            if len(self._events) > self.maxlen:
+                self._events.popitem(last=False)
+        elif key in self._events:
+            self._events[key] = entry
+        self._entries.append(entry)
+        self._seq = entry.seq
+        self._cond.notify_all()
+
+    def publish(self, event):
+        """
+        Append an event and wake subscribers. An event whose incident is
+        still live replaces its previous version; any other starts a new one.
+        """
+        with self._cond:
+            entry = FeedEntry(self._seq + 1, event)
+            self._apply(entry, event.get('id') not in self._events)
+            return entry
+
+    def update(self, incident_id, fn):
+        """
+        Publish a new version of a live incident's event: `fn(event)`
+        modifies a copy of the current one. Returns the new event, or None
+        when the incident has already scrolled out of the feed.
+        """
+        with self._cond:
+            entry = self._events.get(incident_id)
+            if entry is None:
+                return None
+            event = entry.event
+            fn(event)
+            self.publish(event)
+            return event
+
+    def seed(self, events):
+        """Publish `events` (oldest first) only if nothing was ever published."""
+        with self._cond:
+            if self._seq:
+                return False
+            for event in events:
+                self.publish(event)
+            return True
+
+    def events(self):
+        """Current version of every live incident's event, newest incident first."""
+        self._ensure_open()
+        with self._cond:
+            live = list(self._events.values())
+        return [entry.event for entry in reversed(live)]
+
+    def get(self, incident_id):
+        self._ensure_open()
+        with self._cond:
+            entry = self._events.get(incident_id)
+        return entry.event if entry else None
+
+    def since(self, seq):
+        """
+        Entries newer than `seq`, oldest first. When entries after `seq`
+        have already left the buffer, or `seq` is unknown (e.g. from before
+        a restart), a single FeedReset instead.
+        """
+        self._ensure_open()
+        with self._cond:
+            if seq is None:
+                return list(self._entries)
+            if seq > self._seq or (self._entries and seq < self._entries[0].seq - 1):
+                return [FeedReset(self._seq, list(self._events.values()))]
+            return [e for e in self._entries if e.seq > seq]
+
+    def wait(self, seq, timeout):
+        """Long-poll: block until something newer than `seq` exists."""
+        self._ensure_open()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while seq is not None and self._seq == seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+        return self.since(seq)
+
+    def encode(self, entries, since=None):
+        """JSON body for a delta response, built from pre-encoded events."""
+        if entries and isinstance(entries[0], FeedReset):
+            return entries[0].json
+        # newest first, matching events() and the dashboard
+        events = ','.join(e.json for e in reversed(entries))
+        if entries:
+            last_id = entries[-1].seq
+        else:
+            last_id = since if since is not None else self._seq
+        return f'{{"events":[{events}],"last_id":{last_id}}}'
+
+    def stream(self, seq, heartbeat=SSE_HEARTBEAT_S):
+        """Generator of SSE frames for one subscriber, starting after `seq`."""
+        with self._cond:
+            self.subscribers += 1
+        try:
+            if seq is None:
+                seq = 0
+            yield b"retry: 3000\n\n"
+            while True:
+                entries = self.wait(seq, heartbeat)
+                if not entries:
+                    yield b": keep-alive\n\n"
+                    continue
+                for entry in entries:
+                    yield entry.frame
+                seq = entries[-1].seq
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+
+def _ensure_events_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS events(
+      seq INTEGER PRIMARY KEY AUTOINCREMENT,
+      origin TEXT,
+      incident_id TEXT,
+      created INTEGER NOT NULL,
+      published_at TEXT,
+      json TEXT NOT NULL
+    )
+    """)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_incident ON events(incident_id, seq)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_created ON events(seq) WHERE created = 1')
+    conn.commit()
+
+
+# latest version of each of the last `?` incidents to enter the feed,
+# oldest first: the same window an EventFeed builds by replaying the log
+_LIVE_EVENTS = '''
+SELECT e.seq, e.json FROM
+  (SELECT incident_id, seq AS first FROM events WHERE created = 1 ORDER BY seq DESC LIMIT ?) AS live
+  JOIN events e ON e.seq = (SELECT MAX(seq) FROM events WHERE incident_id = live.incident_id)
+ORDER BY live.first'''
+
+
+class SharedEventFeed(EventFeed):
+    """
+    EventFeed over an append-only `events` table, for several worker
+    processes sharing one database. Publishing appends a row in the same
+    transaction as the writer's pending rows, so an event never shows up
+    before the incident it describes. Every process rebuilds the same
+    window from the table in sequence order: a poller thread notices
+    other processes' commits through PRAGMA data_version, pulls the new
+    rows and wakes local long-polls and SSE streams.
+
+    Nothing touches the database until the feed is first used.
+    """
+
+    def __init__(self, maxlen=60, poll_s=FEED_POLL_S, retain=FEED_RETAIN_EVENTS):
+        super().__init__(maxlen)
+        self.poll_s = poll_s
+        self.retain = retain
+        # callables invoked with the entries other processes published
+        self.remote_listeners = []
+        self._opened = False
+        self._open_lock = threading.Lock()
+        register_schema(_ensure_events_table)
+
+    def _ensure_open(self):
+        if self._opened:
+            return
+        with self._open_lock:
+            if self._opened:
+                return
+            with read_conn() as conn:
+                live = conn.execute(_LIVE_EVENTS, (self.maxlen,)).fetchall()
+                recent = conn.execute('SELECT seq, json FROM events ORDER BY seq DESC LIMIT ?',
+                                      (self.maxlen,)).fetchall()
+            with self._cond:
+                for seq, encoded in live:
+                    entry = FeedEntry(seq, None, encoded)
+                    self._events[entry.id] = entry
+                for seq, encoded in reversed(recent):
+                    self._entries.append(FeedEntry(seq, None, encoded))
+                self._seq = recent[0][0] if recent else 0
+            threading.Thread(target=self._poll, name='feed-poller', daemon=True).start()
+            self._opened = True
+
+    def _poll(self):
+        conn = open_conn()
+        conn.execute('PRAGMA query_only=ON')
+        version = None
+        while True:
+            try:
+                current = conn.execute('PRAGMA data_version').fetchone()[0]
+                if current != version:
+                    version = current
+                    self._pull(conn)
+            except Exception as exc:
+                print(f"Feed: poll failed: {exc}")
+            time.sleep(self.poll_s)
+
+    def _pull(self, conn):
+        rows = conn.execute('SELECT seq, origin, created, json FROM events WHERE seq > ? ORDER BY seq',
+                            (self._seq,)).fetchall()
+        remote = []
+        with self._cond:
+            for seq, origin, created, encoded in rows:
+                if seq <= self._seq:
+                    continue
+                entry = FeedEntry(seq, None, encoded)
+                self._apply(entry, created)
+                if origin != self.origin:
+                    remote.append(entry)
+        if remote:
+            for listener in self.remote_listeners:
+                listener(remote)
+
+    def _insert(self, conn, event):
+        # inside the write transaction, after `_pull`: nothing can land
+        # between deciding `created` and taking the next seq
+        created = event.get('id') not in self._events
+        encoded = json.dumps(event, separators=(',', ':'))
+        seq = conn.execute(
+            'INSERT INTO events(origin, incident_id, created, published_at, json) VALUES (?, ?, ?, ?, ?)',
+            (self.origin, event.get('id'), int(created), now_iso(), encoded)).lastrowid
+        if seq % PRUNE_EVERY == 0:
+            conn.execute('DELETE FROM events WHERE seq <= ?', (seq - self.retain,))
+        return FeedEntry(seq, event, encoded), created
+
+    def _commit(self, fn):
+        """Run `fn(conn)` (returning [(entry, created)]) under the write lock, then apply locally."""
+        self._ensure_open()
+
+        def run(conn):
+            self._pull(conn)
+            return fn(conn)
+        inserted = writer.commit_with(run)
+        with self._cond:
+            for entry, created in inserted:
+                # the poller may have pulled it first
+                if entry.seq > self._seq:
+                    self._apply(entry, created)
+        return [entry for entry, _ in inserted]
+
+    def publish(self, event):
+        return self._commit(lambda conn: [self._insert(conn, event)])[0]
+
+    def update(self, incident_id, fn):
+        def apply(conn):
+            with self._cond:
+                current = self._events.get(incident_id)
+            if current is None:
+                return []
+            # a private copy: the live entry changes only once this commits
+            event = current.event
+            fn(event)
+            updated.append(event)
+            return [self._insert(conn, event)]
+        updated = []
+        entries = self._commit(apply)
+        return updated[-1] if entries else None
+
+    def seed(self, events):
+        def apply(conn):
+            if conn.execute('SELECT 1 FROM events LIMIT 1').fetchone():
+                return []
+            return [self._insert(conn, event) for event in events]
+        return bool(self._commit(apply))
+
+
+def make_feed(store, maxlen=60):
+    """'memory' (one process) or 'sqlite' (shared by every process on the database)."""
+    if store == 'sqlite':
+        if DB_PATH == ':memory:':
+            print("Feed: an in-memory database cannot be shared; using the in-process feed")
+            return EventFeed(maxlen)
+        return SharedEventFeed(maxlen)
+    if store != 'memory':
+        raise ValueError(f"unknown feed store: {store}")
+    return EventFeed(maxlen)
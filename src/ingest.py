@@ -0,0 +1,138 @@
+"""
+Background ingestion for web reports.
+
+`IngestQueue.submit(incident_id, fn, *args, severity=...)` runs `fn` on a
+worker pool and tracks its progress so clients can poll (or long-poll)
+for the outcome of a report that was accepted with 202 instead of
+processed inline. Pending jobs are started in severity order with aging
+(see scheduler.py), so a backlog of low reports does not hold up the
+severe ones.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .scheduler import SeverityScheduler
+from .utils import now_iso
+
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '4'))
+INGEST_MAX_PENDING = int(os.getenv('INGEST_MAX_PENDING', '1000'))
+# finished jobs kept for status lookups
+INGEST_HISTORY = int(os.getenv('INGEST_HISTORY', '5000'))
+
+
+class IngestBusy(Exception):
+    """Raised when the background backlog is full; callers should retry."""
+
+
+class IngestQueue:
+
+    def __init__(self, workers=INGEST_WORKERS, max_pending=INGEST_MAX_PENDING,
+                 history=INGEST_HISTORY, scheduler=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+        self.scheduler = SeverityScheduler('ingest', severity=None) if scheduler is None else scheduler
+        self._threads = []
+        self._jobs = OrderedDict()
+        self._pending = 0
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)
+        # separate from _cond so job updates don't wake idle workers
+        self._ready = threading.Condition(lock)
+
+    def submit(self, incident_id, fn, *args, severity=None, **kwargs):
+        with self._cond:
+            if self._pending >= self.max_pending:
+                raise IngestBusy(f"{self._pending} reports already pending")
+            self._pending += 1
+            self._jobs[incident_id] = {
+                'id': incident_id,
+                'status': 'queued',
+                'severity': severity,
+                'accepted_at': now_iso(),
+                'updated_at': now_iso(),
+            }
+            self._trim()
+            self.scheduler.append((time.perf_counter(), (incident_id, fn, args, kwargs)), severity)
+            self._ready.notify()
+            if len(self._threads) < self.workers:
+                # workers start on demand, up to `workers`
+                t = threading.Thread(target=self._work, name=f'ingest-{len(self._threads)}', daemon=True)
+                self._threads.append(t)
+                t.start()
+        return self.status(incident_id)
+
+    def _work(self):
+        while True:
+            with self._ready:
+                while not self.scheduler:
+                    self._ready.wait()
+                _, job = self.scheduler.popleft()
+            self._run(*job)
+
+    def _trim(self):
+        while len(self._jobs) > self.history:
+            oldest = next(iter(self._jobs))
+            if self._jobs[oldest]['status'] in ('queued', 'processing'):
+                break
+            self._jobs.popitem(last=False)
+
+    def _update(self, incident_id, **fields):
+        with self._cond:
+            job = self._jobs.get(incident_id)
+            if job is not None:
+                job.update(fields, updated_at=now_iso())
+            self._cond.notify_all()
+
+    def _run(self, incident_id, fn, args, kwargs):
+        self._update(incident_id, status='processing')
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            print(f"Ingest: processing {incident_id} failed: {exc}")
+            self._update(incident_id, status='error', error=str(exc))
+        else:
+            self._update(incident_id, status='done', event=result)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def status(self, incident_id, wait=0.0):
+        """
+        Return a copy of the job record, or None if unknown. With `wait`,
+        block up to that many seconds for the job to finish (long-poll).
+        """
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while True:
+                job = self._jobs.get(incident_id)
+                if job is None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if job['status'] in ('done', 'error') or remaining <= 0:
+                    return dict(job)
+                self._cond.wait(remaining)
+
+    def pending(self):
+        with self._cond:
+            return self._pending
+
+    def stats(self):
+        """Scheduler stats by severity: depth, waits and SLO misses."""
+        with self._cond:
+            return self.scheduler.stats()
+
+    def join(self, timeout=None):
+        """Wait until no job is queued or running."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
@@ -1,120 +1,509 @@
 # ...existing code...
+import bisect
 import json
-import sqlite3
-from ..utils import get_conn, now_iso
+import os
+import threading
+import zlib
+from collections import namedtuple
+from ..metrics import SQLITE_SECONDS, timed
+from ..utils import now_iso, read_conn, register_schema
+from .writer import writer
 
-# Initialize DB tables (run once on import)
+# newest incidents kept in memory for the dashboard (see RecentIncidents)
+RECENT_SIZE = int(os.getenv('RECENT_INCIDENTS', '50'))
+# raw report payloads over this size lose their largest top-level fields
+RAW_MAX_BYTES = int(os.getenv('RAW_JSON_MAX_BYTES', '32768'))
+# and from this size on are stored zlib-compressed (0 stores plain JSON)
+RAW_COMPRESS_BYTES = int(os.getenv('RAW_JSON_COMPRESS_BYTES', '1024'))
+# MinHash signatures are bucketed into this many LSH bands, each indexed
+LSH_BANDS = 8
+SEEN_FINGERPRINT_COLUMNS = [
+    ('incident_id', 'TEXT'),
+    ('signature', 'BLOB'),
+    ('lat', 'REAL'),
+    ('lon', 'REAL'),
+    ('place_key', 'TEXT'),
+    ('reports', 'INTEGER'),
+    ('severity', 'TEXT'),
+    # the head's word hashes, for an exact similarity check of candidates
+    ('tokens', 'BLOB'),
+] + [(f'band{band}', 'INTEGER') for band in range(LSH_BANDS)]
 
+INCIDENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS incidents(
+  id TEXT PRIMARY KEY,
+  created_at TEXT,
+  reporter TEXT,
+  text TEXT,
+  lat REAL,
+  lon REAL,
+  severity TEXT,
+  triage_ts TEXT,
+  raw_json TEXT,
+  sort_ts TEXT GENERATED ALWAYS AS (COALESCE(triage_ts, created_at)) VIRTUAL,
+  allocation_json TEXT,
+  closed_at TEXT
+)
+"""
+# also built into every archived partition (see partitions.py)
+INCIDENT_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_incidents_sort ON incidents(sort_ts DESC, id DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_incidents_severity_sort ON incidents(severity, sort_ts DESC, id DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_incidents_lat_lon ON incidents(lat, lon)',
+)
+# near-duplicate reports merged into an incident, kept with their own text
+# and payload; archived together with their incident
+REPORTS_TABLE = """
+CREATE TABLE IF NOT EXISTS incident_reports(
+  id TEXT PRIMARY KEY,
+  incident_id TEXT,
+  created_at TEXT,
+  reporter TEXT,
+  text TEXT,
+  lat REAL,
+  lon REAL,
+  severity TEXT,
+  raw_json TEXT
+)
+"""
+REPORT_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_incident_reports_incident ON incident_reports(incident_id, created_at)',
+)
+REPORT_COLUMNS = 'id, incident_id, created_at, reporter, text, lat, lon, severity, raw_json'
 
-def _ensure_tables():
-    conn = get_conn()
+# Initialize DB tables (run once, when the write connection is first opened)
+
+
+def _ensure_tables(conn):
     c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS incidents(
-      id TEXT PRIMARY KEY,
-      created_at TEXT,
-      reporter TEXT,
-      text TEXT,
-      lat REAL,
-      lon REAL,
-      severity TEXT,
-      triage_ts TEXT,
-      raw_json TEXT
-    )
-    """)
+    c.execute(INCIDENTS_TABLE)
+    cols = {row[1] for row in c.execute('PRAGMA table_xinfo(incidents)')}
+    if 'sort_ts' not in cols:
+        # databases created before the sort column existed
+        c.execute("""
+        ALTER TABLE incidents ADD COLUMN
+          sort_ts TEXT GENERATED ALWAYS AS (COALESCE(triage_ts, created_at)) VIRTUAL
+        """)
+    if 'allocation_json' not in cols:
+        # allocations are stored with the incident so the dashboard does not
+        # have to recompute them at startup
+        c.execute('ALTER TABLE incidents ADD COLUMN allocation_json TEXT')
+    if 'closed_at' not in cols:
+        # set when an incident is closed and its resources go back
+        c.execute('ALTER TABLE incidents ADD COLUMN closed_at TEXT')
+    for index in INCIDENT_INDEXES:
+        c.execute(index)
+    c.execute(REPORTS_TABLE)
+    for index in REPORT_INDEXES:
+        c.execute(index)
     c.execute("""
     CREATE TABLE IF NOT EXISTS seen_items(
       item_hash TEXT PRIMARY KEY,
       seen_at TEXT
     )
     """)
+    # report fingerprints for duplicate detection live in the same table;
+    # plain seen markers leave these columns NULL
+    cols = {row[1] for row in c.execute('PRAGMA table_info(seen_items)')}
+    for name, decl in SEEN_FINGERPRINT_COLUMNS:
+        if name not in cols:
+            c.execute(f'ALTER TABLE seen_items ADD COLUMN {name} {decl}')
+    for band in range(LSH_BANDS):
+        c.execute(f'CREATE INDEX IF NOT EXISTS idx_seen_items_band{band} '
+                  f'ON seen_items(band{band}) WHERE band{band} IS NOT NULL')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_seen_items_seen_at '
+              'ON seen_items(seen_at)')
     c.execute("""
     CREATE TABLE IF NOT EXISTS geocode_cache(
       place_text TEXT PRIMARY KEY,
       lat REAL,
       lon REAL,
-      cached_at TEXT
+      cached_at TEXT,
+      source TEXT
+    )
+    """)
+    cols = {row[1] for row in c.execute('PRAGMA table_info(geocode_cache)')}
+    if 'source' not in cols:
+        c.execute('ALTER TABLE geocode_cache ADD COLUMN source TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_geocode_cache_cached_at '
+              'ON geocode_cache(cached_at)')
+    # closed weeks of incidents moved out to archive files (partitions.py)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS partitions(
+      week TEXT PRIMARY KEY,
+      file TEXT,
+      min_ts TEXT,
+      max_ts TEXT,
+      rows INTEGER,
+      bytes INTEGER,
+      archived_at TEXT
     )
     """)
     conn.commit()
 
 
-_ensure_tables()
+register_schema(_ensure_tables)
 
 
-def _serialize_raw(raw):
-    if raw is None:
-        return None
-    if isinstance(raw, str):
+def flush():
+    """Commit any buffered writes now."""
+    return writer.flush()
+
+
+def set_durability(mode):
+    """'batch' groups commits (default); 'sync' commits every write."""
+    writer.set_durability(mode)
+
+
+class RawJSON(str):
+    """A serialized raw payload that carries its raw_json column value."""
+    stored = None
+
+
+def _dumps(raw):
+    return json.dumps(raw, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def _trim(raw, size):
+    """`raw` without its largest top-level fields, small enough for RAW_MAX_BYTES."""
+    if isinstance(raw, dict):
+        kept, dropped, left = dict(raw), [], size
+        fields = sorted(((len(_dumps(v).encode('utf-8')), k) for k, v in raw.items()),
+                        key=lambda field: field[0], reverse=True)
+        for field_size, key in fields:
+            if left <= RAW_MAX_BYTES:
+                break
+            del kept[key]
+            dropped.append(key)
+            # the value plus its quoted key, colon and comma
+            left -= field_size + len(_dumps(key)) + 2
+        kept['_truncated'] = {'bytes': size, 'dropped': dropped}
+        if len(_dumps(kept).encode('utf-8')) <= RAW_MAX_BYTES:
+            return kept
+    return {'_truncated': {'bytes': size}}
+
+
+def _pack(text):
+    data = text.encode('utf-8')
+    if RAW_COMPRESS_BYTES and len(data) >= RAW_COMPRESS_BYTES:
+        packed = zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return packed
+    return text
+
+
+def encode_raw(raw):
+    """
+    Serialize a report's raw payload for the incident's 'raw_json', once:
+    strings are taken as serialized already, and every save of the
+    incident reuses the column value computed here (a BLOB of zlib
+    data for large payloads). Payloads over RAW_MAX_BYTES keep their
+    smaller fields and name the dropped ones under '_truncated'.
+    """
+    if raw is None or isinstance(raw, RawJSON):
         return raw
+    text = raw if isinstance(raw, str) else _dumps(raw)
+    size = len(text.encode('utf-8'))
+    if size > RAW_MAX_BYTES:
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                pass
+        text = _dumps(_trim(raw, size))
+    out = RawJSON(text)
+    out.stored = _pack(text)
+    return out
+
+
+def decode_raw(value):
+    """The payload stored by `encode_raw` (text that is not JSON comes back as is)."""
+    if isinstance(value, bytes):
+        value = zlib.decompress(value).decode('utf-8')
+    if not value:
+        return value
     try:
-        return json.dumps(raw, ensure_ascii=False)
-    except Exception:
-        return json.dumps(str(raw))
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
 
 
+_UPSERT_INCIDENT = '''
+INSERT INTO incidents(id, created_at, reporter, text, lat, lon, severity, triage_ts, raw_json, allocation_json)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+  created_at=excluded.created_at, reporter=excluded.reporter, text=excluded.text,
+  lat=excluded.lat, lon=excluded.lon, severity=excluded.severity,
+  triage_ts=excluded.triage_ts, raw_json=excluded.raw_json,
+  allocation_json=COALESCE(excluded.allocation_json, incidents.allocation_json)'''
+_UPDATE_ALLOCATION = 'UPDATE incidents SET allocation_json=? WHERE id=?'
+# params of the two writes queued under ('incidents', id); both name the
+# allocation they carry, so a later write can find it whichever is pending
+_IncidentRow = namedtuple('_IncidentRow', 'id created_at reporter text lat lon severity '
+                                          'triage_ts raw_json allocation_json')
+_AllocationUpdate = namedtuple('_AllocationUpdate', 'allocation_json id')
+
+
+@timed('save_incident')
 def save_incident(inc):
     """
     Save or replace an incident row. Ensures raw_json is serialized before binding.
-    Expects inc to be a dict; will tolerate missing fields.
+    Expects inc to be a dict; will tolerate missing fields. The write is
+    buffered by the group-commit writer; call `flush()` to force it out.
+    A stored allocation is kept unless `inc` carries a new 'allocation'.
     """
-    conn = get_conn()
-    c = conn.cursor()
-    raw_str = _serialize_raw(inc.get('raw_json'))
-    c.execute(
-        '''REPLACE INTO incidents(id, created_at, reporter, text, lat, lon, severity, triage_ts, raw_json)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-        (
-            inc.get('id'),
-            inc.get('created_at') or now_iso(),
-            inc.get('reporter'),
-            inc.get('text'),
-            inc.get('lat'),
-            inc.get('lon'),
-            inc.get('severity'),
-            inc.get('triage_ts'),
-            raw_str,
-        ),
+    raw = encode_raw(inc.get('raw_json'))
+    allocation = inc.get('allocation')
+    key = ('incidents', inc.get('id'))
+    allocation_json = None if allocation is None else json.dumps(allocation)
+    if allocation_json is None:
+        # keep an allocation still waiting in the writer under this key
+        pending = writer.pending(key)
+        if pending is not None:
+            allocation_json = pending.allocation_json
+    params = _IncidentRow(
+        inc.get('id'),
+        inc.get('created_at') or now_iso(),
+        inc.get('reporter'),
+        inc.get('text'),
+        inc.get('lat'),
+        inc.get('lon'),
+        inc.get('severity'),
+        inc.get('triage_ts'),
+        raw.stored if raw is not None else None,
+        allocation_json,
     )
-    conn.commit()
+    writer.submit(key, _UPSERT_INCIDENT, params)
+    recent.update(params)
     return inc
 
 
+def save_allocation(incident_id, allocation):
+    """Store the resources assigned to an already saved incident."""
+    allocation_json = json.dumps(allocation)
+    # same writer key as save_incident, so whichever of the two comes last
+    # wins even when both are still pending
+    key = ('incidents', incident_id)
+    pending = writer.pending(key)
+    if isinstance(pending, _IncidentRow):
+        writer.submit(key, _UPSERT_INCIDENT, pending._replace(allocation_json=allocation_json))
+    else:
+        writer.submit(key, _UPDATE_ALLOCATION, _AllocationUpdate(allocation_json, incident_id))
+    recent.set_allocation(incident_id, allocation_json)
+
+
+def save_report(report):
+    """Store a near-duplicate report under the incident it was merged into."""
+    raw = encode_raw(report.get('raw_json'))
+    writer.submit(
+        ('incident_reports', report.get('id')),
+        f'REPLACE INTO incident_reports ({REPORT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (report.get('id'), report.get('duplicate_of'), report.get('created_at') or now_iso(),
+         report.get('reporter'), report.get('text'), report.get('lat'), report.get('lon'),
+         report.get('severity'), raw.stored if raw is not None else None),
+    )
+
+
+def list_reports(incident_id, archived=True):
+    """
+    The duplicate reports merged into `incident_id`, oldest first, with
+    their decoded 'raw_json'. Incidents no longer in the active table are
+    looked up in the archives unless `archived` is False.
+    """
+    sql = f'SELECT {REPORT_COLUMNS} FROM incident_reports WHERE incident_id=? ORDER BY created_at, id'
+    with read_conn() as conn:
+        rows = conn.execute(sql, (incident_id,)).fetchall()
+        if not rows and archived:
+            archived = conn.execute('SELECT 1 FROM incidents WHERE id=?', (incident_id,)).fetchone() is None
+        else:
+            archived = False
+    if archived:
+        from .partitions import archived_reports
+        rows = archived_reports(incident_id, sql)
+    out = []
+    for row in rows:
+        report = dict(row)
+        report['raw_json'] = decode_raw(report['raw_json'])
+        out.append(report)
+    return out
+
+
+def close_incident(incident_id, closed_at=None):
+    """Mark an incident closed, so its allocation is not restored on restart."""
+    writer.submit(('incidents_closed', incident_id),
+                  'UPDATE incidents SET closed_at=? WHERE id=?', (closed_at or now_iso(), incident_id))
+
+
+@timed('load_open_allocations', SQLITE_SECONDS)
+def load_open_allocations(since):
+    """
+    High and medium incidents sorted at or after `since` that are not
+    closed, as dicts with their decoded 'allocation' (None when none was
+    stored yet), for restoring the allocation engine.
+    """
+    writer.flush()
+    with read_conn() as conn:
+        rows = conn.execute(
+            "SELECT id, severity, lat, lon, allocation_json FROM incidents "
+            "WHERE sort_ts >= ? AND severity IN ('high', 'medium') AND closed_at IS NULL "
+            "ORDER BY sort_ts", (since,)).fetchall()
+    return [{'id': r['id'], 'severity': r['severity'], 'lat': r['lat'], 'lon': r['lon'],
+             'allocation': json.loads(r['allocation_json']) if r['allocation_json'] else None}
+            for r in rows]
+
+
+# seen markers and report fingerprints older than this are deleted by
+# partitions.apply_retention, the only place seen_items is pruned
+SEEN_TTL_S = float(os.getenv('SEEN_TTL_S', str(7 * 24 * 3600)))
+# seen markers of bulk-imported rows ('bulk:<source>:<row key>'); they make
+# re-runs resumable, so retention keeps them for BULK_SEEN_TTL_S
+BULK_SEEN_PREFIX = 'bulk:'
+
+
 def mark_seen(item_hash):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute('REPLACE INTO seen_items (item_hash, seen_at) VALUES (?, ?)',
-              (item_hash, now_iso()))
-    conn.commit()
+    writer.submit(('seen_items', item_hash),
+                  'REPLACE INTO seen_items (item_hash, seen_at) VALUES (?, ?)',
+                  (item_hash, now_iso()))
 
 
+# reads are timed per function into crelief_sqlite_query_seconds{query=...}
+@timed('is_seen', SQLITE_SECONDS)
 def is_seen(item_hash):
-    conn = get_conn()
-    c = conn.cursor()
-    r = c.execute('SELECT 1 FROM seen_items WHERE item_hash=?',
-                  (item_hash,)).fetchone()
+    if writer.pending(('seen_items', item_hash)):
+        return True
+    with read_conn() as conn:
+        r = conn.execute('SELECT 1 FROM seen_items WHERE item_hash=?',
+                         (item_hash,)).fetchone()
     return r is not None
 
 
-def cache_geocode(place_text, lat, lon):
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute(
-        'REPLACE INTO geocode_cache (place_text, lat, lon, cached_at) VALUES (?, ?, ?, ?)',
-        (place_text, lat, lon, now_iso()),
+@timed('seen_many', SQLITE_SECONDS)
+def seen_many(item_hashes, chunk=500):
+    """Subset of `item_hashes` already marked seen (pending writes included)."""
+    item_hashes = list(item_hashes)
+    seen = {h for h in item_hashes if writer.pending(('seen_items', h))}
+    with read_conn() as conn:
+        for i in range(0, len(item_hashes), chunk):
+            part = item_hashes[i:i + chunk]
+            rows = conn.execute(
+                'SELECT item_hash FROM seen_items WHERE item_hash IN (%s)' % ','.join('?' * len(part)),
+                part).fetchall()
+            seen.update(r[0] for r in rows)
+    return seen
+
+
+def save_fingerprint(item_hash, incident_id, signature, bands=None, lat=None, lon=None,
+                     place_key=None, reports=1, seen_at=None, severity=None, tokens=None):
+    """
+    Record a report fingerprint in seen_items. Cluster heads pass `bands`
+    (and their `severity` and word hashes as `tokens`) so later reports can
+    find and check them; merged duplicates leave them None and only point
+    at their cluster's `incident_id`.
+    """
+    bands = list(bands) if bands else [None] * LSH_BANDS
+    band_cols = ', '.join(f'band{band}' for band in range(LSH_BANDS))
+    writer.submit(
+        ('seen_items', item_hash),
+        f'''REPLACE INTO seen_items
+           (item_hash, seen_at, incident_id, signature, lat, lon, place_key, reports, severity,
+            tokens, {band_cols})
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {', '.join('?' * LSH_BANDS)})''',
+        (item_hash, seen_at or now_iso(), incident_id, signature, lat, lon, place_key, reports,
+         severity, tokens, *bands),
     )
-    conn.commit()
 
 
+@timed('find_fingerprints', SQLITE_SECONDS)
+def find_fingerprints(bands, since, limit=512):
+    """
+    Newest cluster heads seen at or after `since` whose bandN column holds
+    one of the values in bands[N], as dicts. Each band column is served by
+    its own partial index.
+    """
+    where, params = [], []
+    for band, values in enumerate(bands):
+        if not values:
+            continue
+        where.append(f'band{band} IN (%s)' % ','.join('?' * len(values)))
+        params.extend(values)
+    with read_conn() as conn:
+        rows = conn.execute(
+            f'SELECT item_hash, seen_at, incident_id, signature, lat, lon, place_key, reports, '
+            f'severity, tokens FROM seen_items WHERE ({" OR ".join(where)}) AND seen_at >= ? '
+            f'ORDER BY seen_at DESC LIMIT ?',
+            (*params, since, limit)).fetchall()
+    return [dict(r) for r in rows]
+
+
+@timed('load_fingerprints', SQLITE_SECONDS)
+def load_fingerprints(since, limit):
+    """Newest cluster heads seen at or after `since`, as dicts (for warm-up)."""
+    with read_conn() as conn:
+        rows = conn.execute(
+            'SELECT item_hash, seen_at, incident_id, signature, lat, lon, place_key, reports, '
+            'severity, tokens FROM seen_items WHERE seen_at >= ? AND band0 IS NOT NULL '
+            'ORDER BY seen_at DESC LIMIT ?', (since, limit)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def iter_fingerprint_bands(since, batch=10000):
+    """Yield the band values of every cluster head seen at or after `since`."""
+    cols = ', '.join(f'band{band}' for band in range(LSH_BANDS))
+    with read_conn() as conn:
+        cur = conn.execute(
+            f'SELECT {cols} FROM seen_items WHERE seen_at >= ? AND band0 IS NOT NULL', (since,))
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            for row in rows:
+                yield tuple(row)
+
+
+def cache_geocode(place_text, lat, lon, source='upstream', cached_at=None):
+    """`source` is 'upstream' for real results and 'stub' for fallbacks."""
+    writer.submit(
+        ('geocode_cache', place_text),
+        'REPLACE INTO geocode_cache (place_text, lat, lon, cached_at, source) VALUES (?, ?, ?, ?, ?)',
+        (place_text, lat, lon, cached_at or now_iso(), source),
+    )
+
+
+@timed('get_geocode_entry', SQLITE_SECONDS)
+def get_geocode_entry(place_text):
+    """Return (lat, lon, cached_at, source) for a cached place, or None."""
+    pending = writer.pending(('geocode_cache', place_text))
+    if pending:
+        return (pending[1], pending[2], pending[3], pending[4])
+    with read_conn() as conn:
+        r = conn.execute(
+            'SELECT lat, lon, cached_at, source FROM geocode_cache WHERE place_text=?',
+            (place_text,)).fetchone()
+    return tuple(r) if r else None
+
+
+@timed('load_geocode_cache', SQLITE_SECONDS)
+def load_geocode_cache(limit=5000):
+    """Most recently cached rows as (place_text, lat, lon, cached_at, source)."""
+    with read_conn() as conn:
+        rows = conn.execute(
+            'SELECT place_text, lat, lon, cached_at, source FROM geocode_cache '
+            'ORDER BY cached_at DESC LIMIT ?', (limit,)).fetchall()
+    return [tuple(r) for r in rows]
+
+
+@timed('get_cached_geocode', SQLITE_SECONDS)
 def get_cached_geocode(place_text):
     """
     Return (lat, lon) tuple if cached, otherwise None.
     Handles rows returned as tuples or sqlite3.Row/mapping.
     """
-    conn = get_conn()
-    c = conn.cursor()
-    r = c.execute(
-        'SELECT lat, lon FROM geocode_cache WHERE place_text=?', (place_text,)).fetchone()
+    pending = writer.pending(('geocode_cache', place_text))
+    if pending:
+        return (pending[1], pending[2])
+    with read_conn() as conn:
+        r = conn.execute(
+            'SELECT lat, lon FROM geocode_cache WHERE place_text=?', (place_text,)).fetchone()
     if not r:
         return None
     # r may be a sqlite3.Row (mapping) or a tuple
@@ -128,50 +517,207 @@ def get_cached_geocode(place_text):
             return None
 
 
-def list_incidents(limit=25):
+INCIDENT_COLUMNS = 'id, created_at, reporter, text, lat, lon, severity, triage_ts, raw_json, allocation_json'
+
+
+def _incident_query(limit, cursor=None, severity=None, since=None, until=None, bbox=None, raw=True):
+    """
+    Build the SELECT for `list_incidents`. Every filter maps onto an index:
+    the (sort_ts, id) index serves ordering, time ranges and the keyset
+    cursor, (severity, sort_ts, id) serves severity filters, and (lat, lon)
+    narrows bounding boxes. Without `raw` the payload column is not read.
+    """
+    where, params = [], []
+    if severity:
+        if isinstance(severity, str):
+            severity = [severity]
+        where.append('severity IN (%s)' % ','.join('?' * len(severity)))
+        params.extend(severity)
+    if since:
+        where.append('sort_ts >= ?')
+        params.append(since)
+    if until:
+        where.append('sort_ts < ?')
+        params.append(until)
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        where.append('lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?')
+        params.extend([min_lat, max_lat, min_lon, max_lon])
+    if cursor:
+        cursor_ts, cursor_id = decode_cursor(cursor)
+        where.append('(sort_ts, id) < (?, ?)')
+        params.extend([cursor_ts, cursor_id])
+    columns = INCIDENT_COLUMNS if raw else INCIDENT_COLUMNS.replace('raw_json', 'NULL AS raw_json')
+    sql = f'SELECT {columns}, sort_ts FROM incidents'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY sort_ts DESC, id DESC LIMIT ?'
+    params.append(limit)
+    return sql, params
+
+
+def encode_cursor(row):
+    return f"{row['sort_ts']}|{row['id']}"
+
+
+def decode_cursor(cursor):
+    sort_ts, _, incident_id = cursor.partition('|')
+    return sort_ts, incident_id
+
+
+def list_incidents(limit=25, cursor=None, severity=None, since=None, until=None, bbox=None,
+                   archived=True, raw=True):
     """
     Return the most recent incidents ordered by triage timestamp (or created_at).
+    Reads committed rows from the read pool, so writes still inside the
+    group-commit window show up once the writer flushes them.
+
+    `cursor` continues after a row returned by `list_incidents_page`;
+    `severity` is one level or a list, `since`/`until` are ISO timestamps
+    and `bbox` is (min_lat, min_lon, max_lat, max_lon). Pages the active
+    table cannot fill continue into archived weeks unless `archived` is False.
+    With `raw=False` the rows leave out the stored report payload
+    ('raw_json'), which is then neither read nor decoded.
     """
-    conn = get_conn()
-    conn.row_factory = sqlite3.Row if hasattr(sqlite3, "Row") else None
-    c = conn.cursor()
-    rows = c.execute(
-        """
-        SELECT id, created_at, reporter, text, lat, lon, severity, triage_ts, raw_json
-        FROM incidents
-        ORDER BY COALESCE(triage_ts, created_at) DESC
-        LIMIT ?
-        """,
-        (limit,),
-    ).fetchall()
-
-    def _row_to_dict(row):
-        if isinstance(row, dict):
-            payload = dict(row)
-        else:
-            try:
-                payload = {k: row[k] for k in row.keys()}
-            except Exception:
-                payload = {
-                    "id": row[0],
-                    "created_at": row[1],
-                    "reporter": row[2],
-                    "text": row[3],
-                    "lat": row[4],
-                    "lon": row[5],
-                    "severity": row[6],
-                    "triage_ts": row[7],
-                    "raw_json": row[8],
-                }
-        raw_value = payload.get("raw_json")
-        if raw_value:
-            try:
-                payload["raw_json"] = json.loads(raw_value)
-            except Exception:
-                payload["raw_json"] = raw_value
-        return payload
+    return list_incidents_page(limit, cursor, severity, since, until, bbox, archived, raw)['incidents']
+
+
+@timed('list_incidents_page', SQLITE_SECONDS)
+def list_incidents_page(limit=25, cursor=None, severity=None, since=None, until=None, bbox=None,
+                        archived=True, raw=True):
+    """
+    Keyset-paginated variant of `list_incidents`. Returns
+    {'incidents': [...], 'next_cursor': str or None}.
+    """
+    sql, params = _incident_query(limit, cursor, severity, since, until, bbox, raw)
+    with read_conn() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if archived and len(rows) < limit:
+        from .partitions import fill_page
+        rows = fill_page(rows, limit, cursor, severity, since, until, bbox, raw)
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+    return {'incidents': [_row_to_dict(r, raw) for r in rows], 'next_cursor': next_cursor}
+
+
+def _row_to_dict(row, raw=True):
+    if isinstance(row, dict):
+        payload = dict(row)
+    else:
+        try:
+            payload = {k: row[k] for k in row.keys()}
+        except Exception:
+            payload = dict(zip(INCIDENT_COLUMNS.split(', '), row))
+    payload.pop("sort_ts", None)
+    if raw:
+        payload["raw_json"] = decode_raw(payload.get("raw_json"))
+    else:
+        payload.pop("raw_json", None)
+    allocation = payload.pop("allocation_json", None)
+    payload["allocation"] = json.loads(allocation) if allocation else None
+    return payload
+
+
+class RecentIncidents:
+    """
+    Materialized "newest incidents" view: the top `size` rows by
+    (sort_ts, id), loaded from SQLite once and then maintained by
+    `save_incident` / `save_allocation`, so the dashboard never has to
+    query for them. `version` changes whenever the view does and doubles
+    as a cache validator.
+    """
+
+    def __init__(self, size=RECENT_SIZE):
+        self.size = size
+        self.version = 0
+        self._rows = {}      # id -> row tuple in INCIDENT_COLUMNS order
+        self._keys = []      # ascending (sort_ts, id); newest last
+        self._loaded = False
+        # True while every stored incident is in the view, i.e. a freed
+        # slot does not have to be refilled from the table
+        self._complete = True
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # pending writes would be invisible to the read connection
+        writer.flush()
+        sql, params = _incident_query(self.size)
+        with read_conn() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        with self._lock:
+            if self._loaded:
+                return
+            self._complete = True
+            for row in rows:
+                self._insert(tuple(row)[:-1])
+            self._complete = len(rows) < self.size
+            self._loaded = True
+            self.version += 1
+
+    def _insert(self, row):
+        key = (row[7] or row[1], row[0])
+        if self._keys and key < self._keys[0] and (len(self._keys) >= self.size or not self._complete):
+            # older than everything shown: rows between it and the view may
+            # exist only in the table
+            self._complete = False
+            return False
+        bisect.insort(self._keys, key)
+        self._rows[row[0]] = row
+        if len(self._keys) > self.size:
+            _, dropped = self._keys.pop(0)
+            self._rows.pop(dropped, None)
+            self._complete = False
+        return True
+
+    def _remove(self, incident_id):
+        row = self._rows.pop(incident_id, None)
+        if row is not None:
+            self._keys.remove((row[7] or row[1], row[0]))
+        return row
+
+    def update(self, params):
+        with self._lock:
+            if not self._loaded:
+                return
+            old = self._remove(params[0])
+            if params[9] is None and old is not None:
+                params = params[:9] + (old[9],)
+            inserted = self._insert(params)
+            if old is not None and not inserted and not self._complete:
+                # the row moved out of the top and the next one is only in
+                # the table: reload on the next read
+                self._rows, self._keys, self._loaded = {}, [], False
+            if inserted or old is not None:
+                self.version += 1
+
+    def set_allocation(self, incident_id, allocation_json):
+        with self._lock:
+            row = self._rows.get(incident_id)
+            if row is not None:
+                self._rows[incident_id] = row[:9] + (allocation_json,)
+                self.version += 1
+
+    def latest(self, limit=12, raw=True):
+        if not self._loaded:
+            self._load()
+        with self._lock:
+            rows = [self._rows[incident_id] for _, incident_id in self._keys[::-1][:limit]]
+        return [_row_to_dict(row, raw) for row in rows]
+
+    def invalidate(self):
+        """Drop the view; the next read reloads it (e.g. after bulk deletes)."""
+        with self._lock:
+            self._rows, self._keys, self._loaded, self._complete = {}, [], False, True
+            self.version += 1
+
+
+recent = RecentIncidents()
+
 
-    return [_row_to_dict(r) for r in rows]
+def recent_incidents(limit=12, raw=True):
+    """Same rows as `list_incidents(limit)` for limit <= RECENT_SIZE, without a query."""
+    if limit > recent.size:
+        return list_incidents(limit=limit, raw=raw)
+    return recent.latest(limit, raw)
 
 
 # ...existing code...
@@ -0,0 +1,423 @@
+"""
+Weekly partitions for the incidents table, retention and cold archives.
+
+The main database is the active partition. It holds the incidents whose
+sort time (triage_ts, else created_at) falls in a week that is still
+open, plus the seen_items, geocode_cache and feed tables. A week (Monday
+to Monday, UTC) closes PARTITION_GRACE_DAYS after it ends, so late triage
+and allocation updates still find their row. `archive_closed()` then moves
+each closed week into its own file under ARCHIVE_DIR: a SQLite image of
+that week's rows (and the duplicate reports merged into them), with the
+same indexes, compressed with zlib. The `partitions` table lists the
+archives and the sort times each one holds.
+
+`list_incidents_page` continues into the archives, newest week first,
+when the active table cannot fill a page. An archive is decompressed into
+memory on first use, and the ARCHIVE_CACHE most recently used ones stay
+open.
+
+Archives never change once written, so backups and VACUUM only touch the
+main database (`backup()`, `vacuum()`). `maintain()` also applies the
+retention policies: seen markers and fingerprints go after SEEN_TTL_S, bulk
+import markers (which let an interrupted import resume) after
+BULK_SEEN_TTL_S, and geocode_cache rows once the geocode cache would treat
+them as expired.
+The web app runs it every MAINTENANCE_EVERY_S. To run it by hand:
+
+    python -m src.memory.partitions maintain|list|vacuum|backup DEST [--now ISO]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from ..utils import DB_PATH, now_iso, open_conn, read_conn
+from .memory_bank import (BULK_SEEN_PREFIX, INCIDENT_COLUMNS, INCIDENT_INDEXES, INCIDENTS_TABLE,
+                          REPORT_COLUMNS, REPORT_INDEXES, REPORTS_TABLE, SEEN_TTL_S, _incident_query,
+                          decode_cursor, recent)
+from .writer import writer
+
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR') or os.path.splitext(DB_PATH)[0] + '-archive'
+GRACE_DAYS = float(os.getenv('PARTITION_GRACE_DAYS', '2'))
+ARCHIVE_CACHE = int(os.getenv('ARCHIVE_CACHE', '4'))
+MAINTENANCE_EVERY_S = float(os.getenv('MAINTENANCE_EVERY_S', '3600'))
+# VACUUM once free pages make up this share of the main database
+VACUUM_FREE_SHARE = float(os.getenv('VACUUM_FREE_SHARE', '0.25'))
+# the settings the geocode cache expires entries by
+GEOCODE_TTL_S = float(os.getenv('GEOCODE_TTL_S', str(30 * 24 * 3600)))
+GEOCODE_RETRY_TTL_S = float(os.getenv('GEOCODE_RETRY_TTL_S', '900'))
+# bulk import markers: a re-run of the same file within this skips its rows
+BULK_SEEN_TTL_S = float(os.getenv('BULK_SEEN_TTL_S', str(365 * 24 * 3600)))
+# item_hash range holding every bulk marker (';' follows ':')
+_BULK_RANGE = (BULK_SEEN_PREFIX, BULK_SEEN_PREFIX[:-1] + chr(ord(BULK_SEEN_PREFIX[-1]) + 1))
+MAGIC = b'CRARCHIVE1\n'
+_DATE = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+
+
+def _iso(ts):
+    return datetime.utcfromtimestamp(ts).isoformat() + 'Z'
+
+
+def week_of(ts):
+    """
+    (name, start, end) of the week holding the ISO timestamp `ts`. The
+    bounds are bare dates, so every timestamp of the week sorts between
+    them whatever its time and zone suffix look like.
+    """
+    day = datetime.strptime(ts[:10], '%Y-%m-%d')
+    start = day - timedelta(days=day.weekday())
+    year, week, _ = start.isocalendar()
+    return f'{year}-W{week:02d}', f'{start:%Y-%m-%d}', f'{start + timedelta(days=7):%Y-%m-%d}'
+
+
+def closed_before(now=None):
+    """Sort times below this bound belong to closed weeks."""
+    now = time.time() if now is None else now
+    return week_of(_iso(now - GRACE_DAYS * 86400))[1]
+
+
+def _read_image(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not an incident archive")
+    return zlib.decompress(memoryview(data)[len(MAGIC):])
+
+
+def _write_image(path, image):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(zlib.compress(image, 6))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _build_archive(rows, path, reports=()):
+    """
+    SQLite image of `rows` (and the duplicate `reports` merged into them)
+    merged into the archive at `path` (if any), and (rows, min_ts, max_ts)
+    of the result.
+    """
+    db = sqlite3.connect(':memory:')
+    try:
+        if os.path.exists(path):
+            # rows re-saved after their week was archived
+            db.deserialize(_read_image(path))
+        db.execute(INCIDENTS_TABLE)
+        db.execute(REPORTS_TABLE)
+        marks = ', '.join('?' * len(INCIDENT_COLUMNS.split(', ')))
+        db.executemany(f'REPLACE INTO incidents ({INCIDENT_COLUMNS}) VALUES ({marks})', rows)
+        marks = ', '.join('?' * len(REPORT_COLUMNS.split(', ')))
+        db.executemany(f'REPLACE INTO incident_reports ({REPORT_COLUMNS}) VALUES ({marks})', reports)
+        for index in INCIDENT_INDEXES + REPORT_INDEXES:
+            db.execute(index)
+        db.commit()
+        db.execute('VACUUM')
+        stats = db.execute('SELECT COUNT(*), MIN(sort_ts), MAX(sort_ts) FROM incidents').fetchone()
+        return db.serialize(), stats
+    finally:
+        db.close()
+
+
+def _archive_oldest(conn, cutoff):
+    """Move the oldest closed week out of the active table; (week, rows) or None."""
+    row = conn.execute('SELECT MIN(sort_ts) FROM incidents WHERE sort_ts < ? AND sort_ts GLOB ?',
+                       (cutoff, _DATE)).fetchone()
+    if row[0] is None:
+        return None
+    try:
+        week, start, end = week_of(row[0])
+    except ValueError:
+        print(f"Partitions: cannot place incidents sorted at {row[0]!r} in a week; archiving stops there")
+        return None
+    rows = conn.execute(f'SELECT {INCIDENT_COLUMNS} FROM incidents WHERE sort_ts >= ? AND sort_ts < ?',
+                        (start, end)).fetchall()
+    in_week = 'SELECT id FROM incidents WHERE sort_ts >= ? AND sort_ts < ?'
+    reports = conn.execute(f'SELECT {REPORT_COLUMNS} FROM incident_reports WHERE incident_id IN ({in_week})',
+                           (start, end)).fetchall()
+    name = f'incidents-{week}.db.z'
+    path = os.path.join(ARCHIVE_DIR, name)
+    image, (total, min_ts, max_ts) = _build_archive(rows, path, reports)
+    size = _write_image(path, image)
+    conn.execute('REPLACE INTO partitions (week, file, min_ts, max_ts, rows, bytes, archived_at) '
+                 'VALUES (?, ?, ?, ?, ?, ?, ?)', (week, name, min_ts, max_ts, total, size, now_iso()))
+    conn.execute(f'DELETE FROM incident_reports WHERE incident_id IN ({in_week})', (start, end))
+    conn.execute('DELETE FROM incidents WHERE sort_ts >= ? AND sort_ts < ?', (start, end))
+    return week, len(rows)
+
+
+def archive_closed(now=None):
+    """
+    Move every closed week from the active table into its archive file,
+    oldest first. Each week is written, recorded and deleted in one write
+    transaction, so a crash leaves its rows in the table (and a rerun
+    merges them into the file again). Returns {week: rows moved}.
+    """
+    if DB_PATH == ':memory:':
+        return {}
+    cutoff = closed_before(now)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    moved = {}
+    while True:
+        done = writer.commit_with(lambda conn: _archive_oldest(conn, cutoff))
+        if done is None:
+            break
+        moved[done[0]] = moved.get(done[0], 0) + done[1]
+    if moved:
+        recent.invalidate()
+    return moved
+
+
+def apply_retention(now=None):
+    """Delete expired seen_items and geocode_cache rows; returns the counts."""
+    now = time.time() if now is None else now
+
+    def prune(conn):
+        seen = conn.execute(
+            'DELETE FROM seen_items WHERE seen_at < ? AND NOT (item_hash >= ? AND item_hash < ?)',
+            (_iso(now - SEEN_TTL_S),) + _BULK_RANGE)
+        bulk = conn.execute('DELETE FROM seen_items WHERE seen_at < ? AND item_hash >= ? AND item_hash < ?',
+                            (_iso(now - BULK_SEEN_TTL_S),) + _BULK_RANGE)
+        geocode = conn.execute(
+            "DELETE FROM geocode_cache WHERE cached_at < "
+            "CASE WHEN COALESCE(source, 'upstream') = 'upstream' THEN ? ELSE ? END",
+            (_iso(now - GEOCODE_TTL_S), _iso(now - GEOCODE_RETRY_TTL_S)))
+        return {'seen_items': seen.rowcount, 'bulk_markers': bulk.rowcount, 'geocode_cache': geocode.rowcount}
+
+    return writer.commit_with(prune)
+
+
+def vacuum(force=False):
+    """
+    VACUUM the main database once VACUUM_FREE_SHARE of it is free pages
+    (always with `force`), then truncate the WAL it went through.
+    Returns True if it ran.
+    """
+    def run(conn):
+        pages = conn.execute('PRAGMA page_count').fetchone()[0]
+        free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if not force and free < pages * VACUUM_FREE_SHARE:
+            return False
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return True
+
+    return writer.exclusive(run)
+
+
+def backup(dest):
+    """
+    Online copy of the main database to `dest`; returns its size. Archive
+    files never change once written, so copying new ones from ARCHIVE_DIR
+    completes the backup.
+    """
+    writer.flush()
+    src, out = open_conn(), sqlite3.connect(dest)
+    try:
+        src.backup(out)
+    finally:
+        out.close()
+        src.close()
+    return os.path.getsize(dest)
+
+
+class ArchiveCache:
+    """Decompressed archives, open in memory, least recently used dropped first."""
+
+    def __init__(self, size=ARCHIVE_CACHE):
+        self.size = size
+        self.loads = 0
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def query(self, name, version, sql, params):
+        key = (name, version)
+        # the lock covers the LRU order only; loading and querying run
+        # outside it, so one slow archive does not hold up the others
+        with self._lock:
+            conn = self._open.get(key)
+            if conn is not None:
+                self._open.move_to_end(key)
+        if conn is None:
+            loaded = self._load(name)
+            with self._lock:
+                # another thread may have loaded it meanwhile: keep theirs
+                conn = self._open.setdefault(key, loaded)
+                self._open.move_to_end(key)
+                if conn is loaded:
+                    self.loads += 1
+                while len(self._open) > self.size:
+                    # dropped, not closed: a query on another thread may
+                    # still use it, and the last reference closes it
+                    self._open.popitem(last=False)
+        return conn.execute(sql, params).fetchall()
+
+    def _load(self, name):
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.deserialize(_read_image(os.path.join(ARCHIVE_DIR, name)))
+        conn.execute('PRAGMA query_only=ON')
+        return conn
+
+
+archives = ArchiveCache()
+
+
+def _sort_key(row):
+    return (row['sort_ts'] or '', row['id'])
+
+
+def fill_page(rows, limit, cursor=None, severity=None, since=None, until=None, bbox=None, raw=True):
+    """
+    Top up a page of active rows with the same query over the archives,
+    newest week first, stopping once no older week can make the page.
+    Returns at most `limit` rows in page order.
+    """
+    upper = until
+    if cursor:
+        cursor_ts = decode_cursor(cursor)[0]
+        upper = min(upper, cursor_ts) if upper else cursor_ts
+    where, params = [], []
+    if since:
+        where.append('max_ts >= ?')
+        params.append(since)
+    if upper:
+        where.append('min_ts <= ?')
+        params.append(upper)
+    sql = 'SELECT file, archived_at, max_ts FROM partitions'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    with read_conn() as conn:
+        parts = conn.execute(sql + ' ORDER BY max_ts DESC', params).fetchall()
+    if not parts:
+        return rows
+    sql, params = _incident_query(limit, cursor, severity, since, until, bbox, raw)
+    rows = list(rows)
+    ids = {row['id'] for row in rows}
+    for part in parts:
+        if len(rows) >= limit and (part['max_ts'] or '') < rows[-1]['sort_ts']:
+            break
+        # an incident saved again after its week closed is shown once
+        found = [row for row in archives.query(part['file'], part['archived_at'], sql, params)
+                 if row['id'] not in ids]
+        ids.update(row['id'] for row in found)
+        rows = sorted(rows + found, key=_sort_key, reverse=True)[:limit]
+    return rows
+
+
+def archived_reports(incident_id, sql):
+    """
+    Run the duplicate-report query `sql` for an archived incident, newest
+    week first, until an archive holds the incident.
+    """
+    with read_conn() as conn:
+        parts = conn.execute('SELECT file, archived_at FROM partitions ORDER BY max_ts DESC').fetchall()
+    for part in parts:
+        found = archives.query(part['file'], part['archived_at'],
+                               'SELECT 1 FROM incidents WHERE id=?', (incident_id,))
+        if found:
+            # archives written before duplicates were stored have no such table
+            tables = archives.query(part['file'], part['archived_at'],
+                                    "SELECT 1 FROM sqlite_master WHERE name='incident_reports'", ())
+            return archives.query(part['file'], part['archived_at'], sql, (incident_id,)) if tables else []
+    return []
+
+
+def list_partitions():
+    """Archived weeks, oldest first, as dicts."""
+    with read_conn() as conn:
+        rows = conn.execute('SELECT week, file, min_ts, max_ts, rows, bytes, archived_at '
+                            'FROM partitions ORDER BY week').fetchall()
+    return [dict(r) for r in rows]
+
+
+_last_run = {}
+
+
+def maintain(now=None):
+    """Retention, archiving and (when worthwhile) VACUUM, in that order."""
+    start = time.perf_counter()
+    result = {'pruned': apply_retention(now), 'archived': archive_closed(now), 'vacuumed': vacuum()}
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    _last_run.clear()
+    _last_run.update(result, finished_at=now_iso())
+    pruned, archived = sum(result['pruned'].values()), sum(result['archived'].values())
+    if pruned or archived:
+        print(f"Partitions: maintenance pruned {pruned} cache rows and archived {archived} incidents "
+              f"from {len(result['archived'])} weeks in {result['seconds']:.1f} s")
+    return result
+
+
+def stats():
+    parts = list_partitions()
+    return {
+        'archives': len(parts),
+        'archived_rows': sum(p['rows'] for p in parts),
+        'archive_bytes': sum(p['bytes'] for p in parts),
+        'archive_loads': archives.loads,
+        'last_maintenance': dict(_last_run),
+    }
+
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _run(interval):
+    while True:
+        try:
+            maintain()
+        except Exception as exc:
+            print(f"Partitions: maintenance failed: {exc}")
+        time.sleep(interval)
+
+
+def start_maintenance(interval=MAINTENANCE_EVERY_S):
+    """Run `maintain()` now and every `interval` seconds on a daemon thread (0 disables)."""
+    global _thread
+    if interval <= 0:
+        return None
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(interval,), name='memory-maintenance', daemon=True)
+            _thread.start()
+    return _thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Partition maintenance for the memory database.')
+    parser.add_argument('command', choices=['maintain', 'list', 'vacuum', 'backup'])
+    parser.add_argument('dest', nargs='?', help='backup destination')
+    parser.add_argument('--now', help='ISO time to treat as now (maintain)')
+    args = parser.parse_args(argv)
+    if args.command == 'maintain':
+        now = None
+        if args.now:
+            now = (datetime.fromisoformat(args.now.rstrip('Z')) - datetime(1970, 1, 1)).total_seconds()
+        result = maintain(now)
+        print(f"pruned {result['pruned']}, archived {result['archived'] or 'nothing'}, "
+              f"vacuumed: {result['vacuumed']} ({result['seconds']:.1f} s)")
+    elif args.command == 'list':
+        for p in list_partitions():
+            print(f"{p['week']}  {p['rows']:>9,} incidents  {p['bytes'] / 1e6:8.2f} MB  "
+                  f"{p['min_ts']} .. {p['max_ts']}  {p['file']}")
+    elif args.command == 'vacuum':
+        print(f"vacuumed: {vacuum(force=True)}")
+    else:
+        if not args.dest:
+            parser.error('backup needs a destination')
+        print(f"backed up {backup(args.dest) / 1e6:.2f} MB to {args.dest}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# Group-commit writer for the memory bank.
+#
+# Writes are buffered and committed together once `max_batch` statements are
+# pending or `window_ms` has passed since the first one, so a burst of
+# reports costs one fsync instead of one per statement. Writes carry a key
+# (table, primary key); a later write with the same key replaces the pending
+# one, so the Receiver -> Triage -> Coordinator saves of one incident inside a
+# window hit the disk once.
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .. import metrics
+from ..utils import get_conn
+
+# 'batch' buffers writes (default), 'sync' commits every statement as before
+DURABILITY = os.getenv('MEMORY_DURABILITY', 'batch')
+BATCH_SIZE = int(os.getenv('MEMORY_BATCH_SIZE', '256'))
+BATCH_WINDOW_MS = float(os.getenv('MEMORY_BATCH_WINDOW_MS', '50'))
+
+
+class GroupCommitWriter:
+
+    def __init__(self, conn_factory=get_conn, max_batch=BATCH_SIZE,
+                 window_ms=BATCH_WINDOW_MS, durability=DURABILITY):
+        self._conn_factory = conn_factory
+        self.max_batch = max_batch
+        self.window_ms = window_ms
+        self.durability = durability
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        # held for the whole take-and-commit so batches land in order
+        self._io_lock = threading.Lock()
+        self._thread = None
+        self.stats = {'writes': 0, 'coalesced': 0, 'batches': 0, 'rows': 0, 'dropped': 0}
+
+    def submit(self, key, sql, params):
+        """Queue (or, in 'sync' mode, execute) one keyed write."""
+        if self.durability == 'sync':
+            with self._io_lock:
+                conn = self._conn_factory()
+                conn.execute(sql, params)
+                conn.commit()
+                self.stats['writes'] += 1
+                self.stats['batches'] += 1
+                self.stats['rows'] += 1
+            return
+        with self._cond:
+            self.stats['writes'] += 1
+            if key in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[key] = (sql, params)
+            full = len(self._pending) >= self.max_batch
+            if not full:
+                self._ensure_thread()
+                self._cond.notify()
+        if full:
+            self.flush()
+
+    def pending(self, key):
+        """Return the params of a not-yet-committed write for `key`, if any."""
+        with self._cond:
+            item = self._pending.get(key)
+        return item[1] if item else None
+
+    def flush(self):
+        """Commit everything buffered so far. Returns the number of rows."""
+        return self._commit()[0]
+
+    def commit_with(self, fn):
+        """
+        Run `fn(conn)` in one write transaction with everything buffered so
+        far and return its result. The transaction takes the database write
+        lock up front, so what `fn` reads is the latest committed state of
+        every process and nothing can commit between its read and its write.
+        """
+        return self._commit(fn)[1]
+
+    def exclusive(self, fn):
+        """
+        Commit everything buffered, then run `fn(conn)` outside any
+        transaction while later writes wait (for VACUUM and checkpoints).
+        """
+        self.flush()
+        with self._io_lock:
+            return fn(self._conn_factory())
+
+    def _commit(self, fn=None):
+        with self._io_lock:
+            with self._cond:
+                if not self._pending and fn is None:
+                    return 0, None
+                batch = list(self._pending.items())
+                self._pending.clear()
+            conn = self._conn_factory()
+            result = None
+            dropped = 0
+            in_fn = False
+            try:
+                with metrics.timer('write_batch', metrics.SQLITE_SECONDS):
+                    if fn is not None:
+                        conn.execute('BEGIN IMMEDIATE')
+                    for _, (sql, params) in batch:
+                        conn.execute(sql, params)
+                    if fn is not None:
+                        in_fn = True
+                        result = fn(conn)
+                        in_fn = False
+                    conn.commit()
+            except Exception as exc:
+                conn.rollback()
+                try:
+                    # one bad statement must not hold back the rest of the batch;
+                    # if `fn` failed, the batch is committed without it
+                    dropped, result = self._commit_each(conn, batch, None if in_fn else fn)
+                except Exception:
+                    conn.rollback()
+                    self._restore(batch)
+                    raise
+                if in_fn:
+                    self.stats['batches'] += 1
+                    self.stats['rows'] += len(batch) - dropped
+                    raise exc
+            self.stats['batches'] += 1
+            self.stats['rows'] += len(batch) - dropped
+            return len(batch) - dropped, result
+
+    def _commit_each(self, conn, batch, fn):
+        """
+        Replay a failed batch one statement at a time, each under its own
+        savepoint, dropping (and logging) the statements that fail. An error
+        from `fn` is raised after the good statements are committed.
+        """
+        dropped = 0
+        result = error = None
+        conn.execute('BEGIN IMMEDIATE')
+        for key, (sql, params) in batch:
+            conn.execute('SAVEPOINT stmt')
+            try:
+                conn.execute(sql, params)
+            except Exception as exc:
+                conn.execute('ROLLBACK TO stmt')
+                dropped += 1
+                print(f"MemoryWriter: dropped write {key}: {exc}")
+            conn.execute('RELEASE stmt')
+        if fn is not None:
+            conn.execute('SAVEPOINT fn')
+            try:
+                result = fn(conn)
+            except Exception as exc:
+                conn.execute('ROLLBACK TO fn')
+                error = exc
+            conn.execute('RELEASE fn')
+        conn.commit()
+        self.stats['dropped'] += dropped
+        if error is not None:
+            raise error
+        return dropped, result
+
+    def _restore(self, batch):
+        """Put an uncommitted batch back ahead of newer writes, in order."""
+        with self._cond:
+            restored = OrderedDict(batch)
+            for key, item in self._pending.items():
+                restored.pop(key, None)
+                restored[key] = item
+            self._pending = restored
+
+    def set_durability(self, mode):
+        if mode not in ('batch', 'sync'):
+            raise ValueError(f"unknown durability mode: {mode}")
+        if mode == 'sync':
+            self.flush()
+        self.durability = mode
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name='memory-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # let the window fill up before committing
+            time.sleep(self.window_ms / 1000.0 + backoff)
+            try:
+                self.flush()
+                backoff = 0.0
+            except Exception as exc:
+                # the database itself is failing (locked, disk full): retry, more slowly
+                if not backoff:
+                    print(f"MemoryWriter: flush failed: {exc}")
+                backoff = min(max(backoff * 2, 0.5), 30.0)
+
+
+writer = GroupCommitWriter()
+atexit.register(writer.flush)
@@ -0,0 +1,163 @@
+"""
+Append-only log of the messages routed between agents.
+
+`MessageLog.append(msg)` encodes the message as compact JSON right away
+(later stages mutate the payload dicts in place) and adds it to the
+current frame. A frame is zlib-compressed and appended to the file once
+FRAME_MESSAGES are pending, or by a background flush FLUSH_MS after its
+first message; consecutive messages about one incident repeat most of
+their payload, so frames compress well.
+
+File layout: MAGIC, then frames of
+
+    <u32 compressed length> <u32 crc32 of the compressed bytes> <zlib data>
+
+where the data is one JSON line `[at, msg]` per message and `at` is the
+routing time in epoch seconds. A frame cut short by a crash fails its
+length or CRC check: `read_messages` stops there, and opening the log
+for appending truncates it.
+
+Set MESSAGE_LOG_PATH to record everything the shared router routes;
+`python -m src.replay` plays a log back.
+"""
+
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+MESSAGE_LOG_PATH = os.getenv('MESSAGE_LOG_PATH')
+FRAME_MESSAGES = int(os.getenv('MESSAGE_LOG_FRAME', '512'))
+FLUSH_MS = float(os.getenv('MESSAGE_LOG_FLUSH_MS', '200'))
+MAGIC = b'CRMSGLOG1\n'
+_FRAME = struct.Struct('<II')
+
+
+def _frames(f):
+    """Yield (offset after the frame, decompressed data) for each intact frame."""
+    offset = len(MAGIC)
+    while True:
+        head = f.read(_FRAME.size)
+        if len(head) < _FRAME.size:
+            return
+        size, crc = _FRAME.unpack(head)
+        blob = f.read(size)
+        if len(blob) < size or zlib.crc32(blob) != crc:
+            return
+        offset += _FRAME.size + size
+        yield offset, zlib.decompress(blob)
+
+
+def read_messages(path):
+    """Yield (at, msg) for every message in the log at `path`, in order."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a message log")
+        for _, data in _frames(f):
+            for line in data.splitlines():
+                at, msg = json.loads(line)
+                yield at, msg
+
+
+class MessageLog:
+
+    def __init__(self, path, frame_messages=FRAME_MESSAGES, flush_ms=FLUSH_MS):
+        self.path = path
+        self.frame_messages = frame_messages
+        self.flush_ms = flush_ms
+        self._pending = []
+        self._cond = threading.Condition()
+        # held while a frame is compressed and written so frames stay in order
+        self._io_lock = threading.Lock()
+        self._thread = None
+        self.stats = {'messages': 0, 'frames': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self._file = self._open(path)
+
+    @staticmethod
+    def _open(path):
+        f = open(path, 'a+b')
+        f.seek(0)
+        head = f.read(len(MAGIC))
+        if not head:
+            f.write(MAGIC)
+            f.flush()
+            return f
+        if head != MAGIC:
+            f.close()
+            raise ValueError(f"{path} is not a message log")
+        end = len(MAGIC)
+        for end, _ in _frames(f):
+            pass
+        # drop a frame torn by a crash so new frames follow intact ones
+        f.truncate(end)
+        return f
+
+    def append(self, msg, at=None):
+        line = json.dumps([time.time() if at is None else at, msg],
+                          separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+        with self._cond:
+            self._pending.append(line)
+            self.stats['messages'] += 1
+            full = len(self._pending) >= self.frame_messages
+            if not full:
+                self._ensure_thread()
+                self._cond.notify()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything appended so far as one frame. Returns the message count."""
+        with self._io_lock:
+            with self._cond:
+                lines, self._pending = self._pending, []
+            if not lines or self._file.closed:
+                return 0
+            data = b'\n'.join(lines)
+            blob = zlib.compress(data, 6)
+            self._file.write(_FRAME.pack(len(blob), zlib.crc32(blob)) + blob)
+            self._file.flush()
+            self.stats['frames'] += 1
+            self.stats['bytes_in'] += len(data)
+            self.stats['bytes_out'] += _FRAME.size + len(blob)
+            return len(lines)
+
+    def close(self):
+        self.flush()
+        with self._io_lock:
+            self._file.close()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='message-log', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # let the frame fill up before writing it
+            time.sleep(self.flush_ms / 1000.0)
+            try:
+                self.flush()
+            except Exception as exc:
+                print(f"MessageLog: flush failed: {exc}")
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_message_log():
+    """The log at MESSAGE_LOG_PATH, opened on first use; None when unset."""
+    global _log
+    if _log is None and MESSAGE_LOG_PATH:
+        with _log_lock:
+            if _log is None:
+                _log = MessageLog(MESSAGE_LOG_PATH)
+                atexit.register(_log.flush)
+                print(f"MessageLog: recording routed messages to {MESSAGE_LOG_PATH}")
+    return _log
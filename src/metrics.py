@@ -0,0 +1,361 @@
+"""
+In-process metrics and an on-demand sampling profiler.
+
+Timing histograms live in one registry and are rendered in the
+Prometheus text format by `render()` (served on /metrics). Values owned by
+other components (queue depths, cache hit rates, writer stats) are read at
+scrape time through collector callbacks instead of being copied on every
+update.
+
+With METRICS_ENABLED=0, `timer()` hands back a shared no-op context
+manager and `timed()` returns the function it decorates unchanged, so the
+hot paths pay for at most one attribute lookup.
+"""
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+PREFIX = 'crelief_'
+# seconds; pipeline stages range from a dict lookup to an upstream geocode
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_INTERVAL_S = 0.005
+# each sample walks every thread's stack with the GIL held
+PROFILE_MIN_INTERVAL_S = 0.001
+# a forgotten profiler stops itself
+PROFILE_MAX_DURATION_S = 600.0
+PROFILE_MAX_DEPTH = 64
+# distinct stacks kept; samples of further ones are counted under PROFILE_OTHER
+PROFILE_MAX_STACKS = 20000
+PROFILE_OTHER = '(other)'
+
+
+def _fmt(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_TIMER = _NoopTimer()
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Histogram:
+    """A histogram family; `labels(*values)` returns the child for one series."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = PREFIX + name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = _HistogramChild(self.bounds)
+        return child
+
+    def reset(self):
+        with self._lock:
+            self._children = {}
+
+    def render(self):
+        for values, child in sorted(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, n in zip(self.bounds + (float('inf'),), counts):
+                cumulative += n
+                le = 'le="%s"' % _fmt(float(bound))
+                yield f'{self.name}_bucket{_label_str(self.labelnames, values, le)} {cumulative}'
+            yield f'{self.name}_sum{_label_str(self.labelnames, values)} {_fmt(total)}'
+            yield f'{self.name}_count{_label_str(self.labelnames, values)} {count}'
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def add_collector(self, fn):
+        """
+        `fn()` yields (name, kind, doc, samples) where samples is a list of
+        (labels dict, value); it runs on every scrape.
+        """
+        with self._lock:
+            if fn not in self._collectors:
+                self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.doc}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        for fn in list(self._collectors):
+            try:
+                families = list(fn())
+            except Exception as exc:
+                print(f"Metrics: collector {getattr(fn, '__name__', fn)} failed: {exc}")
+                continue
+            for name, kind, doc, samples in families:
+                name = PREFIX + name
+                lines.append(f'# HELP {name} {doc}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f'{name}{_label_str(labels.keys(), labels.values())} {_fmt(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    'stage_seconds', 'Time spent in each pipeline stage.', ('stage',)))
+AGENT_SECONDS = registry.register(Histogram(
+    'agent_receive_seconds', "Time spent in each agent's receive().", ('agent',)))
+SQLITE_SECONDS = registry.register(Histogram(
+    'sqlite_query_seconds', 'SQLite read queries and write-batch commits.', ('query',)))
+QUEUE_SECONDS = registry.register(Histogram(
+    'queue_wait_seconds', 'Time scheduled work waited for a worker, by queue and severity.',
+    ('queue', 'severity'), buckets=DEFAULT_BUCKETS + (30.0, 60.0, 120.0)))
+
+
+def timer(stage, histogram=STAGE_SECONDS):
+    """`with timer('classify'):` records the block's duration."""
+    if not METRICS_ENABLED:
+        return NOOP_TIMER
+    return histogram.labels(stage).time()
+
+
+def observe(stage, seconds, histogram=STAGE_SECONDS):
+    if METRICS_ENABLED:
+        histogram.labels(stage).observe(seconds)
+
+
+def timed(stage, histogram=STAGE_SECONDS):
+    """Decorator form of `timer`; a no-op when metrics are disabled."""
+    def wrap(fn):
+        if not METRICS_ENABLED:
+            return fn
+        child = histogram.labels(stage)
+
+        def timed_fn(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__qualname__ = fn.__qualname__
+        timed_fn.__doc__ = fn.__doc__
+        timed_fn.__wrapped__ = fn
+        return timed_fn
+    return wrap
+
+
+def add_collector(fn):
+    return registry.add_collector(fn)
+
+
+def render():
+    return registry.render()
+
+
+# Sampling profiler
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack every `interval` seconds from a
+    background thread and tallies them as collapsed stacks
+    ("outer;inner;leaf count"), the input format of flamegraph.pl and
+    speedscope. Costs nothing until `start()`; a run stops itself after
+    `max_duration` seconds and keeps at most `max_stacks` distinct stacks.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_S, max_depth=PROFILE_MAX_DEPTH,
+                 max_duration=PROFILE_MAX_DURATION_S, max_stacks=PROFILE_MAX_STACKS):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_duration = max_duration
+        self.max_stacks = max_stacks
+        self.duration = max_duration
+        self.stacks = _Tally()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # guards `stacks` between the sampling thread and its readers
+        self._stacks_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None, reset=True, duration=None):
+        with self._lock:
+            if self.running:
+                return False
+            if interval:
+                self.interval = max(interval, PROFILE_MIN_INTERVAL_S)
+            self.duration = min(duration, self.max_duration) if duration else self.max_duration
+            if reset:
+                with self._stacks_lock:
+                    self.stacks = _Tally()
+                    self.samples = 0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+        print(f"Metrics: sampling profiler started ({self.interval * 1000:.1f} ms interval, "
+              f"stops after {self.duration:.0f} s)")
+        return True
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            thread = self._thread
+        thread.join()
+        print(f"Metrics: sampling profiler stopped after {self.samples} samples")
+        return True
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + self.duration
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                print(f"Metrics: sampling profiler reached its {self.duration:.0f} s limit "
+                      f"after {self.samples} samples")
+                break
+            frames = sys._current_frames()
+            keys = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                thread = names.get(ident)
+                if thread is None:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                    thread = names.get(ident, str(ident))
+                stack.append(thread)
+                keys.append(';'.join(reversed(stack)))
+            del frames
+            with self._stacks_lock:
+                for key in keys:
+                    if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                        key = PROFILE_OTHER
+                    self.stacks[key] += 1
+                self.samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self, limit=None):
+        with self._stacks_lock:
+            stacks = _Tally(self.stacks)
+        return '\n'.join(f'{stack} {n}' for stack, n in stacks.most_common(limit)) + '\n'
+
+    def status(self):
+        return {
+            'running': self.running,
+            'interval_ms': round(self.interval * 1000, 3),
+            'duration_s': self.duration,
+            'samples': self.samples,
+            'stacks': len(self.stacks),
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+        }
+
+
+profiler = SamplingProfiler()
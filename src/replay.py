@@ -0,0 +1,308 @@
+"""
+Replay a recorded (or synthetic) message stream through the agents.
+
+    python -m src.replay messages.log [--speed 10] [--record replayed.log]
+    python -m src.replay --synthetic 2000 --rate 50 [--speed max]
+
+The reports in the stream are fed through a fresh Receiver -> Triage ->
+Coordinator -> Resource router at their recorded pace divided by
+`--speed` (1, 10, ... or max). Geocoding is answered inline by the
+deterministic stub and nothing goes upstream, so a replay runs offline
+and two replays of one log see the same coordinates. Unless MEMORY_DB is
+set, incidents go to a scratch database.
+
+Printed afterwards: throughput, latency per stage (message in to message
+out of each agent) and end to end, and how the replayed severities and
+allocations differ from the recorded ones. Incidents are matched by
+reporter and text, in order, since the replay mints new incident ids.
+With `--record` the replayed stream is logged too, e.g. to serve as the
+baseline for the next replay.
+"""
+
+import os
+import tempfile
+
+# a replay must never write into the live incidents table
+os.environ.setdefault('MEMORY_DB', os.path.join(tempfile.mkdtemp(prefix='cr-replay-'), 'memory.db'))
+
+import argparse  # noqa: E402
+import contextlib  # noqa: E402
+import io  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+import uuid  # noqa: E402
+
+from . import router as router_mod  # noqa: E402
+from .message_log import MessageLog, read_messages  # noqa: E402
+from .tools.geocode import GeocodeService, TokenBucket, geocode_stub, set_service  # noqa: E402
+from .tools.geocode_cache import GeocodeCache  # noqa: E402
+from .utils import now_iso  # noqa: E402
+
+STAGES = (('receiver', 'input', 'report'),
+          ('triage', 'report', 'triage_result'),
+          ('coordinator', 'triage_result', 'resource_request'),
+          ('resource', 'resource_request', 'resource_allocation'))
+AGENTS = ('receiver', 'triage', 'coordinator', 'resource')
+SYNTHETIC_TEXTS = (
+    'building collapsed, people trapped inside',
+    'fire spreading near the market',
+    'two people injured, need help',
+    'smoke from the warehouse, evacuate',
+    'power line down on the street',
+    'road blocked by a fallen tree',
+    'water supply cut since morning',
+)
+SYNTHETIC_PLACES = ('Surat', 'Navsari', 'Valsad', 'Bharuch', 'Vapi', 'Ankleshwar', 'Bardoli')
+
+
+def _incident_id(msg):
+    payload = msg.get('payload') or {}
+    if 'incident' in payload:
+        return (payload['incident'] or {}).get('id')
+    return payload.get('incident_id') or payload.get('id')
+
+
+def _raw(value):
+    # incidents carry the original report as a JSON string
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _as_input(msg):
+    """Receiver input for a recorded report (routed Receiver -> Triage)."""
+    inc = msg.get('payload') or {}
+    raw = _raw(inc.get('raw_json'))
+    return {'id': str(uuid.uuid4()), 'timestamp': msg.get('timestamp'), 'sender': 'replay',
+            'receiver': 'receiver', 'kind': 'report',
+            'payload': {'reporter': inc.get('reporter'), 'text': inc.get('text'),
+                        'lat': inc.get('lat'), 'lon': inc.get('lon'),
+                        # still being geocoded when it was recorded
+                        'place_text': raw.get('place_text') if isinstance(raw, dict) else None,
+                        'raw_json': raw}}
+
+
+def _key(payload):
+    return (payload.get('reporter') or 'unknown', payload.get('text') or '')
+
+
+class Outcomes:
+    """Severity and allocation per incident, keyed by (reporter, text, occurrence)."""
+
+    def __init__(self):
+        self._seen = {}
+        self._inputs_seen = {}
+        self.keys = {}          # incident id -> key
+        self.severity = {}      # key -> severity
+        self.allocation = {}    # key -> {type: [resource id, ...]}
+
+    @staticmethod
+    def _next(seen, base):
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        return base + (n,)
+
+    def input_key(self, msg):
+        return self._next(self._inputs_seen, _key(msg.get('payload') or {}))
+
+    def observe(self, msg):
+        kind, payload = msg.get('kind'), msg.get('payload') or {}
+        iid = _incident_id(msg)
+        if kind == 'report' and msg.get('sender') == 'receiver':
+            self.keys[iid] = self._next(self._seen, _key(payload))
+        elif kind == 'triage_result' and iid in self.keys:
+            self.severity[self.keys[iid]] = payload.get('severity')
+        elif kind == 'resource_allocation' and iid in self.keys:
+            self.allocation[self.keys[iid]] = {t: sorted(ids) for t, ids in (payload.get('allocation') or {}).items()}
+
+
+def load(path):
+    """(inputs, recorded outcomes) from a message log; inputs are (at, msg)."""
+    messages = list(read_messages(path))
+    outcomes = Outcomes()
+    for _, msg in messages:
+        outcomes.observe(msg)
+    direct = [(at, msg) for at, msg in messages if msg.get('receiver') == 'receiver']
+    if direct:
+        return direct, outcomes
+    # reports handed to ReceiverAgent.receive_report directly: only the
+    # report it routed on to Triage was recorded
+    return [(at, _as_input(msg)) for at, msg in messages
+            if msg.get('kind') == 'report' and msg.get('sender') == 'receiver'], outcomes
+
+
+def synthetic(n, rate, seed=7):
+    """`n` receiver inputs arriving as a Poisson stream of `rate` per second."""
+    rnd = random.Random(seed)
+    at = time.time()
+    out = []
+    for i in range(n):
+        at += rnd.expovariate(rate)
+        out.append((at, {'id': str(uuid.uuid4()), 'timestamp': now_iso(), 'sender': 'replay',
+                         'receiver': 'receiver', 'kind': 'report',
+                         'payload': {'reporter': f'synthetic-{i % 50}',
+                                     'text': f'{rnd.choice(SYNTHETIC_TEXTS)} (report {i})',
+                                     # the stub maps places onto ~1000 points, so
+                                     # most reports are not near-duplicates
+                                     'place_text': f'Ward {rnd.randint(1, 500)}, {rnd.choice(SYNTHETIC_PLACES)}'}}))
+    return out
+
+
+class Recorder:
+    """Router log that timestamps every replayed message and tees it to `sink`."""
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.outcomes = Outcomes()
+        self.times = {}         # (incident id or input key, kind) -> first perf_counter
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def append(self, msg, at=None):
+        now = time.perf_counter()
+        with self._lock:
+            self.messages += 1
+            self.outcomes.observe(msg)
+            if msg.get('receiver') == 'receiver':
+                self.times[(self.outcomes.input_key(msg), 'input')] = now
+            else:
+                self.times.setdefault((_incident_id(msg), msg.get('kind')), now)
+        if self.sink is not None:
+            self.sink.append(msg, at)
+
+
+def replay(inputs, speed=None, recorder=None, concurrency=None):
+    """
+    Route `inputs` through a fresh router, paced at `speed` times the
+    recorded rate (None: as fast as the router takes them). Returns
+    (seconds, recorder).
+    """
+    recorder = recorder or Recorder()
+    set_service(GeocodeService(backend=None, limiter=TokenBucket(rate=1e6, burst=1000),
+                               cache=GeocodeCache(), offline=geocode_stub))
+    router = router_mod.build_default_router(log=recorder, concurrency=concurrency)
+    router_mod.set_router(router)
+    first = inputs[0][0] if inputs else 0.0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for at, msg in inputs:
+            if speed:
+                delay = start + (at - first) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            router.route_message(msg)
+        router.join()
+    elapsed = time.perf_counter() - start
+    router.stop()
+    return elapsed, recorder
+
+
+def _pct(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))]
+
+
+def stage_latencies(recorder):
+    """{stage: [seconds, ...]} from the replayed message times."""
+    times = recorder.times
+    out = {name: [] for name, _, _ in STAGES}
+    out['end_to_end'] = []
+    for iid, key in recorder.outcomes.keys.items():
+        points = {'input': times.get((key, 'input'))}
+        for kind in ('report', 'triage_result', 'resource_request', 'resource_allocation'):
+            points[kind] = times.get((iid, kind))
+        for name, begin, end in STAGES:
+            if points[begin] is not None and points[end] is not None:
+                out[name].append(points[end] - points[begin])
+        done = points['resource_allocation'] or points['triage_result']
+        if points['input'] is not None and done is not None:
+            out['end_to_end'].append(done - points['input'])
+    return out
+
+
+def divergence(recorded, replayed, examples=5):
+    """(counts, example lines) comparing recorded and replayed outcomes."""
+    counts = {'compared': 0, 'severity': 0, 'allocation': 0, 'missing': 0}
+    lines = []
+    for key, severity in recorded.severity.items():
+        counts['compared'] += 1
+        label = f"{key[0]}: {key[1][:48]!r}"
+        if key not in replayed.severity:
+            counts['missing'] += 1
+            if len(lines) < examples:
+                lines.append(f"{label} not triaged in the replay")
+            continue
+        if replayed.severity[key] != severity:
+            counts['severity'] += 1
+            if len(lines) < examples:
+                lines.append(f"{label} severity {severity} -> {replayed.severity[key]}")
+        if recorded.allocation.get(key) != replayed.allocation.get(key):
+            counts['allocation'] += 1
+            if len(lines) < examples:
+                lines.append(f"{label} allocation {recorded.allocation.get(key)} -> "
+                             f"{replayed.allocation.get(key)}")
+    return counts, lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('log', nargs='?', help='message log recorded with MESSAGE_LOG_PATH')
+    parser.add_argument('--synthetic', type=int, metavar='N', help='replay N generated reports instead')
+    parser.add_argument('--rate', type=float, default=20.0, help='synthetic reports per second (default 20)')
+    parser.add_argument('--speed', default='1', help='1, 10, ... times the recorded pace, or max')
+    parser.add_argument('--record', metavar='PATH', help='log the replayed stream to PATH')
+    parser.add_argument('--workers', type=int, default=1, help='worker threads per agent')
+    args = parser.parse_args(argv)
+    if bool(args.log) == bool(args.synthetic):
+        parser.error('give a message log or --synthetic N')
+    speed = None if args.speed == 'max' else float(args.speed)
+
+    if args.log:
+        inputs, recorded = load(args.log)
+        source = args.log
+    else:
+        inputs, recorded = synthetic(args.synthetic, args.rate), None
+        source = f'{args.synthetic:,} synthetic reports at {args.rate:g}/s'
+    if not inputs:
+        print(f"Replay: no reports in {source}")
+        return 1
+    span = inputs[-1][0] - inputs[0][0]
+    print(f"Replay: {len(inputs):,} reports from {source}, recorded over {span:.1f} s, "
+          f"speed {args.speed}{'x' if speed else ''}")
+
+    sink = MessageLog(args.record) if args.record else None
+    concurrency = {name: args.workers for name in AGENTS}
+    elapsed, recorder = replay(inputs, speed, Recorder(sink), concurrency)
+    if sink is not None:
+        sink.close()
+    print(f"  {elapsed:.2f} s: {len(inputs) / elapsed:,.0f} reports/s, "
+          f"{recorder.messages / elapsed:,.0f} messages/s")
+
+    print("  latency (ms)        n       p50       p99       max")
+    for name, samples in stage_latencies(recorder).items():
+        print(f"    {name:<12} {len(samples):>7} {_pct(samples, 50) * 1000:9.2f} "
+              f"{_pct(samples, 99) * 1000:9.2f} {max(samples, default=0.0) * 1000:9.2f}")
+
+    if recorded is not None:
+        counts, lines = divergence(recorded, recorder.outcomes)
+        print(f"  divergence from the recording, {counts['compared']:,} incidents: "
+              f"{counts['severity']} severity, {counts['allocation']} allocation, "
+              f"{counts['missing']} missing")
+        for line in lines:
+            print(f"    {line}")
+    if sink is not None:
+        st = sink.stats
+        print(f"  replayed stream written to {args.record}: {st['messages']:,} messages, "
+              f"{st['bytes_in'] / 1e3:,.0f} kB as JSON, {st['bytes_out'] / 1e3:,.0f} kB on disk")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
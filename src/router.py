@@ -0,0 +1,311 @@
+"""
+In-process message bus for the agents.
+
+Each registered agent gets a bounded queue and a pool of worker threads
+that call `agent.receive(msg)`. `route_message` enqueues by
+`msg['receiver']` and returns immediately, so a report fans out across
+Receiver -> Triage -> Coordinator -> Resource workers instead of running
+as one recursive call chain.
+
+The Resource queue is ordered by incident severity (see scheduler.py),
+so high and medium resource requests overtake a backlog instead of
+waiting behind it; the other queues are FIFO.
+
+With a `log` (MESSAGE_LOG_PATH for the shared router) every message a
+queue accepts is also appended to a MessageLog, which `python -m src.replay`
+plays back.
+
+Backpressure: producers outside the bus block while the target queue is
+full. Agent workers (which route follow-up messages from inside
+`receive`) wait at most HOP_TIMEOUT_S and then enqueue anyway, counted as
+an overflow, so a cycle between two full queues cannot deadlock.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from . import metrics
+from .message_log import get_message_log
+from .scheduler import SeverityScheduler
+
+QUEUE_SIZE = int(os.getenv('ROUTER_QUEUE_SIZE', '1000'))
+HOP_TIMEOUT_S = float(os.getenv('ROUTER_HOP_TIMEOUT_S', '0.5'))
+# per-agent worker threads, e.g. "triage=4,resource=2"
+CONCURRENCY = os.getenv('ROUTER_CONCURRENCY', '')
+
+_worker_state = threading.local()
+
+
+class RouterError(Exception):
+    pass
+
+
+class QueueFull(RouterError):
+    pass
+
+
+def _parse_concurrency(spec):
+    out = {}
+    for part in spec.split(','):
+        name, _, n = part.partition('=')
+        if name.strip() and n.strip().isdigit():
+            out[name.strip()] = int(n)
+    return out
+
+
+class AgentQueue:
+    """
+    Bounded queue with task accounting and queue-time statistics; FIFO
+    unless a SeverityScheduler orders it.
+    """
+
+    def __init__(self, name, maxsize=QUEUE_SIZE, scheduler=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.scheduler = scheduler
+        self._items = deque() if scheduler is None else scheduler
+        self._cond = threading.Condition()
+        self.unfinished = 0
+        self.enqueued = 0
+        self.processed = 0
+        self.overflows = 0
+        self.rejected = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_samples = deque(maxlen=10000)
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, msg, block=True, timeout=None, force_after_timeout=False, on_enqueue=None):
+        """
+        Enqueue `msg`, raising QueueFull when it is rejected. `on_enqueue(msg)`
+        runs once the message is accepted, before any worker can see it.
+        """
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if not block:
+                    self.rejected += 1
+                    raise QueueFull(self.name)
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while len(self._items) >= self.maxsize:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        if not force_after_timeout:
+                            self.rejected += 1
+                            raise QueueFull(self.name)
+                        self.overflows += 1
+                        break
+                    self._cond.wait(remaining)
+            if on_enqueue is not None:
+                on_enqueue(msg)
+            self._items.append((time.perf_counter(), msg))
+            self.unfinished += 1
+            self.enqueued += 1
+            self._cond.notify_all()
+
+    def get(self, stop):
+        with self._cond:
+            while not self._items:
+                if stop.is_set():
+                    return None
+                self._cond.wait(0.1)
+            enqueued_at, msg = self._items.popleft()
+            waited = time.perf_counter() - enqueued_at
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.wait_samples.append(waited)
+            self._cond.notify_all()
+            return msg
+
+    def task_done(self, error=False):
+        with self._cond:
+            self.unfinished -= 1
+            self.processed += 1
+            if error:
+                self.errors += 1
+            self._cond.notify_all()
+
+    def wait_idle(self, deadline):
+        with self._cond:
+            while self.unfinished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+            return True
+
+    def stats(self):
+        samples = sorted(self.wait_samples)
+
+        def pct(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p / 100.0 * len(samples)))]
+
+        return {
+            'depth': len(self._items),
+            'maxsize': self.maxsize,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'errors': self.errors,
+            'overflows': self.overflows,
+            'rejected': self.rejected,
+            'wait_avg_ms': round(self.wait_total / self.processed * 1000, 3) if self.processed else 0.0,
+            'wait_p50_ms': round(pct(50) * 1000, 3),
+            'wait_p99_ms': round(pct(99) * 1000, 3),
+            'wait_max_ms': round(self.wait_max * 1000, 3),
+            'by_severity': self.scheduler.stats() if self.scheduler is not None else {},
+        }
+
+
+class MessageRouter:
+
+    def __init__(self, queue_size=QUEUE_SIZE, hop_timeout=HOP_TIMEOUT_S, concurrency=None, log=None):
+        self.queue_size = queue_size
+        self.hop_timeout = hop_timeout
+        # anything with append(msg, at), e.g. a MessageLog
+        self.log = log
+        self.concurrency = dict(_parse_concurrency(CONCURRENCY))
+        self.concurrency.update(concurrency or {})
+        self._agents = {}
+        self._queues = {}
+        self._threads = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def register(self, agent, concurrency=None, queue_size=None, scheduler=None):
+        name = agent.name
+        with self._lock:
+            self._agents[name] = agent
+            self._queues[name] = AgentQueue(name, queue_size or self.queue_size, scheduler)
+            n = concurrency or self.concurrency.get(name, 1)
+            self.concurrency[name] = n
+            if self._running:
+                self._spawn(name, n)
+        return agent
+
+    def _spawn(self, name, n):
+        threads = self._threads.setdefault(name, [])
+        for _ in range(n):
+            t = threading.Thread(target=self._work, args=(name,),
+                                 name=f'agent-{name}-{len(threads)}', daemon=True)
+            threads.append(t)
+            t.start()
+
+    def start(self):
+        with self._lock:
+            self._stop.clear()
+            self._running = True
+            for name in self._agents:
+                if not self._threads.get(name):
+                    self._spawn(name, self.concurrency.get(name, 1))
+        return self
+
+    def stop(self, drain=True, timeout=None):
+        if drain:
+            self.join(timeout)
+        self._stop.set()
+        with self._lock:
+            self._running = False
+            threads = [t for ts in self._threads.values() for t in ts]
+            self._threads = {}
+        for t in threads:
+            t.join(timeout)
+
+    def _work(self, name):
+        queue = self._queues[name]
+        agent = self._agents[name]
+        _worker_state.agent = name
+        while True:
+            msg = queue.get(self._stop)
+            if msg is None:
+                return
+            failed = False
+            try:
+                with metrics.timer(name, metrics.AGENT_SECONDS):
+                    agent.receive(msg)
+            except Exception as exc:
+                failed = True
+                print(f"Router: {name} failed on {msg.get('kind')} {msg.get('id')}: {exc}")
+            finally:
+                queue.task_done(error=failed)
+
+    def route_message(self, msg, block=True, timeout=None):
+        receiver = msg.get('receiver')
+        queue = self._queues.get(receiver)
+        if queue is None:
+            raise RouterError(f"no agent registered as {receiver!r}")
+        # logged only once accepted, and before the next stage can mutate
+        # the payload; messages rejected with QueueFull are never logged
+        log = self.log.append if self.log is not None else None
+        if getattr(_worker_state, 'agent', None):
+            queue.put(msg, timeout=self.hop_timeout, force_after_timeout=True, on_enqueue=log)
+        else:
+            queue.put(msg, block=block, timeout=timeout, on_enqueue=log)
+        return msg
+
+    def join(self, timeout=None):
+        """Wait until every queue is empty and no message is in flight."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # messages spawn follow-ups, so repeat until a full pass finds every
+        # queue idle and nothing new was enqueued meanwhile
+        while True:
+            queues = list(self._queues.values())
+            before = sum(q.enqueued for q in queues)
+            for queue in queues:
+                if not queue.wait_idle(deadline):
+                    return False
+            if sum(q.enqueued for q in queues) == before:
+                return True
+
+    def stats(self):
+        return {name: dict(q.stats(), workers=self.concurrency.get(name, 1))
+                for name, q in self._queues.items()}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def build_default_router(**kwargs):
+    """Router with the four pipeline agents registered and running."""
+    # lazy imports: the agents import this module lazily as well
+    from .agents.coordinator import CoordinatorAgent
+    from .agents.receiver import ReceiverAgent
+    from .agents.resource import ResourceAgent
+    from .agents.triage import TriageAgent
+
+    kwargs.setdefault('log', get_message_log())
+    router = MessageRouter(**kwargs)
+    for agent in (ReceiverAgent(), TriageAgent(), CoordinatorAgent()):
+        router.register(agent)
+    router.register(ResourceAgent(), scheduler=SeverityScheduler('resource'))
+    return router.start()
+
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = build_default_router()
+    return _router
+
+
+def set_router(router):
+    global _router
+    _router = router
+
+
+def router_stats():
+    """Queue stats of the shared router, or {} when it was never started."""
+    return _router.stats() if _router is not None else {}
+
+
+def route_message(msg, block=True, timeout=None):
+    return get_router().route_message(msg, block=block, timeout=timeout)
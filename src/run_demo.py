@@ -12,7 +12,7 @@ if __package__ is None or __package__ == "":
     __package__ = "src"
 
 from .agents.triage import TriageAgent
-from .tools.resource_db import find_nearby
+from .tools.allocator import get_engine
 from .memory.memory_bank import save_incident
 from .utils import now_iso
 
@@ -41,7 +41,7 @@ def main():
 
     # resources (if needed)
     if sev in ('high', 'medium'):
-        nearby = find_nearby(inc['lat'], inc['lon'], radius_km=50, limit=5)
+        nearby = get_engine().allocate(inc)
         allocation = {}
         for r in nearby:
             allocation.setdefault(r['type'], []).append(r['id'])
@@ -0,0 +1,331 @@
+# Capacity-aware allocation of resources to incidents.
+#
+# Each incident asks for a number of resources per type depending on its
+# severity. Candidates come from the resource_db spatial index (available
+# resources only) and are assigned with a global greedy pass: every
+# (incident, resource) pair is scored by distance weighted by severity and
+# pushed on one heap, so the cheapest assignments across all pending
+# incidents are made first and a resource's capacity is never exceeded.
+# A resource with capacity for several units can fill several of one
+# incident's units. Resources are held until the incident is released
+# (closed), or for at most HOLD_S.
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from .. import metrics
+from . import resource_db
+
+# resources requested per incident, by severity
+DEFAULT_DEMAND = {
+    'high': {'volunteer': 2, 'shelter': 1, 'medical_kit': 1},
+    'medium': {'volunteer': 1, 'medical_kit': 1},
+    'low': {},
+}
+
+# distance multiplier: a high incident 100 km away ranks with a medium one
+# 50 km away
+SEVERITY_WEIGHT = {'high': 1.0, 'medium': 2.0, 'low': 4.0}
+
+# candidates fetched per requested unit on the first lookup; doubled when a
+# type runs dry because nearer resources were taken by other incidents.
+# Past WIDEN_SCAN_AFTER the rest of the radius is fetched in one scan: in an
+# exhausted hotspot, repeated nearest() calls would each rescan the inner
+# cells
+CANDIDATES_PER_UNIT = 4
+WIDEN_SCAN_AFTER = 64
+MAX_CANDIDATES = 4096
+# incidents never closed give their resources back after this long, and
+# unmet ones stop waiting for more
+HOLD_S = float(os.getenv('ALLOCATION_HOLD_S', str(6 * 3600)))
+EXPIRE_EVERY_S = 60.0
+
+
+class AllocationEngine:
+
+    def __init__(self, demand=None, radius_km=120, hold_s=HOLD_S):
+        self.demand = demand or DEFAULT_DEMAND
+        self.radius_km = radius_km
+        self.hold_s = hold_s
+        self._lock = threading.RLock()
+        self._seq = itertools.count()
+        self._remaining = {}     # resource id -> free capacity
+        self._assigned = {}      # incident id -> [resource dict, ...] (one per unit)
+        self._since = {}         # incident id -> time.time() it was added
+        self._needs = {}         # incident id -> {type: units still needed}
+        self._incidents = {}     # incident id -> incident dict (unmet only)
+        self._fetched = {}       # incident id -> candidate count fetched
+        self._pushed = {}        # incident id -> resource ids already queued
+        self._short = {}         # incident id -> pool state it came up short in
+        self._freed = 0          # bumped whenever capacity is returned
+        self._expired_at = 0.0
+
+    def _capacity(self, r):
+        rid = r.get('id')
+        if rid not in self._remaining:
+            try:
+                self._remaining[rid] = int(r.get('capacity', 1))
+            except (TypeError, ValueError):
+                self._remaining[rid] = 1
+        return self._remaining[rid]
+
+    def _push_candidates(self, iid, heap):
+        """Queue more candidate resources for `iid`. False when exhausted."""
+        inc = self._incidents[iid]
+        try:
+            lat, lon = float(inc.get('lat')), float(inc.get('lon'))
+        except (TypeError, ValueError):
+            return False
+        units = sum(self._needs[iid].values())
+        prev = self._fetched.get(iid, 0)
+        k = max(units * CANDIDATES_PER_UNIT, prev * 2)
+        if prev >= MAX_CANDIDATES or k <= prev:
+            return False
+        k = MAX_CANDIDATES if k > WIDEN_SCAN_AFTER else k
+        self._fetched[iid] = k
+        weight = SEVERITY_WEIGHT.get(inc.get('severity'), SEVERITY_WEIGHT['low'])
+        pushed = self._pushed.setdefault(iid, set())
+        index = resource_db.get_index()
+        with metrics.timer('find_nearby'):
+            if k == MAX_CANDIDATES:
+                hits = heapq.nsmallest(k, index.within(lat, lon, self.radius_km, available_only=True),
+                                       key=lambda hit: hit[0])
+            else:
+                hits = index.nearest(lat, lon, k=k, radius_km=self.radius_km, available_only=True)
+        for d, r in hits:
+            rid = r.get('id')
+            if rid in pushed or self._needs[iid].get(r.get('type'), 0) <= 0:
+                continue
+            pushed.add(rid)
+            heapq.heappush(heap, (d * weight, next(self._seq), iid, rid, r))
+        # fewer hits than asked for means the radius is exhausted
+        return len(hits) >= k
+
+    def _solve(self, iids):
+        heap = []
+        more = set()
+        for iid in iids:
+            if self._push_candidates(iid, heap):
+                more.add(iid)
+        while heap:
+            cost, _, iid, rid, r = heapq.heappop(heap)
+            needs = self._needs.get(iid)
+            if not needs:
+                continue
+            rtype = r.get('type')
+            if needs.get(rtype, 0) <= 0:
+                continue
+            if self._capacity(r) <= 0:
+                # taken by a cheaper assignment; widen this incident's search
+                if iid in more and not self._push_candidates(iid, heap):
+                    more.discard(iid)
+                continue
+            self._remaining[rid] -= 1
+            self._assigned.setdefault(iid, []).append(r)
+            needs[rtype] -= 1
+            if needs[rtype] <= 0:
+                del needs[rtype]
+            elif self._remaining[rid] > 0:
+                # the same resource can fill another unit at the same cost
+                heapq.heappush(heap, (cost, next(self._seq), iid, rid, r))
+            if not needs:
+                self._done(iid)
+        for iid in iids:
+            if iid in self._incidents:
+                # keep unmet incidents around for retry, but start fresh
+                self._fetched.pop(iid, None)
+                self._pushed.pop(iid, None)
+                self._short[iid] = self._pool_state(self._incidents[iid])
+
+    def _pool_state(self, inc):
+        """
+        What an unmet incident's last search depended on: the inventory
+        version, capacity returned since, and its own coordinates (filled in
+        late by deferred geocoding). While it is unchanged, a retry would
+        find exactly the same full resources again.
+        """
+        snap = resource_db.get_index()
+        return (snap.store, snap.version, self._freed, inc.get('lat'), inc.get('lon'))
+
+    def _done(self, iid):
+        self._needs.pop(iid, None)
+        self._incidents.pop(iid, None)
+        self._fetched.pop(iid, None)
+        self._pushed.pop(iid, None)
+        self._short.pop(iid, None)
+
+    def _demand(self, inc):
+        return {t: n for t, n in self.demand.get(inc.get('severity'), {}).items() if n > 0}
+
+    def _add(self, inc):
+        iid = inc.get('id')
+        if iid in self._assigned or iid in self._incidents:
+            return None
+        needs = self._demand(inc)
+        if needs:
+            # incidents needing nothing (low) leave no state behind
+            self._assigned[iid] = []
+            self._since[iid] = time.time()
+            self._needs[iid] = needs
+            self._incidents[iid] = inc
+        return iid
+
+    def allocate(self, inc):
+        """
+        Assign resources to one new incident against the capacity left by
+        earlier assignments. Returns the list of assigned resource dicts.
+        """
+        with self._lock:
+            self._maybe_expire()
+            iid = self._add(inc)
+            if iid in self._incidents:
+                self._solve([iid])
+            return list(self._assigned.get(inc.get('id'), []))
+
+    def allocate_many(self, incidents):
+        """
+        Run one global assignment across `incidents`, so nearby high
+        severity incidents are served before lower ones compete for the
+        same resources. Returns {incident id: [resource dict, ...]}.
+        """
+        with self._lock:
+            self._maybe_expire()
+            iids = [self._add(inc) for inc in incidents]
+            self._solve([i for i in iids if i in self._incidents])
+            return {inc.get('id'): list(self._assigned.get(inc.get('id'), []))
+                    for inc in incidents}
+
+    def release(self, incident_id, retry=True):
+        """
+        Return an incident's resources to the pool (e.g. when it is closed)
+        and retry incidents that are still short of resources.
+        """
+        with self._lock:
+            freed = self._release(incident_id)
+            if retry and freed:
+                self.retry_unmet()
+            return freed
+
+    def _release(self, incident_id):
+        freed = self._assigned.pop(incident_id, [])
+        self._since.pop(incident_id, None)
+        for r in freed:
+            self._remaining[r.get('id')] = self._remaining.get(r.get('id'), 0) + 1
+        self._done(incident_id)
+        if freed:
+            self._freed += 1
+        return freed
+
+    def expire(self, now=None):
+        """
+        Release every incident held longer than `hold_s` (closed or not).
+        Returns the released incident ids.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expired_at = now
+            old = [iid for iid, since in self._since.items() if now - since > self.hold_s]
+            for iid in old:
+                self._release(iid)
+            return old
+
+    def _maybe_expire(self):
+        now = time.time()
+        if now - self._expired_at >= EXPIRE_EVERY_S:
+            self.expire(now)
+
+    def restore(self, incidents):
+        """
+        Re-hold the resources in persisted allocations after a restart, so
+        they are not assigned a second time. Each incident is a dict with
+        'id', 'severity', 'lat', 'lon' and 'allocation' ({type: [resource
+        dict or id, ...]}, one entry per unit); what its demand still
+        lacks is queued like an unmet incident. Returns the count restored.
+        """
+        with self._lock:
+            index = resource_db.get_index()
+            restored = 0
+            for inc in incidents:
+                iid = inc.get('id')
+                if iid in self._assigned or iid in self._incidents:
+                    continue
+                needs = self._demand(inc)
+                if not needs:
+                    continue
+                held = []
+                for entries in (inc.get('allocation') or {}).values():
+                    for entry in entries:
+                        r = index.get(entry.get('id') if isinstance(entry, dict) else entry)
+                        if r is None:
+                            continue
+                        self._capacity(r)
+                        self._remaining[r.get('id')] -= 1
+                        held.append(r)
+                        if needs.get(r.get('type'), 0) > 0:
+                            needs[r.get('type')] -= 1
+                needs = {t: n for t, n in needs.items() if n > 0}
+                self._assigned[iid] = held
+                self._since[iid] = time.time()
+                if needs:
+                    self._needs[iid] = needs
+                    self._incidents[iid] = inc
+                restored += 1
+            return restored
+
+    def assigned(self, incident_id):
+        with self._lock:
+            return list(self._assigned.get(incident_id, []))
+
+    def unmet(self):
+        """Return {incident id: {type: units}} still waiting for resources."""
+        with self._lock:
+            return {iid: dict(n) for iid, n in self._needs.items()}
+
+    def remaining(self, resource_id):
+        with self._lock:
+            r = resource_db.get_index().get(resource_id)
+            if r is None:
+                return self._remaining.get(resource_id, 0)
+            return self._capacity(r)
+
+    def retry_unmet(self):
+        """
+        Re-run assignment for incidents still short of resources, skipping
+        those whose pool has not changed since they came up short: in an
+        exhausted hotspot every one of them would repeat a search out to
+        the full radius only to find the same full resources. Returns
+        {incident id: [resource dict, ...]} for the incidents that gained
+        resources, so the caller can persist them.
+        """
+        with self._lock:
+            self._maybe_expire()
+            iids = [iid for iid, inc in self._incidents.items()
+                    if self._short.get(iid) != self._pool_state(inc)]
+            if not iids:
+                return {}
+            before = {iid: len(self._assigned.get(iid, ())) for iid in iids}
+            self._solve(iids)
+            return {iid: list(self._assigned.get(iid, [])) for iid in iids
+                    if len(self._assigned.get(iid, ())) > before[iid]}
+
+    def reset(self):
+        with self._lock:
+            for state in (self._remaining, self._assigned, self._since, self._needs,
+                          self._incidents, self._fetched, self._pushed, self._short):
+                state.clear()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Shared engine so the web app and the agent pipeline see one pool."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AllocationEngine()
+    return _engine
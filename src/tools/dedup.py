@@ -0,0 +1,450 @@
+# Near-duplicate report detection.
+#
+# Each report gets a MinHash signature of its word set. Two reports belong to
+# the same incident cluster when the Jaccard similarity of their word sets is
+# at least DEDUP_MIN_SIMILARITY, they arrived within DEDUP_WINDOW_S of the
+# cluster's latest report and they are within DEDUP_RADIUS_KM (or name the
+# same place while coordinates are still unknown). A report triaged more
+# severe than the cluster's head never merges into it: it starts its own
+# incident, so it is allocated for at its own severity.
+#
+# The signatures only find candidates; each candidate is then checked
+# against the exact similarity of the head's word hashes, since 16 MinHash
+# values estimate it with a standard error of about 0.12.
+#
+# Signatures are cut into LSH_BANDS bands of two values; reports that are
+# similar almost always share a band. Band keys are scoped to a grid cell
+# twice as wide as the merge radius, so words every report uses don't pile all
+# clusters into one bucket. Candidates come from a (band, cell) hash map in
+# memory (warmed from seen_items on first use) and from the per-band partial
+# indexes on seen_items once clusters have been dropped from memory.
+import hashlib
+import math
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python signatures are ~8x slower
+    np = None
+
+from ..memory.memory_bank import (LSH_BANDS, find_fingerprints, iter_fingerprint_bands,
+                                  load_fingerprints, save_fingerprint)
+from ..utils import epoch
+from .geocode_cache import normalize_place
+from .spatial_index import KM_PER_DEG_LAT, haversine_km
+
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', '1') not in ('0', 'false', 'no')
+WINDOW_S = float(os.getenv('DEDUP_WINDOW_S', str(6 * 3600)))
+RADIUS_KM = float(os.getenv('DEDUP_RADIUS_KM', '2.0'))
+MIN_SIMILARITY = float(os.getenv('DEDUP_MIN_SIMILARITY', '0.4'))
+# clusters kept in the in-memory tier
+MEMORY_CLUSTERS = int(os.getenv('DEDUP_MEMORY_CLUSTERS', '50000'))
+# reports with fewer distinct words only merge with an identical word set
+MIN_TOKENS = 4
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+# newest clusters kept per LSH bucket; buckets this full come from words
+# every report shares and carry little signal
+BUCKET_SIZE = 64
+# size of the filter that lets most misses skip seen_items (2**26 bits = 8 MB)
+FILTER_BITS = 1 << 26
+
+ROWS_PER_BAND = 2
+NUM_HASHES = LSH_BANDS * ROWS_PER_BAND
+_MASK64 = (1 << 64) - 1
+# fixed multiply-add permutations (mod 2**64, odd multipliers) so signatures
+# stay comparable across processes and restarts
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(b'a%d' % i, digest_size=8).digest(), 'big') | 1,
+     int.from_bytes(hashlib.blake2b(b'b%d' % i, digest_size=8).digest(), 'big'))
+    for i in range(NUM_HASHES)
+]
+if np is not None:
+    _PERM_A = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _PERM_B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_SIGNATURE = struct.Struct('>%dQ' % NUM_HASHES)
+_TOKEN = re.compile(r'\w+')
+
+
+def _tokens(text):
+    return set(_TOKEN.findall((text or '').casefold()))
+
+
+def _hashes(tokens):
+    return [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'big')
+            for t in tokens]
+
+
+def minhash(tokens):
+    """MinHash signature (NUM_HASHES values) of a set of words."""
+    return _minhash(_hashes(tokens))
+
+
+def _minhash(hashes):
+    if not hashes:
+        return (0,) * NUM_HASHES
+    if np is not None:
+        # uint64 arithmetic wraps, which is exactly the mod 2**64 we want
+        h = np.array(hashes, dtype=np.uint64)[None, :]
+        return tuple((_PERM_A * h + _PERM_B).min(axis=1).tolist())
+    return tuple(min((a * h + b) & _MASK64 for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the word sets behind two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_HASHES
+
+
+def pack_hashes(hashes):
+    """Word hashes as the BLOB stored with a cluster head."""
+    return struct.pack('>%dQ' % len(hashes), *hashes)
+
+
+def jaccard(packed, hashes):
+    """Jaccard similarity of packed word hashes and a set of word hashes."""
+    other = set(struct.unpack('>%dQ' % (len(packed) // 8), packed))
+    union = len(other | hashes)
+    return len(other & hashes) / union if union else 1.0
+
+
+def _outranks(severity, other):
+    """True when `severity` is more severe than `other` (unknown never is)."""
+    if severity is None or other is None:
+        return False
+    return SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(other, 0)
+
+
+def bands(signature):
+    """One LSH bucket key per band, small enough for a SQLite INTEGER."""
+    return [(signature[i] * 0x9E3779B97F4A7C15 + signature[i + 1] * 0xC2B2AE3D27D4EB4F + i)
+            & 0x7FFFFFFFFFFFFFFF
+            for i in range(0, NUM_HASHES, ROWS_PER_BAND)]
+
+
+def _cell_band(key, cell):
+    """Band key scoped to a grid cell, as stored in seen_items."""
+    if cell is None:
+        return key
+    return (key ^ (cell[0] * 0x2545F4914F6CDD1D + cell[1] * 0x5851F42D4C957F2D)) & 0x7FFFFFFFFFFFFFFF
+
+
+def _iso(ts):
+    return datetime.utcfromtimestamp(ts).isoformat() + 'Z'
+
+
+class BandFilter:
+    """
+    Bloom filter over the band values written to seen_items. A value that
+    is not in the filter cannot match any stored cluster head, so a lookup
+    whose bands all miss never touches SQLite. Two generations rotate every
+    `window_s`, which keeps every value from the last window and bounds
+    memory at 2 * bits / 8 bytes.
+    """
+
+    HASHES = 3
+
+    def __init__(self, window_s, bits=FILTER_BITS):
+        self.window_s = window_s
+        self.bits = bits
+        self._shift = 64 - (bits.bit_length() - 1)
+        self._current = bytearray(bits // 8)
+        self._previous = bytearray(bits // 8)
+        self._rotated_at = None
+
+    def _positions(self, value):
+        return [((value * mult) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+                for mult in (0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9, 0x94D049BB133111EB)]
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self._current[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        positions = self._positions(value)
+        for bits in (self._current, self._previous):
+            if all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+                return True
+        return False
+
+    def maybe_rotate(self, now):
+        if self._rotated_at is None:
+            self._rotated_at = now
+        elif now - self._rotated_at >= self.window_s:
+            self._previous = self._current
+            self._current = bytearray(self.bits // 8)
+            self._rotated_at = now
+
+
+class Cluster:
+    __slots__ = ('incident_id', 'signature', 'bands', 'lat', 'lon', 'cell', 'place_key',
+                 'seen_ts', 'reports', 'severity', 'tokens')
+
+    def __init__(self, incident_id, signature, lat, lon, place_key, seen_ts, reports=1,
+                 severity=None, tokens=None):
+        self.incident_id = incident_id
+        self.signature = signature
+        self.bands = bands(signature)
+        self.lat = lat
+        self.lon = lon
+        self.cell = None
+        self.place_key = place_key
+        self.seen_ts = seen_ts
+        self.reports = reports
+        self.severity = severity
+        # packed word hashes of the head (None for fingerprints saved before
+        # they were kept, which fall back to the signature estimate)
+        self.tokens = tokens
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['incident_id'], _SIGNATURE.unpack(row['signature']), row['lat'],
+                   row['lon'], row['place_key'], epoch(row['seen_at']), row['reports'] or 1,
+                   row.get('severity'), row.get('tokens'))
+
+
+class Deduplicator:
+    """
+    In memory, clusters are bucketed by (LSH band, grid cell), so a lookup
+    only scans clusters that share a band *and* sit in a cell overlapping
+    the merge radius. Clusters without coordinates
+    live in cell None, which every lookup also scans.
+    """
+
+    def __init__(self, window_s=WINDOW_S, radius_km=RADIUS_KM, min_similarity=MIN_SIMILARITY,
+                 max_clusters=MEMORY_CLUSTERS, enabled=DEDUP_ENABLED):
+        self.window_s = window_s
+        self.radius_km = radius_km
+        self.min_similarity = min_similarity
+        self.max_clusters = max_clusters
+        self.enabled = enabled
+        # twice the radius, so the merge circle overlaps at most 2x2 cells
+        # away from the poles
+        self.cell_deg = max(2 * radius_km / KM_PER_DEG_LAT, 0.001)
+        self._clusters = OrderedDict()   # incident_id -> Cluster, oldest first
+        self._buckets = {}               # (band key, cell) -> {incident id: None}, oldest first
+        self._band_cells = {}            # band key -> cells holding a bucket for it
+        self._lock = threading.Lock()
+        self._warm = False
+        # newest seen_ts of any cluster dropped for capacity; while that is
+        # inside the window, misses also consult seen_items
+        self._dropped_ts = None
+        self._filter = BandFilter(window_s)
+        self.stats = {'checked': 0, 'merged': 0, 'db_lookups': 0, 'db_hits': 0, 'db_skipped': 0}
+
+    def _cell(self, lat, lon):
+        if lat is None or lon is None:
+            return None
+        return (int(lat // self.cell_deg), int(lon // self.cell_deg))
+
+    def _near_cells(self, lat, lon):
+        """Cells overlapping the merge circle around (lat, lon), plus None."""
+        if lat is None or lon is None:
+            return None
+        dlat = self.radius_km / KM_PER_DEG_LAT
+        # longitude degrees shrink towards the poles
+        dlon = dlat / max(math.cos(math.radians(lat)), 0.05)
+        near = {(y, x)
+                for y in range(int((lat - dlat) // self.cell_deg), int((lat + dlat) // self.cell_deg) + 1)
+                for x in range(int((lon - dlon) // self.cell_deg), int((lon + dlon) // self.cell_deg) + 1)}
+        near.add(None)
+        return near
+
+    def _same_place(self, cluster, lat, lon, place_key):
+        if None not in (lat, lon, cluster.lat, cluster.lon):
+            # a degree of latitude is ~111 km; skip haversine for far points
+            if abs(lat - cluster.lat) * KM_PER_DEG_LAT > self.radius_km:
+                return False
+            return haversine_km(lat, lon, cluster.lat, cluster.lon) <= self.radius_km
+        if place_key and cluster.place_key:
+            return place_key == cluster.place_key
+        # nothing to compare against yet; the text match has to carry it
+        return True
+
+    def _matches(self, cluster, report, lat, lon, place_key, now):
+        signature, hashes, min_similarity, severity = report
+        if now - cluster.seen_ts > self.window_s:
+            return False
+        if _outranks(severity, cluster.severity):
+            return False
+        if not self._same_place(cluster, lat, lon, place_key):
+            return False
+        if cluster.tokens is None:
+            return similarity(cluster.signature, signature) >= min_similarity
+        return jaccard(cluster.tokens, hashes) >= min_similarity
+
+    def _remember(self, cluster):
+        cell = self._cell(cluster.lat, cluster.lon)
+        if cluster.incident_id in self._clusters:
+            if cell == cluster.cell:
+                self._clusters.move_to_end(cluster.incident_id)
+                return
+            self._forget(cluster.incident_id)
+        cluster.cell = cell
+        self._clusters[cluster.incident_id] = cluster
+        for key in cluster.bands:
+            bucket = self._buckets.setdefault((key, cluster.cell), {})
+            self._band_cells.setdefault(key, set()).add(cluster.cell)
+            bucket[cluster.incident_id] = None
+            if len(bucket) > BUCKET_SIZE:
+                del bucket[next(iter(bucket))]
+        while len(self._clusters) > self.max_clusters:
+            dropped = self._forget(next(iter(self._clusters)))
+            self._dropped_ts = max(self._dropped_ts or 0.0, dropped.seen_ts)
+
+    def _forget(self, incident_id):
+        cluster = self._clusters.pop(incident_id, None)
+        if cluster is None:
+            return None
+        for key in cluster.bands:
+            bucket = self._buckets.get((key, cluster.cell))
+            if bucket is None:
+                continue
+            bucket.pop(incident_id, None)
+            if not bucket:
+                del self._buckets[(key, cluster.cell)]
+                cells = self._band_cells[key]
+                cells.discard(cluster.cell)
+                if not cells:
+                    del self._band_cells[key]
+        return cluster
+
+    def _expire(self, now):
+        while self._clusters:
+            oldest = next(iter(self._clusters.values()))
+            if now - oldest.seen_ts <= self.window_s:
+                break
+            self._forget(oldest.incident_id)
+
+    def _warm_up(self, now):
+        """Load recent clusters from seen_items, e.g. after a restart."""
+        self._warm = True
+        since = _iso(now - self.window_s)
+        for values in iter_fingerprint_bands(since):
+            for value in values:
+                self._filter.add(value)
+        self._filter.maybe_rotate(now)
+        rows = load_fingerprints(since, self.max_clusters)
+        for row in reversed(rows):
+            self._remember(Cluster.from_row(row))
+        if len(rows) >= self.max_clusters:
+            self._dropped_ts = Cluster.from_row(rows[-1]).seen_ts
+
+    def _find(self, report, lat, lon, place_key, now):
+        keys = bands(report[0])
+        near = self._near_cells(lat, lon)
+        checked = set()
+        for key in keys:
+            cells = self._band_cells.get(key)
+            if not cells:
+                continue
+            for cell in (cells if near is None else cells & near):
+                for incident_id in self._buckets[(key, cell)]:
+                    if incident_id in checked:
+                        continue
+                    checked.add(incident_id)
+                    cluster = self._clusters[incident_id]
+                    if self._matches(cluster, report, lat, lon, place_key, now):
+                        return cluster
+        if self._dropped_ts is None or now - self._dropped_ts > self.window_s:
+            return None
+        # some clusters still inside the window only exist in seen_items
+        cells = near or [None]
+        probes = [[v for v in (_cell_band(key, cell) for cell in cells) if v in self._filter]
+                  for key in keys]
+        if not any(probes):
+            self.stats['db_skipped'] += 1
+            return None
+        self.stats['db_lookups'] += 1
+        for row in find_fingerprints(probes, _iso(now - self.window_s), limit=BUCKET_SIZE):
+            if row['incident_id'] in checked:
+                continue
+            cluster = self._clusters.get(row['incident_id']) or Cluster.from_row(row)
+            if self._matches(cluster, report, lat, lon, place_key, now):
+                self.stats['db_hits'] += 1
+                return cluster
+        return None
+
+    def observe(self, report_id, text, lat=None, lon=None, place_text=None, now=None, severity=None):
+        """
+        Fingerprint a report and either merge it into a recent cluster or
+        start a new one headed by `report_id`. `severity` is the report's
+        triage level; it is not merged into a less severe cluster. Returns
+        (incident_id, reports): the cluster head and its report count after
+        this one.
+        """
+        if not self.enabled:
+            return report_id, 1
+        now = time.time() if now is None else now
+        hashes = _hashes(_tokens(text))
+        signature = _minhash(hashes)
+        min_similarity = self.min_similarity if len(hashes) >= MIN_TOKENS else 1.0
+        report = (signature, set(hashes), min_similarity, severity)
+        place_key = normalize_place(place_text) or None
+        with self._lock:
+            self.stats['checked'] += 1
+            if not self._warm:
+                self._warm_up(now)
+            self._expire(now)
+            self._filter.maybe_rotate(now)
+            cluster = self._find(report, lat, lon, place_key, now)
+            if cluster is None:
+                cluster = Cluster(report_id, signature, lat, lon, place_key, now,
+                                  severity=severity, tokens=pack_hashes(hashes))
+                self._remember(cluster)
+            else:
+                self.stats['merged'] += 1
+                cluster.reports += 1
+                cluster.seen_ts = now
+                if cluster.lat is None and lat is not None:
+                    cluster.lat, cluster.lon = lat, lon
+                # re-bucket: newest last, and possibly in a new cell
+                self._remember(cluster)
+                save_fingerprint(f'report:{report_id}', cluster.incident_id,
+                                 _SIGNATURE.pack(*signature), lat=lat, lon=lon,
+                                 place_key=place_key, seen_at=_iso(now))
+            self._save(cluster)
+            return cluster.incident_id, cluster.reports
+
+    def _save(self, cluster):
+        values = [_cell_band(key, cluster.cell) for key in cluster.bands]
+        for value in values:
+            self._filter.add(value)
+        save_fingerprint(f'report:{cluster.incident_id}', cluster.incident_id,
+                         _SIGNATURE.pack(*cluster.signature), bands=values,
+                         lat=cluster.lat, lon=cluster.lon, place_key=cluster.place_key,
+                         reports=cluster.reports, seen_at=_iso(cluster.seen_ts),
+                         severity=cluster.severity, tokens=cluster.tokens)
+
+    def locate(self, incident_id, lat, lon):
+        """Attach coordinates that arrived after the report was clustered."""
+        with self._lock:
+            cluster = self._clusters.get(incident_id)
+            if cluster is not None and cluster.lat is None:
+                cluster.lat, cluster.lon = lat, lon
+                self._remember(cluster)
+                self._save(cluster)
+
+    def reset(self):
+        with self._lock:
+            self._clusters.clear()
+            self._buckets.clear()
+            self._band_cells.clear()
+            self._dropped_ts = None
+
+
+_dedup = None
+_dedup_lock = threading.Lock()
+
+
+def get_deduplicator():
+    global _dedup
+    if _dedup is None:
+        with _dedup_lock:
+            if _dedup is None:
+                _dedup = Deduplicator()
+    return _dedup
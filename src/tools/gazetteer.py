@@ -0,0 +1,469 @@
+"""
+Offline gazetteer geocoder.
+
+A GeoNames-style TSV (or a plain "name<TAB>lat<TAB>lon[<TAB>population]"
+list) is compiled once into a single index file that every worker maps
+read-only with mmap, so they share one copy through the page cache and
+opening it costs a header parse. The file holds, per normalized name
+(`normalize_place`), the coordinates and population plus three lookups:
+
+- exact: a sorted column of 64-bit name hashes, searched with bisect;
+- prefix: the names themselves, stored in sorted order (an implicit trie),
+  which resolves truncated names ("Ahmeda") too short for trigrams;
+- fuzzy: trigram posting lists in a dense table indexed by the 24-bit
+  trigram code, ranked by trigram similarity.
+
+Duplicate names ("springfield") resolve to the most populous place. Exact
+lookups take microseconds and run inline (`__call__`); the fuzzy scan
+takes milliseconds on a large index, so GeocodeService runs it
+(`fuzzy_geocode`) on its worker threads.
+
+    python -m src.tools.gazetteer allCountries.txt gazetteer.idx [--no-alternates]
+"""
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from .geocode_cache import normalize_place
+
+try:
+    import numpy as np
+except ImportError:  # building needs NumPy; lookups fall back to pure Python
+    np = None
+
+GAZETTEER_PATH = os.getenv('GAZETTEER_PATH')
+# seconds before a missing GAZETTEER_PATH is looked for again
+GAZETTEER_RECHECK_S = 60.0
+MAGIC = b'CRGAZ001'
+# names per chunk when building trigram postings (bounds peak memory)
+BUILD_CHUNK = 1_000_000
+# fuzzy() default (pg_trgm's), and the stricter bar before match() geocodes
+# free text from a fuzzy hit
+FUZZY_MIN_SIMILARITY = 0.3
+MATCH_MIN_SIMILARITY = float(os.getenv('GAZETTEER_MIN_SIMILARITY', '0.5'))
+# trigrams on more rows than this (or this share of the index) are too
+# common to tell names apart; past the FUZZY_MIN_GRAMS rarest, lists are
+# read until the row budget is spent. Both grow with the index: a fixed
+# budget covers ever fewer of a typo's surviving trigrams
+FUZZY_MAX_POSTINGS = 100_000
+FUZZY_MAX_POSTINGS_SHARE = 0.03
+FUZZY_MIN_GRAMS = 3
+FUZZY_POSTINGS_BUDGET = 20_000
+FUZZY_POSTINGS_BUDGET_SHARE = 0.02
+# candidates re-scored exactly after the vectorised estimate
+FUZZY_VERIFY = 64
+# rows of a prefix range ranked by population, and the sampling stride of
+# the in-memory name sample that keeps most bisect steps in C
+PREFIX_SCAN = 50_000
+PREFIX_STRIDE = 64
+_GRAMS = 1 << 24
+
+
+def _hash(key):
+    return (zlib.crc32(key) << 32) | zlib.adler32(key)
+
+
+def _grams(key):
+    padded = b' ' + key + b' '
+    return {(padded[i] << 16) | (padded[i + 1] << 8) | padded[i + 2]
+            for i in range(len(padded) - 2)}
+
+
+def _aligned(offset, align=8):
+    return (offset + align - 1) // align * align
+
+
+class GazetteerMatch:
+    __slots__ = ('name', 'lat', 'lon', 'population', 'score')
+
+    def __init__(self, name, lat, lon, population, score):
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.population = population
+        self.score = score
+
+    def __repr__(self):
+        return (f'GazetteerMatch({self.name!r}, {self.lat:.5f}, {self.lon:.5f}, '
+                f'population={self.population}, score={self.score:.2f})')
+
+
+def read_gazetteer(path, alternates=True):
+    """
+    Yield (name, lat, lon, population) rows. GeoNames dumps (19 columns)
+    contribute their name, ASCII name and, with `alternates`, alternate
+    names; shorter rows are read as name, lat, lon[, population].
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) >= 15:
+                names = {cols[1], cols[2]}
+                if alternates and cols[3]:
+                    names.update(cols[3].split(','))
+                lat, lon, pop = cols[4], cols[5], cols[14]
+            elif len(cols) >= 3:
+                names = (cols[0],)
+                lat, lon, pop = cols[1], cols[2], cols[3] if len(cols) > 3 else 0
+            else:
+                continue
+            try:
+                lat, lon = float(lat), float(lon)
+                pop = int(pop or 0)
+            except ValueError:
+                continue
+            for name in names:
+                if name:
+                    yield name, lat, lon, pop
+
+
+def _chunk_grams(blob, offsets, start, stop):
+    """Trigram codes and name rows for rows [start, stop), as NumPy arrays."""
+    lo, hi = int(offsets[start]), int(offsets[stop])
+    lengths = np.diff(offsets[start:stop + 1]).astype(np.int64)
+    rows = np.repeat(np.arange(start, stop, dtype=np.uint32), lengths)
+    # every name framed by one space on each side
+    shift = 2 * (rows.astype(np.int64) - start)
+    padded = np.full(hi - lo + 2 * (stop - start), 32, dtype=np.uint32)
+    padded[np.arange(hi - lo) + shift + 1] = blob[lo:hi]
+    pos = np.arange(hi - lo) + shift
+    codes = (padded[pos] << 16) | (padded[pos + 1] << 8) | padded[pos + 2]
+    return codes, rows
+
+
+def build(rows, path, chunk=BUILD_CHUNK):
+    """Compile (name, lat, lon, population) rows into an index file at `path`."""
+    if np is None:
+        raise RuntimeError("building a gazetteer index needs NumPy")
+    names, lat, lon, pop = [], array('f'), array('f'), array('I')
+    for name, rlat, rlon, rpop in rows:
+        key = normalize_place(name)
+        if not key:
+            continue
+        names.append(key.encode('utf-8'))
+        lat.append(rlat)
+        lon.append(rlon)
+        pop.append(max(0, min(rpop, 2 ** 32 - 1)))
+    n = len(names)
+
+    # rows sorted by name, most populous first among equal names
+    pop_np = np.frombuffer(pop, dtype=np.uint32)
+    by_pop = np.argsort(-pop_np.astype(np.int64), kind='stable')
+    keyed = np.empty(n, dtype=object)
+    keyed[:] = names
+    order = by_pop[np.argsort(keyed[by_pop], kind='stable')]
+    del keyed, by_pop
+    names = [names[i] for i in order]
+    lengths = np.fromiter((len(b) for b in names), dtype=np.uint64, count=n)
+    offsets = np.zeros(n + 1, dtype=np.uint64)
+    np.cumsum(lengths, out=offsets[1:])
+    blob = np.frombuffer(b''.join(names), dtype=np.uint8)
+    lat_col = np.frombuffer(lat, dtype=np.float32)[order]
+    lon_col = np.frombuffer(lon, dtype=np.float32)[order]
+    pop_col = pop_np[order]
+    hashes = np.fromiter((_hash(b) for b in names), dtype=np.uint64, count=n)
+    del names, lat, lon, pop, order
+    hash_rows = np.argsort(hashes, kind='stable').astype(np.uint32)
+    hashes = hashes[hash_rows]
+
+    # trigram postings: count per code, then place each chunk's rows
+    counts = np.zeros(_GRAMS, dtype=np.int64)
+    for start in range(0, n, chunk):
+        codes, _ = _chunk_grams(blob, offsets, start, min(n, start + chunk))
+        counts += np.bincount(codes, minlength=_GRAMS)
+    gram_offsets = np.zeros(_GRAMS + 1, dtype=np.int64)
+    np.cumsum(counts, out=gram_offsets[1:])
+    if gram_offsets[-1] >= 2 ** 32:
+        raise ValueError("gazetteer too large for 32-bit posting offsets")
+    postings = np.empty(int(gram_offsets[-1]), dtype=np.uint32)
+    cursor = gram_offsets[:-1].copy()
+    for start in range(0, n, chunk):
+        codes, row_ids = _chunk_grams(blob, offsets, start, min(n, start + chunk))
+        by_code = np.argsort(codes, kind='stable')
+        codes, row_ids = codes[by_code], row_ids[by_code]
+        uniq, first, per_code = np.unique(codes, return_index=True, return_counts=True)
+        rank = np.arange(len(codes)) - np.repeat(first, per_code)
+        postings[cursor[codes] + rank] = row_ids
+        cursor[uniq] += per_code
+
+    sections = [
+        ('name_offsets', offsets), ('names', blob), ('lat', lat_col), ('lon', lon_col),
+        ('population', pop_col), ('hashes', hashes), ('hash_rows', hash_rows),
+        ('gram_offsets', gram_offsets.astype(np.uint32)), ('postings', postings),
+    ]
+    layout, offset = {}, 0
+    for name, data in sections:
+        layout[name] = (offset, data.nbytes)
+        offset = _aligned(offset + data.nbytes)
+    header = json.dumps({'n': n, 'sections': layout}).encode()
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+        base = f.tell()
+        for name, data in sections:
+            f.write(b'\0' * (base + layout[name][0] - f.tell()))
+            f.write(np.ascontiguousarray(data).data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return n
+
+
+class Gazetteer:
+    """Read-only, memory-mapped gazetteer index written by `build`."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mapping)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a gazetteer index")
+        (header_len,) = struct.unpack_from('<Q', buf, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(buf[start:start + header_len]))
+        base = _aligned(start + header_len)
+
+        def section(name, fmt):
+            offset, size = header['sections'][name]
+            return buf[base + offset:base + offset + size].cast(fmt)
+
+        self.path = path
+        self.n = header['n']
+        self._offsets = section('name_offsets', 'Q')
+        self._names = section('names', 'B')
+        self._lat = section('lat', 'f')
+        self._lon = section('lon', 'f')
+        self._pop = section('population', 'I')
+        self._hashes = section('hashes', 'Q')
+        self._hash_rows = section('hash_rows', 'I')
+        self._gram_offsets = section('gram_offsets', 'I')
+        self._postings = section('postings', 'I')
+        self._sample = None
+        self._max_postings = max(FUZZY_MAX_POSTINGS, int(self.n * FUZZY_MAX_POSTINGS_SHARE))
+        self._postings_budget = max(FUZZY_POSTINGS_BUDGET, int(self.n * FUZZY_POSTINGS_BUDGET_SHARE))
+        if np is not None:
+            self._np_offsets = np.frombuffer(self._offsets, dtype=np.uint64)
+            self._np_pop = np.frombuffer(self._pop, dtype=np.uint32)
+
+    def __len__(self):
+        return self.n
+
+    def _name(self, row):
+        return bytes(self._names[self._offsets[row]:self._offsets[row + 1]])
+
+    def _match(self, row, score):
+        # float32 columns: round off the noise below GeoNames' 5 decimals
+        return GazetteerMatch(self._name(row).decode('utf-8'), round(self._lat[row], 5),
+                              round(self._lon[row], 5), self._pop[row], score)
+
+    def _find(self, key):
+        h = _hash(key)
+        hashes, i = self._hashes, bisect_left(self._hashes, h)
+        while i < self.n and hashes[i] == h:
+            row = self._hash_rows[i]
+            if self._name(row) == key:
+                return row
+            i += 1
+        return None
+
+    def exact(self, place_text):
+        key = normalize_place(place_text).encode('utf-8')
+        row = self._find(key) if key else None
+        return None if row is None else self._match(row, 1.0)
+
+    def _bisect(self, key):
+        """First row whose name is >= `key`."""
+        sample = self._sample
+        if sample is None:
+            sample = self._sample = [self._name(r) for r in range(0, self.n, PREFIX_STRIDE)]
+        block = bisect_left(sample, key)
+        lo, hi = max(0, (block - 1) * PREFIX_STRIDE), min(self.n, block * PREFIX_STRIDE)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefix(self, place_text, limit=10):
+        """
+        Up to `limit` names starting with `place_text`, most populous first,
+        scored by the share of the name the prefix covers.
+        """
+        key = normalize_place(place_text).encode('utf-8')
+        if not key or limit <= 0:
+            return []
+        lo = self._bisect(key)
+        # no UTF-8 byte is 0xff, so this bounds every name with the prefix
+        hi = min(self._bisect(key + b'\xff'), lo + PREFIX_SCAN)
+        if hi - lo <= limit:
+            rows = list(range(lo, hi))
+        elif np is not None:
+            rows = (np.argpartition(-self._np_pop[lo:hi].astype(np.int64), limit)[:limit] + lo).tolist()
+        else:
+            rows = heapq.nlargest(limit, range(lo, hi), key=self._pop.__getitem__)
+        rows.sort(key=lambda r: -self._pop[r])
+        return [self._match(r, len(key) / len(self._name(r))) for r in rows]
+
+    def _shared(self, grams):
+        """
+        (rows, trigrams shared with `grams`, trigrams used), reading the
+        rarest posting lists first until the row budget is spent.
+        """
+        spans = []
+        for g in grams:
+            start, end = self._gram_offsets[g], self._gram_offsets[g + 1]
+            if 0 < end - start <= self._max_postings:
+                spans.append((end - start, start, end))
+        spans.sort()
+        lists, total = [], 0
+        for size, start, end in spans:
+            if len(lists) >= FUZZY_MIN_GRAMS and total + size > self._postings_budget:
+                break
+            lists.append(self._postings[start:end])
+            total += size
+        if not lists:
+            return [], [], 0
+        if np is not None:
+            rows, shared = np.unique(np.concatenate([np.frombuffer(p, dtype=np.uint32) for p in lists]),
+                                     return_counts=True)
+            return rows, shared, len(lists)
+        tally = Counter()
+        for p in lists:
+            tally.update(p)
+        return list(tally), list(tally.values()), len(lists)
+
+    def fuzzy(self, place_text, limit=5, min_similarity=FUZZY_MIN_SIMILARITY):
+        """Names whose trigram similarity (Jaccard) is at least `min_similarity`."""
+        key = normalize_place(place_text).encode('utf-8')
+        if not key:
+            return []
+        grams = _grams(key)
+        rows, shared, used = self._shared(grams)
+        if not used:
+            return []
+        # estimate similarity from the trigrams used (a name of L bytes has
+        # about L trigrams), then score the most promising rows exactly
+        scale = used / len(grams)
+        if np is not None:
+            if used > 2:
+                # a row sharing a single trigram is never among the best
+                keep = shared > 1
+                rows, shared = rows[keep], shared[keep]
+            lengths = (self._np_offsets[rows + 1] - self._np_offsets[rows]).astype(np.float64)
+            estimate = shared / np.maximum(used + lengths * scale - shared, shared)
+            if len(rows) > FUZZY_VERIFY:
+                rows = rows[np.argpartition(-estimate, FUZZY_VERIFY)[:FUZZY_VERIFY]]
+            rows = rows.tolist()
+        else:
+            offsets = self._offsets
+            estimate = {r: s / max(used + (offsets[r + 1] - offsets[r]) * scale - s, s)
+                        for r, s in zip(rows, shared)}
+            rows = heapq.nlargest(FUZZY_VERIFY, estimate, key=estimate.get)
+        scored = []
+        for row in rows:
+            other = _grams(self._name(row))
+            common = len(grams & other)
+            score = common / (len(grams) + len(other) - common)
+            if score >= min_similarity:
+                scored.append((-score, -self._pop[row], row))
+        scored.sort()
+        return [self._match(row, -neg) for neg, _, row in scored[:limit]]
+
+    def match(self, place_text, fuzzy=True):
+        """
+        Best match for free-form place text: the whole text, then each
+        comma-separated part (most specific first), exactly; then, with
+        `fuzzy`, by `_inexact`.
+        """
+        hit = self.exact(place_text)
+        if hit is not None:
+            return hit
+        parts = [p for p in str(place_text).split(',') if p.strip()] if place_text else []
+        if len(parts) > 1:
+            for part in parts:
+                hit = self.exact(part)
+                if hit is not None:
+                    return hit
+        return self._inexact(place_text) if fuzzy else None
+
+    def _inexact(self, place_text):
+        """
+        Best trigram match at MATCH_MIN_SIMILARITY; failing that, the most
+        populous name the text is a prefix of, if it covers at least
+        MATCH_MIN_SIMILARITY of that name.
+        """
+        found = self.fuzzy(place_text, limit=1, min_similarity=MATCH_MIN_SIMILARITY)
+        if not found:
+            found = [m for m in self.prefix(place_text, limit=1) if m.score >= MATCH_MIN_SIMILARITY]
+        return found[0] if found else None
+
+    def __call__(self, place_text):
+        """Inline geocode backend: (lat, lon) of an exact match, or None."""
+        hit = self.match(place_text, fuzzy=False)
+        return None if hit is None else (hit.lat, hit.lon)
+
+    def fuzzy_geocode(self, place_text):
+        """(lat, lon) of the best trigram or prefix match (`_inexact`), or None."""
+        hit = self._inexact(place_text)
+        return None if hit is None else (hit.lat, hit.lon)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+# monotonic time before which a missing GAZETTEER_PATH is not looked for
+_missing_until = 0.0
+
+
+def get_gazetteer():
+    """
+    The index at GAZETTEER_PATH, opened on first use; None when unset or
+    missing (checked again every GAZETTEER_RECHECK_S).
+    """
+    global _gazetteer, _missing_until
+    if _gazetteer is None and GAZETTEER_PATH and time.monotonic() >= _missing_until:
+        with _gazetteer_lock:
+            if _gazetteer is None and time.monotonic() >= _missing_until:
+                if os.path.exists(GAZETTEER_PATH):
+                    _gazetteer = Gazetteer(GAZETTEER_PATH)
+                    print(f"Gazetteer: mapped {len(_gazetteer):,} names from {GAZETTEER_PATH}")
+                else:
+                    if not _missing_until:
+                        print(f"Gazetteer: no index at {GAZETTEER_PATH}; geocoding without it")
+                    _missing_until = time.monotonic() + GAZETTEER_RECHECK_S
+    return _gazetteer
+
+
+def set_gazetteer(gazetteer):
+    global _gazetteer
+    _gazetteer = gazetteer
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    alternates = '--no-alternates' not in argv
+    args = [a for a in argv if a != '--no-alternates']
+    if len(args) != 2:
+        print("usage: python -m src.tools.gazetteer GAZETTEER.tsv OUT.idx [--no-alternates]")
+        return 2
+    n = build(read_gazetteer(args[0], alternates=alternates), args[1])
+    print(f"Gazetteer: indexed {n:,} names into {args[1]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,83 +1,266 @@
 # ...existing code...
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
 import time
 import os
 import sys
+import zlib
 
 # Support running this module directly (for quick tests) as well as importing
 # it as part of the `src` package. When run directly, relative imports fail,
 # so add a fallback that puts the `src` directory on `sys.path` and imports
 # the memory module by absolute name.
 try:
-    from ..memory.memory_bank import cache_geocode, get_cached_geocode
+    from .. import metrics
+    from .gazetteer import get_gazetteer
+    from .geocode_cache import GeocodeCache, normalize_place
 except Exception:
     THIS_DIR = os.path.dirname(__file__)
     SRC_DIR = os.path.abspath(os.path.join(THIS_DIR, '..'))
     if SRC_DIR not in sys.path:
         sys.path.insert(0, SRC_DIR)
-    from memory.memory_bank import cache_geocode, get_cached_geocode
+    import metrics
+    from tools.gazetteer import get_gazetteer
+    from tools.geocode_cache import GeocodeCache, normalize_place
 
-_geolocator = Nominatim(user_agent='communityrelief_demo_puneet', timeout=10)
-_last_ts = 0.0
 MIN_INTERVAL = 1.0
+GEOCODE_WORKERS = int(os.getenv('GEOCODE_WORKERS', '4'))
+# GEOCODE_UPSTREAM=0 never calls Nominatim (no connectivity in the field):
+# places the gazetteer cannot resolve go straight to the fallback
+UPSTREAM_ENABLED = os.getenv('GEOCODE_UPSTREAM', '1').lower() not in ('0', 'false', 'no')
 
 
-def geocode_stub(place_text):
-    # simple deterministic stub for offline/demo
-    h = abs(hash(place_text)) % 1000
-    lat = 20 + (h % 50) * 0.1
-    lon = 72 + ((h // 50) % 50) * 0.1
-    return lat, lon
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire()` blocks the calling (worker)
+    thread until a token is available; `rate` tokens accrue per second up
+    to `burst`.
+    """
 
+    def __init__(self, rate=1.0 / MIN_INTERVAL, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
 
-def geocode(place_text, fallback=True, retries=2):
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._ts) * self.rate)
+                self._ts = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class TransientGeocodeError(Exception):
+    """Raised by backends for errors worth retrying (timeouts, 5xx)."""
+
+
+_geolocator = None
+_geolocator_lock = threading.Lock()
+
+
+def get_geolocator():
     """
-    Geocode a place_text using Nominatim with simple rate limiting,
-    caching and an optional deterministic stub fallback.
-    Returns (lat, lon) or (None, None).
+    Shared Nominatim client, built on the first upstream lookup: importing
+    geopy (and requests under it) is most of this module's import time.
     """
-    global _last_ts
+    global _geolocator
+    if _geolocator is None:
+        with _geolocator_lock:
+            if _geolocator is None:
+                from geopy.geocoders import Nominatim
+                _geolocator = Nominatim(user_agent='communityrelief_demo_puneet', timeout=10)
+    return _geolocator
 
-    if not place_text:
-        return (None, None)
 
-    # return cached result if available
-    cached = get_cached_geocode(place_text)
-    if cached:
-        return cached
+def nominatim_backend(place_text):
+    """Return (lat, lon) from Nominatim, None when the place is unknown."""
+    from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+    geolocator = get_geolocator()
+    try:
+        loc = geolocator.geocode(place_text)
+    except (GeocoderTimedOut, GeocoderServiceError) as exc:
+        raise TransientGeocodeError(str(exc)) from exc
+    if loc:
+        return loc.latitude, loc.longitude
+    return None
+
 
-    # enforce minimum interval between requests
-    now = time.time()
-    elapsed = now - _last_ts
-    if elapsed < MIN_INTERVAL:
-        time.sleep(MIN_INTERVAL - elapsed)
+class GeocodeService:
+    """
+    Non-blocking geocoder. `submit()` returns a Future resolving to
+    (lat, lon). Places the offline gazetteer (GAZETTEER_PATH) knows by
+    name are answered inline; the rest run on a small worker pool, which
+    tries the gazetteer's fuzzy match (when the offline backend has
+    `fuzzy_geocode`) before the upstream call behind a shared token
+    bucket. Concurrent requests for the same place share one lookup.
+    `backend=None` disables upstream lookups.
+    """
+
+    def __init__(self, backend=nominatim_backend, workers=GEOCODE_WORKERS, limiter=None, cache=None,
+                 offline=None):
+        self.backend = backend
+        self.limiter = limiter or TokenBucket()
+        self.cache = cache or get_cache()
+        # defaults to the shared gazetteer, looked up when first needed
+        self.offline = offline
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='geocode')
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'coalesced': 0, 'offline': 0, 'upstream': 0}
+
+    def submit(self, place_text, fallback=True, retries=2):
+        with self._lock:
+            self.stats['requests'] += 1
+        if not place_text:
+            return _done((None, None))
+        cached = self.cache.get(place_text)
+        if cached:
+            return _done(cached)
+        offline = self.offline or get_gazetteer()
+        if offline is not None:
+            with metrics.timer('geocode_offline'):
+                loc = offline(place_text)
+            if loc:
+                with self._lock:
+                    self.stats['offline'] += 1
+                self.cache.remember(place_text, loc[0], loc[1])
+                return _done(loc)
+        key = (normalize_place(place_text), fallback)
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.stats['coalesced'] += 1
+                return fut
+            fut = self._pool.submit(self._lookup, place_text, fallback, retries)
+            self._inflight[key] = fut
+        fut.add_done_callback(lambda _f: self._forget(key))
+        return fut
 
-    attempt = 0
-    while attempt <= retries:
-        try:
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _lookup(self, place_text, fallback, retries):
+        # off the request thread: a fuzzy scan of a large index takes ms
+        fuzzy = getattr(self.offline or get_gazetteer(), 'fuzzy_geocode', None)
+        if fuzzy is not None:
+            with metrics.timer('geocode_fuzzy'):
+                loc = fuzzy(place_text)
+            if loc:
+                with self._lock:
+                    self.stats['offline'] += 1
+                self.cache.remember(place_text, loc[0], loc[1])
+                return loc
+        attempt = 0
+        if self.backend is None:
+            retries = -1
+        while attempt <= retries:
             attempt += 1
-            loc = _geolocator.geocode(place_text)
-            _last_ts = time.time()
+            self.limiter.acquire()
+            with self._lock:
+                self.stats['upstream'] += 1
+            try:
+                with metrics.timer('geocode_upstream'):
+                    loc = self.backend(place_text)
+            except TransientGeocodeError:
+                # transient error: retry with backoff (on the worker thread)
+                if attempt > retries:
+                    break
+                time.sleep(1.5 * attempt)
+                continue
+            except Exception:
+                # unknown error: do not retry
+                break
             if loc:
-                cache_geocode(place_text, loc.latitude, loc.longitude)
-                return loc.latitude, loc.longitude
+                self.cache.put(place_text, loc[0], loc[1])
+                return loc
             # if no loc returned, break and consider fallback
             break
-        except (GeocoderTimedOut, GeocoderServiceError):
-            # transient error: retry with backoff
-            if attempt > retries:
-                break
-            time.sleep(1.5 * attempt)
-        except Exception:
-            # unknown error: do not retry
-            break
 
-    # fallback to deterministic stub if allowed
-    if fallback:
-        lat, lon = geocode_stub(place_text)
-        cache_geocode(place_text, lat, lon)
-        return lat, lon
+        # fallback to deterministic stub if allowed; cached with a short TTL
+        # so the place is retried upstream later
+        if fallback:
+            lat, lon = geocode_stub(place_text)
+            self.cache.put(place_text, lat, lon, source='stub')
+            return lat, lon
+
+        self.cache.put_miss(place_text)
+        return (None, None)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def _done(value):
+    fut = Future()
+    fut.set_result(value)
+    return fut
+
+
+_service = None
+_service_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Shared two-tier geocode cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodeCache()
+    return _cache
+
+
+def get_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = GeocodeService(backend=nominatim_backend if UPSTREAM_ENABLED else None)
+    return _service
+
+
+def set_service(service):
+    """Swap the shared service, e.g. for one backed by a local stub."""
+    global _service
+    _service = service
+
 
-    return (None, None)
+def geocode_stub(place_text):
+    # simple deterministic stub for offline/demo; crc32 rather than hash(),
+    # which is salted per process
+    h = zlib.crc32(normalize_place(place_text).encode('utf-8')) % 1000
+    lat = 20 + (h % 50) * 0.1
+    lon = 72 + ((h // 50) % 50) * 0.1
+    return lat, lon
+
+
+def stub_backend(place_text):
+    """Backend for offline runs and benchmarks: never touches the network."""
+    return geocode_stub(place_text)
+
+
+def geocode_async(place_text, fallback=True, retries=2):
+    """Start a lookup and return a Future resolving to (lat, lon)."""
+    return get_service().submit(place_text, fallback=fallback, retries=retries)
+
+
+def geocode(place_text, fallback=True, retries=2):
+    """
+    Geocode a place_text using the offline gazetteer, then Nominatim with
+    simple rate limiting, caching and an optional deterministic stub
+    fallback.
+    Returns (lat, lon) or (None, None). Blocks until the lookup finishes;
+    use `geocode_async` to avoid waiting.
+    """
+    return geocode_async(place_text, fallback=fallback, retries=retries).result()
 # ...existing code...
@@ -0,0 +1,156 @@
+# Two-tier geocode cache: a bounded in-process LRU in front of the
+# `geocode_cache` table.
+#
+# Place text is normalized before lookup so "Surat " and "surat" share an
+# entry. Real results live for GEOCODE_TTL_S; stub fallbacks and misses get
+# the much shorter GEOCODE_RETRY_TTL_S so they are retried upstream later.
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from ..memory.memory_bank import cache_geocode, get_geocode_entry, load_geocode_cache
+from ..utils import epoch
+
+LRU_SIZE = int(os.getenv('GEOCODE_LRU_SIZE', '4096'))
+TTL_S = float(os.getenv('GEOCODE_TTL_S', str(30 * 24 * 3600)))
+RETRY_TTL_S = float(os.getenv('GEOCODE_RETRY_TTL_S', '900'))
+
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_place(place_text):
+    """Casefold, trim and collapse whitespace/punctuation at the edges."""
+    if not place_text:
+        return ''
+    text = _SPACES.sub(' ', str(place_text)).strip(' \t\n.,;:')
+    return text.casefold()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping key -> value with per-entry expiry."""
+
+    def __init__(self, maxsize=LRU_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at <= now:
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class GeocodeCache:
+    """
+    `get()` returns (lat, lon), (None, None) for a cached miss, or None when
+    the place has to be looked up upstream.
+    """
+
+    def __init__(self, maxsize=LRU_SIZE, ttl_s=TTL_S, retry_ttl_s=RETRY_TTL_S):
+        self.lru = LRUCache(maxsize)
+        self.ttl_s = ttl_s
+        self.retry_ttl_s = retry_ttl_s
+        self.db_hits = 0
+        self.db_misses = 0
+
+    def _ttl(self, source):
+        return self.ttl_s if source in (None, 'upstream') else self.retry_ttl_s
+
+    def get(self, place_text):
+        key = normalize_place(place_text)
+        if not key:
+            return None
+        now = time.time()
+        value = self.lru.get(key, now)
+        if value is not None:
+            return value
+        entry = get_geocode_entry(key)
+        if entry is None:
+            self.db_misses += 1
+            return None
+        lat, lon, cached_at, source = entry
+        expires_at = epoch(cached_at) + self._ttl(source)
+        if expires_at <= now or lat is None or lon is None:
+            self.db_misses += 1
+            return None
+        self.db_hits += 1
+        value = (lat, lon)
+        self.lru.put(key, value, expires_at)
+        return value
+
+    def put(self, place_text, lat, lon, source='upstream'):
+        key = normalize_place(place_text)
+        if not key:
+            return
+        self.lru.put(key, (lat, lon), time.time() + self._ttl(source))
+        if lat is not None and lon is not None:
+            cache_geocode(key, lat, lon, source=source)
+
+    def remember(self, place_text, lat, lon):
+        """Keep a result in the in-memory tier only (e.g. a gazetteer hit)."""
+        key = normalize_place(place_text)
+        if key:
+            self.lru.put(key, (lat, lon), time.time() + self.ttl_s)
+
+    def put_miss(self, place_text):
+        """Remember a failed lookup briefly so bursts don't hammer upstream."""
+        self.put(place_text, None, None, source='miss')
+
+    def warm(self, limit=None):
+        """Load the most recent table rows into the LRU. Returns rows loaded."""
+        now = time.time()
+        loaded = 0
+        for place, lat, lon, cached_at, source in load_geocode_cache(limit or self.lru.maxsize):
+            expires_at = epoch(cached_at) + self._ttl(source)
+            if lat is None or lon is None or expires_at <= now:
+                continue
+            self.lru.put(normalize_place(place), (lat, lon), expires_at)
+            loaded += 1
+        return loaded
+
+    def stats(self):
+        lookups = self.lru.hits + self.lru.misses
+        return {
+            'size': len(self.lru),
+            'maxsize': self.lru.maxsize,
+            'hits': self.lru.hits,
+            'misses': self.lru.misses,
+            'evictions': self.lru.evictions,
+            'expired': self.lru.expired,
+            'db_hits': self.db_hits,
+            'db_misses': self.db_misses,
+            'hit_rate': round(self.lru.hits / lookups, 4) if lookups else 0.0,
+        }
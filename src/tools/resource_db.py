@@ -1,28 +1,99 @@
 # ...existing code...
 # small in-memory resource DB. Replace with real source for production.
-import math
+import os
+import threading
 
+from ..metrics import timed
+from .resource_store import ResourceStore
+from .spatial_index import EARTH_RADIUS_KM, haversine_km
+
+try:
+    import numpy as np
+except ImportError:  # batch queries fall back to per-point lookups
+    np = None
+
+# a file written by ResourceStore.persist / persist_resources; when it exists
+# the inventory is mapped from it instead of being built from `resources`
+RESOURCE_STORE_PATH = os.getenv('RESOURCE_STORE_PATH')
+
+# `capacity` is how many units of demand a resource can fill at once (default
+# 1), across incidents or several for one incident.
 resources = [
-    {"id": "vol-1", "type": "volunteer", "lat": 20.5, "lon": 72.5, "available": True},
-    {"id": "shel-1", "type": "shelter", "lat": 20.8, "lon": 72.7, "available": True},
+    {"id": "vol-1", "type": "volunteer", "lat": 20.5, "lon": 72.5,
+        "available": True, "capacity": 10},
+    {"id": "shel-1", "type": "shelter", "lat": 20.8, "lon": 72.7,
+        "available": True, "capacity": 50},
     {"id": "med-1", "type": "medical_kit",
-        "lat": 20.6, "lon": 72.6, "available": True},
+        "lat": 20.6, "lon": 72.6, "available": True, "capacity": 20},
 ]
 
+# Columnar store holding the inventory. Built lazily on first query (or
+# mapped from RESOURCE_STORE_PATH) and updated through the helpers below;
+# `resources` is only the seed, and assigning a new list to it triggers a
+# rebuild on the next lookup.
+_store = None
+_indexed_list = None
+_store_lock = threading.Lock()
+
+# upper bound on incident x resource cells evaluated per batch chunk
+BATCH_MAX_CELLS = 4_000_000
+
+
+def rebuild_index():
+    """Rebuild the store from the current `resources` list."""
+    global _store, _indexed_list
+    with _store_lock:
+        _store = ResourceStore.from_dicts(resources)
+        _indexed_list = resources
+    return _store.current
+
+
+def get_store():
+    global _store, _indexed_list
+    if _store is None or _indexed_list is not resources:
+        if _store is None and RESOURCE_STORE_PATH and os.path.exists(RESOURCE_STORE_PATH):
+            with _store_lock:
+                if _store is None:
+                    _store = ResourceStore.load(RESOURCE_STORE_PATH)
+                    _indexed_list = resources
+                    print(f"ResourceDB: mapped {len(_store.current):,} resources from {RESOURCE_STORE_PATH}")
+        else:
+            rebuild_index()
+    return _store
+
+
+def get_index():
+    """Current snapshot of the inventory (nearest/within/get, never blocks)."""
+    return get_store().current
+
 
-def haversine_km(lat1, lon1, lat2, lon2):
-    """Return great-circle distance between two points (kilometers)."""
-    R = 6371.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * \
-        math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+def persist_resources(path=None):
+    """Write the inventory to `path` (default RESOURCE_STORE_PATH) for mmap loading."""
+    path = path or RESOURCE_STORE_PATH
+    if not path:
+        raise ValueError("no path given and RESOURCE_STORE_PATH is not set")
+    return get_store().persist(path)
 
 
-def find_nearby(lat, lon, radius_km=50, limit=5):
+def add_resource(resource):
+    """Add a resource dict (replacing any entry with the same id)."""
+    return get_store().add(resource)
+
+
+def move_resource(resource_id, lat, lon):
+    return get_store().move(resource_id, lat, lon)
+
+
+def set_available(resource_id, available=True):
+    return get_store().set_available(resource_id, available)
+
+
+def remove_resource(resource_id):
+    return get_store().remove(resource_id)
+
+
+@timed('find_nearby')
+def find_nearby(lat, lon, radius_km=50, limit=5, available_only=False):
     """
     Find up to `limit` resources within `radius_km` kilometers of (lat, lon).
     Returns a list of resource dicts sorted by distance (closest first).
@@ -36,17 +107,100 @@ def find_nearby(lat, lon, radius_km=50, limit=5):
     except (TypeError, ValueError):
         return []
 
-    scored = []
-    for r in resources:
+    hits = get_index().nearest(lat, lon, k=limit, radius_km=radius_km,
+                               available_only=available_only)
+    return [r for d, r in hits]
+
+
+@timed('find_nearby_many')
+def find_nearby_many(points, radius_km=50, limit=5, available_only=False,
+                     chunk_rows=64, max_cells=BATCH_MAX_CELLS):
+    """
+    Batch version of `find_nearby` for draining a backlog of incidents.
+
+    `points` is an iterable of (lat, lon) pairs. Returns one list of
+    resource dicts per point, in the same order, each sorted by distance.
+    Incidents are processed latitude-sorted in chunks; each chunk computes
+    an incident x resource distance matrix with NumPy against the latitude
+    band it can reach, capped at `max_cells` entries to bound memory.
+    """
+    points = list(points)
+    if np is None:
+        return [find_nearby(lat, lon, radius_km=radius_km, limit=limit,
+                            available_only=available_only)
+                for lat, lon in points]
+
+    results = [[] for _ in points]
+    valid = []
+    for i, (lat, lon) in enumerate(points):
         try:
-            rlat = float(r.get("lat"))
-            rlon = float(r.get("lon"))
+            valid.append((float(lat), float(lon), i))
         except (TypeError, ValueError):
             continue
-        d = haversine_km(lat, lon, rlat, rlon)
+
+    snap = get_index()
+    rlat, rlon, ravail, rows_of = get_store().batch_arrays(snap)
+    if not valid or not len(rows_of) or limit <= 0:
+        return results
+
+    valid.sort()
+    qlat_all = np.radians(np.asarray([v[0] for v in valid], dtype=np.float64))
+    qlon_all = np.radians(np.asarray([v[1] for v in valid], dtype=np.float64))
+    band = radius_km / EARTH_RADIUS_KM
+    rows = max(1, min(chunk_rows, max_cells // len(rows_of)))
+
+    for start in range(0, len(valid), rows):
+        qlat = qlat_all[start:start + rows]
+        qlon = qlon_all[start:start + rows]
+        lo = np.searchsorted(rlat, qlat[0] - band, side="left")
+        hi = np.searchsorted(rlat, qlat[-1] + band, side="right")
+        if lo >= hi:
+            continue
+        clat, clon = rlat[lo:hi], rlon[lo:hi]
+        qa, qo = qlat[:, None], qlon[:, None]
+        a = np.sin((clat - qa) / 2) ** 2 + np.cos(qa) * np.cos(clat) * \
+            np.sin((clon - qo) / 2) ** 2
+        dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        dist[dist > radius_km] = np.inf
+        if available_only:
+            dist[:, ~ravail[lo:hi]] = np.inf
+        k = min(limit, dist.shape[1])
+        if k < dist.shape[1]:
+            top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+        top_d = np.take_along_axis(dist, top, axis=1)
+        order = np.argsort(top_d, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_d = np.take_along_axis(top_d, order, axis=1)
+        for row in range(top.shape[0]):
+            out = results[valid[start + row][2]]
+            for j, d in zip(top[row], top_d[row]):
+                if not np.isfinite(d):
+                    break
+                out.append(snap.record(int(rows_of[lo + j])))
+    return results
+
+
+def find_nearby_linear(lat, lon, radius_km=50, limit=5):
+    """Reference full-scan implementation, kept for benchmarks and checks."""
+    if lat is None or lon is None:
+        return []
+
+    try:
+        lat = float(lat)
+        lon = float(lon)
+    except (TypeError, ValueError):
+        return []
+
+    snap = get_index()
+    lat_col, lon_col = snap.lat, snap.lon
+    scored = []
+    for row in snap.rows():
+        d = haversine_km(lat, lon, lat_col[row], lon_col[row])
         if d <= radius_km:
-            scored.append((d, r))
+            scored.append((d, row))
 
-    scored.sort(key=lambda x: x[0])
-    return [r for d, r in scored[:limit]]
+    scored.sort()
+    return [snap.record(row) for d, row in scored[:limit]]
 # ...existing code...
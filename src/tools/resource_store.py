@@ -0,0 +1,631 @@
+"""
+Columnar resource inventory with copy-on-write snapshots.
+
+Resources are held as parallel columns (lat/lon float64, a one-byte type
+code, capacity, availability) rather than one dict per resource, and rows
+are laid out grid cell by grid cell so a cell is just a row range. Readers
+query an immutable `ResourceSnapshot`; writers build the next snapshot
+under a lock and swap it in, so a query never waits for an update or sees
+half of one:
+
+- availability is split into CHUNK_SIZE-row chunks; flipping it copies one
+  chunk and the chunk list, whatever the inventory size;
+- adds append rows to the shared columns (a snapshot only reads its first
+  `n` rows) and record the cells they touch in a small overlay;
+- moves are a remove plus an add, removes only drop the row from its cell.
+  Dead rows are reclaimed by `compact()`, which also runs once the overlay
+  grows past MAX_OVERLAY_CELLS.
+
+`persist(path)` writes the compacted columns and the cell table to one
+file; `load(path)` maps it with mmap and reads the columns in place, so a
+restart costs a header parse instead of a rebuild and pages come in as
+queries touch them.
+
+Queries hand back plain resource dicts, built for the hits only.
+
+    python -m src.tools.resource_store inventory.jsonl resources.store
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from .spatial_index import KM_PER_DEG_LAT, candidate_cells, cell_of, haversine_km
+
+try:
+    import numpy as np
+except ImportError:  # layout and batch arrays fall back to pure Python
+    np = None
+
+CELL_DEG = 0.25
+CHUNK_BITS = 12
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+MAX_OVERLAY_CELLS = 4096
+MAX_TYPES = 256
+MAGIC = b'CRSTORE1'
+# keys held in columns; anything else on a resource dict is kept per row
+COLUMNS = ('id', 'type', 'lat', 'lon', 'available', 'capacity')
+_INT32_MAX = 2 ** 31 - 1
+
+
+def _coords(r):
+    try:
+        return float(r.get('lat')), float(r.get('lon'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _capacity(r):
+    try:
+        return max(0, min(int(r.get('capacity', 1)), _INT32_MAX))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _extra(r):
+    return {k: v for k, v in r.items() if k not in COLUMNS}
+
+
+def _aligned(offset, align=8):
+    return (offset + align - 1) // align * align
+
+
+class _MappedIds:
+    """Resource ids stored as one UTF-8 blob plus offsets, decoded on access."""
+
+    __slots__ = ('_offsets', '_blob')
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):
+        return str(self._blob[self._offsets[row]:self._offsets[row + 1]], 'utf-8')
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+
+class ResourceSnapshot:
+    """
+    One immutable version of the inventory: rows [0, n) of the columns,
+    with `cells` (cell key -> row range) and `overlay` (cell key -> rows,
+    for cells changed since the last compaction) listing the live ones.
+
+    Lookups by id go through the store's current id table, so a snapshot
+    that is no longer current may not find resources moved since.
+    """
+
+    __slots__ = ('store', 'version', 'layout', 'n', 'live', 'ids', 'types',
+                 'type_names', 'lat', 'lon', 'capacity', 'extras', 'avail',
+                 'cell_deg', 'lon_cells', 'cells', 'overlay')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def _replace(self, **changes):
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return ResourceSnapshot(**fields)
+
+    def __len__(self):
+        return self.live
+
+    def __contains__(self, resource_id):
+        return self._row(resource_id) is not None
+
+    def _row(self, resource_id):
+        row = self.store._rows_by_id().get(resource_id)
+        if row is None or row >= self.n or self.ids[row] != resource_id:
+            return None
+        return row
+
+    def _key(self, lat, lon):
+        row, col = cell_of(lat, lon, self.cell_deg, self.lon_cells)
+        return row * self.lon_cells + col
+
+    def _cell_rows(self, key):
+        rows = self.overlay.get(key)
+        if rows is not None:
+            return rows
+        span = self.cells.get(key)
+        return range(span[0], span[1]) if span else ()
+
+    def available(self, row):
+        return bool(self.avail[row >> CHUNK_BITS][row & CHUNK_MASK])
+
+    def record(self, row):
+        """The resource dict for `row`."""
+        r = {'id': self.ids[row], 'type': self.type_names[self.types[row]],
+             'lat': self.lat[row], 'lon': self.lon[row],
+             'available': self.available(row), 'capacity': self.capacity[row]}
+        extra = self.extras.get(row)
+        if extra:
+            r.update(extra)
+        return r
+
+    def get(self, resource_id):
+        row = self._row(resource_id)
+        return None if row is None else self.record(row)
+
+    def rows(self):
+        """Live row numbers, cell by cell."""
+        overlay = self.overlay
+        for key, (start, end) in self.cells.items():
+            if key not in overlay:
+                yield from range(start, end)
+        for key, rows in overlay.items():
+            yield from rows
+
+    def records(self):
+        for row in self.rows():
+            yield self.record(row)
+
+    def _within(self, lat, lon, radius_km, available_only):
+        out = []
+        lat_col, lon_col, avail = self.lat, self.lon, self.avail
+        cells, overlay, lon_cells = self.cells, self.overlay, self.lon_cells
+        for crow, ccol in candidate_cells(lat, lon, radius_km, self.cell_deg, lon_cells):
+            key = crow * lon_cells + ccol
+            rows = overlay.get(key) if overlay else None
+            if rows is None:
+                span = cells.get(key)
+                if span is None:
+                    continue
+                rows = range(span[0], span[1])
+            for row in rows:
+                if available_only and not avail[row >> CHUNK_BITS][row & CHUNK_MASK]:
+                    continue
+                d = haversine_km(lat, lon, lat_col[row], lon_col[row])
+                if d <= radius_km:
+                    out.append((d, row))
+        return out
+
+    def within(self, lat, lon, radius_km, available_only=False):
+        """Return [(distance_km, resource), ...] within `radius_km`, unsorted."""
+        return [(d, self.record(row))
+                for d, row in self._within(lat, lon, radius_km, available_only)]
+
+    def nearest(self, lat, lon, k=5, radius_km=50, available_only=False):
+        """
+        Return up to `k` (distance_km, resource) pairs within `radius_km`,
+        closest first. The search radius grows from one cell outwards so
+        dense areas stop early instead of scanning the full radius.
+        """
+        if k <= 0:
+            return []
+        r = min(radius_km, self.cell_deg * KM_PER_DEG_LAT)
+        while True:
+            found = self._within(lat, lon, r, available_only)
+            if len(found) >= k or r >= radius_km:
+                break
+            r = min(radius_km, r * 2)
+        return [(d, self.record(row)) for d, row in heapq.nsmallest(k, found)]
+
+
+def _np_column(col, dtype):
+    # arrays are copied: a NumPy view would pin their buffer and block appends
+    if isinstance(col, memoryview):
+        return np.frombuffer(col, dtype=dtype)
+    return np.frombuffer(col.tobytes(), dtype=dtype)
+
+
+def _flat_avail(snap):
+    return b''.join(bytes(chunk) for chunk in snap.avail)[:snap.n]
+
+
+def _take(col, typecode, order):
+    out = array(typecode)
+    if np is not None and len(order):
+        dtype = np.dtype(typecode)
+        out.frombytes(_np_column(col, dtype)[order].tobytes())
+    else:
+        out.extend(col[r] for r in order)
+    return out
+
+
+def _layout(store, src, rows):
+    """
+    A compact snapshot holding `rows` of `src` (a snapshot or builder) in
+    grid-cell order, each cell one contiguous row range.
+    """
+    cell_deg = src.cell_deg
+    lon_cells = int(math.ceil(360.0 / cell_deg))
+    if np is not None:
+        order = np.fromiter(rows, dtype=np.int64)
+        lat = _np_column(src.lat, np.float64)[order]
+        lon = _np_column(src.lon, np.float64)[order]
+        keys = (np.floor((lat + 90.0) / cell_deg).astype(np.int64) * lon_cells
+                + np.floor((lon + 180.0) / cell_deg).astype(np.int64) % lon_cells)
+        by_cell = np.argsort(keys, kind='stable')
+        order, keys = order[by_cell], keys[by_cell]
+        uniq, starts = np.unique(keys, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        cells = dict(zip(uniq.tolist(), zip(starts.tolist(), ends.tolist())))
+        avail = np.frombuffer(_flat_avail(src), dtype=np.uint8)[order].tobytes()
+        order_list = order.tolist()
+    else:
+        def key(r):
+            crow, ccol = cell_of(src.lat[r], src.lon[r], cell_deg, lon_cells)
+            return crow * lon_cells + ccol
+        keyed = sorted((key(r), r) for r in rows)
+        order = order_list = [r for _, r in keyed]
+        cells = {}
+        for i, (k, _) in enumerate(keyed):
+            span = cells.get(k)
+            cells[k] = (span[0] if span else i, i + 1)
+        flat = _flat_avail(src)
+        avail = bytes(flat[r] for r in order)
+    n = len(order_list)
+    new_row = {old: new for new, old in enumerate(order_list)} if src.extras else {}
+    return ResourceSnapshot(
+        store=store, version=0, layout=0, n=n, live=n,
+        ids=[src.ids[r] for r in order_list],
+        types=_take(src.types, 'B', order),
+        type_names=list(src.type_names),
+        lat=_take(src.lat, 'd', order), lon=_take(src.lon, 'd', order),
+        capacity=_take(src.capacity, 'i', order),
+        extras={new_row[r]: e for r, e in src.extras.items() if r in new_row},
+        avail=[bytearray(avail[i:i + CHUNK_SIZE]) for i in range(0, n, CHUNK_SIZE)],
+        cell_deg=cell_deg, lon_cells=lon_cells, cells=cells, overlay={})
+
+
+class _Builder:
+    """Plain columns filled from resource dicts, laid out by `_layout`."""
+
+    def __init__(self, cell_deg):
+        self.cell_deg = cell_deg
+        self.ids = []
+        self.types = array('B')
+        self.type_names = [None]
+        self.codes = {None: 0}
+        self.lat = array('d')
+        self.lon = array('d')
+        self.capacity = array('i')
+        self.avail = [bytearray()]
+        self.extras = {}
+        self.row_of = {}
+
+    @property
+    def n(self):
+        return len(self.ids)
+
+    def add(self, r):
+        rid = r.get('id')
+        self.row_of.pop(rid, None)
+        coords = _coords(r)
+        if coords is None:
+            return
+        row = len(self.ids)
+        self.ids.append(rid)
+        self.types.append(_type_code(self.type_names, self.codes, r.get('type')))
+        self.lat.append(coords[0])
+        self.lon.append(coords[1])
+        self.capacity.append(_capacity(r))
+        self.avail[0].append(1 if r.get('available', True) else 0)
+        extra = _extra(r)
+        if extra:
+            self.extras[row] = extra
+        self.row_of[rid] = row
+
+
+def _type_code(names, codes, rtype):
+    code = codes.get(rtype)
+    if code is None:
+        if len(names) >= MAX_TYPES:
+            raise ValueError(f"resource store holds at most {MAX_TYPES} resource types")
+        code = codes[rtype] = len(names)
+        names.append(rtype)
+    return code
+
+
+class ResourceStore:
+    """
+    Owns the current `ResourceSnapshot` (`.current`) and the write path.
+    Writers serialise on one lock; readers never take it.
+    """
+
+    def __init__(self, cell_deg=CELL_DEG):
+        self._lock = threading.Lock()
+        self._row_of = None
+        self._codes = None
+        self._version = 0
+        self._layouts = 0
+        self._batch = None
+        self._batch_avail = None
+        self.current = _layout(self, _Builder(float(cell_deg)), ())
+
+    @classmethod
+    def from_dicts(cls, resources, cell_deg=CELL_DEG):
+        """Build a store from resource dicts; later duplicates of an id win."""
+        builder = _Builder(float(cell_deg))
+        for r in resources:
+            builder.add(r)
+        store = cls(cell_deg)
+        store._install(_layout(store, builder, builder.row_of.values()))
+        return store
+
+    @classmethod
+    def load(cls, path):
+        """Map a file written by `persist`; the columns are read in place."""
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(mapping)
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a resource store file")
+        (header_len,) = struct.unpack_from('<Q', buf, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(buf[start:start + header_len]))
+        base = _aligned(start + header_len)
+
+        def section(name, fmt):
+            offset, size = header['sections'][name]
+            return buf[base + offset:base + offset + size].cast(fmt)
+
+        n = header['n']
+        cell_deg = float(header['cell_deg'])
+        bounds = section('cells', 'q').tolist()
+        avail = section('available', 'B')
+        store = cls(cell_deg)
+        store._install(ResourceSnapshot(
+            store=store, version=0, layout=0, n=n, live=n,
+            ids=_MappedIds(section('id_offsets', 'q'), section('ids', 'B')),
+            types=section('type', 'B'), type_names=header['types'],
+            lat=section('lat', 'd'), lon=section('lon', 'd'),
+            capacity=section('capacity', 'i'),
+            extras={int(k): v for k, v in json.loads(bytes(section('extras', 'B')) or b'{}').items()},
+            avail=[avail[i:i + CHUNK_SIZE] for i in range(0, n, CHUNK_SIZE)],
+            cell_deg=cell_deg, lon_cells=int(math.ceil(360.0 / cell_deg)),
+            cells={bounds[i]: (bounds[i + 1], bounds[i + 2]) for i in range(0, len(bounds), 3)},
+            overlay={}))
+        return store
+
+    def persist(self, path):
+        """Write the current snapshot, compacted, to `path` (atomically replaced)."""
+        snap = self.current
+        if snap.overlay or snap.live != snap.n:
+            snap = _layout(self, snap, snap.rows())
+        id_bytes = [str(rid).encode('utf-8') for rid in
+                    (snap.ids.tolist() if isinstance(snap.ids, _MappedIds) else snap.ids)]
+        offsets = array('q', [0])
+        for b in id_bytes:
+            offsets.append(offsets[-1] + len(b))
+        cells = array('q')
+        for key, (start, end) in sorted(snap.cells.items()):
+            cells.extend((key, start, end))
+        sections = [
+            ('lat', snap.lat), ('lon', snap.lon), ('type', snap.types),
+            ('capacity', snap.capacity), ('available', _flat_avail(snap)),
+            ('cells', cells), ('id_offsets', offsets), ('ids', b''.join(id_bytes)),
+            ('extras', json.dumps({str(k): v for k, v in snap.extras.items()}).encode()
+                       if snap.extras else b''),
+        ]
+        layout, offset = {}, 0
+        for name, data in sections:
+            size = memoryview(data).nbytes
+            layout[name] = (offset, size)
+            offset = _aligned(offset + size)
+        header = json.dumps({'n': snap.n, 'cell_deg': snap.cell_deg,
+                             'types': snap.type_names, 'sections': layout}).encode()
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+            base = f.tell()
+            for name, data in sections:
+                f.write(b'\0' * (base + layout[name][0] - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+
+    # write path; callers hold self._lock
+
+    def _install(self, snap, layout_changed=True):
+        self._version += 1
+        if layout_changed:
+            self._layouts += 1
+        snap.version = self._version
+        snap.layout = self._layouts
+        self.current = snap
+        return snap
+
+    def _rows_by_id(self):
+        row_of = self._row_of
+        if row_of is None:
+            with self._lock:
+                if self._row_of is None:
+                    snap = self.current
+                    self._row_of = {snap.ids[r]: r for r in snap.rows()}
+                row_of = self._row_of
+        return row_of
+
+    def _type_codes(self, snap):
+        if self._codes is None:
+            self._codes = {name: i for i, name in enumerate(snap.type_names)}
+        return self._codes
+
+    def _writable(self, snap):
+        """`snap` with appendable columns (a mapped store is copied once)."""
+        if not isinstance(snap.lat, memoryview):
+            return snap
+
+        def copy(typecode, col):
+            out = array(typecode)
+            out.frombytes(col.cast('B'))
+            return out
+        return snap._replace(
+            ids=snap.ids.tolist(), types=copy('B', snap.types),
+            lat=copy('d', snap.lat), lon=copy('d', snap.lon),
+            capacity=copy('i', snap.capacity), extras=dict(snap.extras))
+
+    def _set_cell(self, snap, key, rows, overlay):
+        if overlay is snap.overlay:
+            overlay = dict(overlay)
+        overlay[key] = array('I', rows)
+        return overlay
+
+    def _drop(self, snap, resource_id):
+        row = self._row_of.pop(resource_id, None)
+        if row is None:
+            return snap
+        key = snap._key(snap.lat[row], snap.lon[row])
+        rows = [r for r in snap._cell_rows(key) if r != row]
+        return snap._replace(live=snap.live - 1,
+                             overlay=self._set_cell(snap, key, rows, snap.overlay))
+
+    def _append(self, snap, resource):
+        coords = _coords(resource)
+        if coords is None:
+            return snap, None
+        snap = self._writable(snap)
+        row = snap.n
+        rid = resource.get('id')
+        snap.ids.append(rid)
+        snap.types.append(_type_code(snap.type_names, self._type_codes(snap), resource.get('type')))
+        snap.lat.append(coords[0])
+        snap.lon.append(coords[1])
+        snap.capacity.append(_capacity(resource))
+        extra = _extra(resource)
+        if extra:
+            snap.extras[row] = extra
+        flag = 1 if resource.get('available', True) else 0
+        chunks = list(snap.avail)
+        if chunks and len(chunks[-1]) < CHUNK_SIZE:
+            chunks[-1] = bytearray(chunks[-1])
+            chunks[-1].append(flag)
+        else:
+            chunks.append(bytearray((flag,)))
+        key = snap._key(*coords)
+        overlay = self._set_cell(snap, key, list(snap._cell_rows(key)) + [row], snap.overlay)
+        self._row_of[rid] = row
+        return snap._replace(n=row + 1, live=snap.live + 1, avail=chunks, overlay=overlay), row
+
+    def _publish(self, snap):
+        if len(snap.overlay) > MAX_OVERLAY_CELLS:
+            return self._compact(snap)
+        return self._install(snap)
+
+    def _compact(self, snap):
+        snap = self._install(_layout(self, snap, snap.rows()))
+        self._row_of = {snap.ids[r]: r for r in range(snap.n)}
+        return snap
+
+    # public write API
+
+    def add(self, resource):
+        """
+        Add a resource dict, replacing any resource with the same id.
+        Returns the stored record, or None when it has no usable lat/lon
+        (an existing resource with that id is still removed).
+        """
+        self._rows_by_id()
+        with self._lock:
+            snap = self._drop(self.current, resource.get('id'))
+            snap, row = self._append(snap, resource)
+            snap = self._publish(snap)
+            return None if row is None else snap.get(resource.get('id'))
+
+    def move(self, resource_id, lat, lon):
+        self._rows_by_id()
+        with self._lock:
+            snap = self.current
+            row = snap._row(resource_id)
+            if row is None:
+                return None
+            r = snap.record(row)
+            r['lat'], r['lon'] = lat, lon
+            snap, row = self._append(self._drop(snap, resource_id), r)
+            snap = self._publish(snap)
+            return None if row is None else snap.get(resource_id)
+
+    def set_available(self, resource_id, available=True):
+        """Flip one resource's availability; copies a single chunk."""
+        self._rows_by_id()
+        with self._lock:
+            snap = self.current
+            row = snap._row(resource_id)
+            if row is None:
+                return None
+            flag = 1 if available else 0
+            i, j = row >> CHUNK_BITS, row & CHUNK_MASK
+            if snap.avail[i][j] != flag:
+                chunks = list(snap.avail)
+                chunks[i] = bytearray(chunks[i])
+                chunks[i][j] = flag
+                snap = self._install(snap._replace(avail=chunks), layout_changed=False)
+            return snap.record(row)
+
+    def remove(self, resource_id):
+        self._rows_by_id()
+        with self._lock:
+            snap = self.current
+            row = snap._row(resource_id)
+            if row is None:
+                return None
+            r = snap.record(row)
+            self._publish(self._drop(snap, resource_id))
+            return r
+
+    def compact(self):
+        """Reclaim dead rows and fold the overlay back into row ranges."""
+        self._rows_by_id()
+        with self._lock:
+            return self._compact(self.current)
+
+    def batch_arrays(self, snap=None):
+        """
+        (lat_rad, lon_rad, available, rows) NumPy arrays over the live rows
+        of `snap`, sorted by latitude for banded batch queries. The sorted
+        coordinates are reused until rows are added, moved or removed;
+        availability is regathered per snapshot version.
+        """
+        snap = snap or self.current
+        geo = self._batch
+        if geo is None or geo[0] != snap.layout:
+            ranges = [np.arange(s, e, dtype=np.int64) for k, (s, e) in snap.cells.items()
+                      if k not in snap.overlay]
+            ranges += [np.frombuffer(rows.tobytes(), dtype=np.uint32).astype(np.int64)
+                       for rows in snap.overlay.values()]
+            rows = np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.int64)
+            lat = _np_column(snap.lat, np.float64)[rows]
+            order = np.argsort(lat, kind='stable')
+            rows = rows[order]
+            geo = (snap.layout, np.radians(lat[order]),
+                   np.radians(_np_column(snap.lon, np.float64)[rows]), rows)
+            self._batch = geo
+        avail = self._batch_avail
+        if avail is None or avail[0] != snap.version:
+            flags = np.frombuffer(_flat_avail(snap), dtype=np.uint8)
+            avail = (snap.version, flags[geo[3]].astype(bool))
+            self._batch_avail = avail
+        return geo[1], geo[2], avail[1], geo[3]
+
+
+def main(argv=None):
+    """Convert a JSON-lines inventory (one resource dict per line) into a store file."""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python -m src.tools.resource_store INVENTORY.jsonl OUT.store")
+        return 2
+    with open(argv[0]) as f:
+        store = ResourceStore.from_dicts(json.loads(line) for line in f if line.strip())
+    store.persist(argv[1])
+    print(f"ResourceStore: wrote {len(store.current):,} resources to {argv[1]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# Grid cell geometry for point resources (used by ResourceStore).
+#
+# Points are hashed into fixed-size lat/lon cells. A radius query only visits
+# the cells overlapping the query's bounding box, so the cost depends on how
+# many resources are near the incident rather than on the total inventory.
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.195
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Return great-circle distance between two points (kilometers)."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * \
+        math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def cell_of(lat, lon, cell_deg, lon_cells):
+    """(row, col) of the grid cell holding (lat, lon)."""
+    row = int(math.floor((lat + 90.0) / cell_deg))
+    col = int(math.floor((lon + 180.0) / cell_deg)) % lon_cells
+    return row, col
+
+
+def candidate_cells(lat, lon, radius_km, cell_deg, lon_cells):
+    """Yield the (row, col) cells a `radius_km` circle around (lat, lon) can touch."""
+    dlat = radius_km / KM_PER_DEG_LAT
+    lat_lo = max(-90.0, lat - dlat)
+    lat_hi = min(90.0, lat + dlat)
+    row_lo = cell_of(lat_lo, lon, cell_deg, lon_cells)[0]
+    row_hi = cell_of(lat_hi, lon, cell_deg, lon_cells)[0]
+    # widest longitude span happens at the latitude closest to a pole
+    cos_lat = math.cos(math.radians(max(abs(lat_lo), abs(lat_hi))))
+    if cos_lat <= 1e-9:
+        cols = range(lon_cells)
+    else:
+        dlon = radius_km / (KM_PER_DEG_LAT * cos_lat)
+        if dlon >= 180.0:
+            cols = range(lon_cells)
+        else:
+            col_lo = int(math.floor((lon - dlon + 180.0) / cell_deg))
+            col_hi = int(math.floor((lon + dlon + 180.0) / cell_deg))
+            cols = sorted({c % lon_cells for c in range(col_lo, col_hi + 1)})
+    for row in range(row_lo, row_hi + 1):
+        for col in cols:
+            yield row, col
@@ -1,27 +1,147 @@
 import os
 import json
-from datetime import datetime
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
 import sqlite3
 
 
 DB_PATH = os.getenv('MEMORY_DB', 'memory.db')
+READ_POOL_SIZE = int(os.getenv('MEMORY_READ_POOL', '8'))
 _conn = None
+_conn_lock = threading.Lock()
+_read_pool = None
+# run on the write connection when it is first opened (table setup), so
+# importing a module that needs the schema costs nothing until the DB is used
+_schema_hooks = []
+
+# WAL lets readers run alongside the writer, and with WAL synchronous=NORMAL
+# only fsyncs at checkpoints while staying safe against corruption.
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA busy_timeout=5000',
+)
+
+
+def configure_conn(conn):
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return configure_conn(conn)
+
+
+def open_conn():
+    """A new connection owned by the caller, outside the writer and the read pool."""
+    return _connect()
 
 
 def get_conn():
+    """
+    Return the single write connection. Only the memory writer (which
+    serializes access) and schema setup should use it; reads go through
+    `read_conn()`.
+    """
     global _conn
     if _conn is None:
-        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        _conn.row_factory = sqlite3.Row
+        with _conn_lock:
+            if _conn is None:
+                conn = _connect()
+                for hook in _schema_hooks:
+                    hook(conn)
+                _conn = conn
     return _conn
 
 
+def register_schema(hook):
+    """
+    Call `hook(conn)` with the write connection before anything else uses
+    it (right away if it is already open).
+    """
+    with _conn_lock:
+        _schema_hooks.append(hook)
+        conn = _conn
+    if conn is not None:
+        hook(conn)
+    return hook
+
+
+class ReadPool:
+    """
+    Bounded pool of read-only connections. With WAL, readers see the last
+    committed state and never wait on the writer.
+    """
+
+    def __init__(self, size=READ_POOL_SIZE):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+        conn = _connect()
+        conn.execute('PRAGMA query_only=ON')
+        return conn
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+
+@contextmanager
+def read_conn():
+    global _read_pool
+    if DB_PATH == ':memory:':
+        # every in-memory connection is its own database; share the writer's
+        yield get_conn()
+        return
+    if _read_pool is None:
+        # readers need the tables that opening the writer creates
+        get_conn()
+        with _conn_lock:
+            if _read_pool is None:
+                _read_pool = ReadPool()
+    conn = _read_pool.acquire()
+    try:
+        yield conn
+    finally:
+        _read_pool.release(conn)
+
+
 def now_iso():
 
 
     return datetime.utcnow().isoformat() + 'Z'
 
 
+def epoch(ts):
+    """Seconds since the epoch for a `now_iso()` timestamp; 0.0 if missing or unparsable."""
+    if not ts:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(ts.rstrip('Z'))
+    except ValueError:
+        return 0.0
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
 def save_json_field(obj):
 
 
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+import pytest
+
+# every module reads its configuration at import, so point the memory bank
+# at a scratch database before anything from src is imported
+os.environ.setdefault("MEMORY_DB", os.path.join(tempfile.mkdtemp(prefix="cr-test-"), "memory.db"))
+os.environ.setdefault("GEOCODE_UPSTREAM", "0")
+os.environ.setdefault("METRICS_ENABLED", "0")
+
+
+@pytest.fixture
+def inventory():
+    """Swap in a resource inventory for one test: inventory([resource, ...])."""
+    from src.tools import resource_db
+    saved = resource_db.resources
+
+    def install(resources):
+        resource_db.resources = resources
+        resource_db.rebuild_index()
+    yield install
+    install(saved)
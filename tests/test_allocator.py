@@ -0,0 +1,67 @@
+from src.tools.allocator import AllocationEngine
+
+VOLUNTEERS = {"high": {"volunteer": 2}, "medium": {"volunteer": 1}, "low": {}}
+
+
+def incident(i, severity="high"):
+    return {"id": f"inc-{i}", "severity": severity, "lat": 20.5, "lon": 72.5}
+
+
+def one_volunteer_group(inventory, capacity=10):
+    inventory([{"id": "vol-1", "type": "volunteer", "lat": 20.5, "lon": 72.5,
+                "available": True, "capacity": capacity}])
+
+
+def test_one_resource_fills_several_units(inventory):
+    one_volunteer_group(inventory)
+    engine = AllocationEngine(demand=VOLUNTEERS)
+    for i in range(5):
+        assert [r["id"] for r in engine.allocate(incident(i))] == ["vol-1", "vol-1"]
+    assert engine.unmet() == {}
+    assert engine.remaining("vol-1") == 0
+    assert engine.allocate(incident(5)) == []
+    assert engine.unmet() == {"inc-5": {"volunteer": 2}}
+
+
+def test_release_serves_unmet_incidents(inventory):
+    one_volunteer_group(inventory, capacity=2)
+    engine = AllocationEngine(demand=VOLUNTEERS)
+    engine.allocate(incident(0))
+    engine.allocate(incident(1))
+    assert len(engine.release("inc-0", retry=False)) == 2
+    gained = engine.retry_unmet()
+    assert [r["id"] for r in gained["inc-1"]] == ["vol-1", "vol-1"]
+    assert engine.unmet() == {}
+
+
+def test_low_incidents_leave_no_state(inventory):
+    one_volunteer_group(inventory)
+    engine = AllocationEngine(demand=VOLUNTEERS)
+    for i in range(100):
+        assert engine.allocate(incident(i, "low")) == []
+    assert engine._assigned == {} and engine._since == {}
+
+
+def test_expired_holds_are_released(inventory):
+    one_volunteer_group(inventory, capacity=2)
+    engine = AllocationEngine(demand=VOLUNTEERS, hold_s=60)
+    engine.allocate(incident(0))
+    engine.allocate(incident(1))
+    assert engine.expire(now=engine._since["inc-0"] + 61) == ["inc-0", "inc-1"]
+    assert engine.remaining("vol-1") == 2 and engine.unmet() == {}
+
+
+def test_restore_does_not_double_assign(inventory):
+    one_volunteer_group(inventory, capacity=3)
+    persisted = [
+        dict(incident(0), allocation={"volunteer": [{"id": "vol-1"}, {"id": "vol-1"}]}),
+        # stored by the agent pipeline as plain ids, one short of its demand
+        dict(incident(1), allocation={"volunteer": ["vol-1"]}),
+    ]
+    engine = AllocationEngine(demand=VOLUNTEERS)
+    assert engine.restore(persisted) == 2
+    assert engine.remaining("vol-1") == 0
+    assert engine.unmet() == {"inc-1": {"volunteer": 1}}
+    assert engine.allocate(incident(2)) == []
+    engine.release("inc-0", retry=False)
+    assert [r["id"] for r in engine.retry_unmet()["inc-1"]] == ["vol-1", "vol-1"]
@@ -0,0 +1,42 @@
+import json
+
+from benchmarks import suite
+
+
+def report(**values):
+    return {"schema": suite.SCHEMA_VERSION, "meta": {"quick": True},
+            "metrics": {name: {"value": v, "unit": u, "better": b} for name, (v, u, b) in values.items()}}
+
+
+def test_compare_orients_changes_so_positive_is_better():
+    old = report(rate=(1000, "ops/s", "higher"), latency=(10, "us", "lower"),
+                 steady=(5, "ms", "lower"), zero=(0, "ms", "lower"), gone=(1, "ms", "lower"))
+    new = report(rate=(800, "ops/s", "higher"), latency=(8, "us", "lower"),
+                 steady=(5.2, "ms", "lower"), zero=(3, "ms", "lower"), added=(1, "ms", "lower"))
+    rows = {name: (change, status) for name, _, _, change, status in suite.compare(old, new, 0.1)}
+    assert rows["rate"][1] == "regressed" and round(rows["rate"][0], 3) == -0.2
+    assert rows["latency"][1] == "improved" and round(rows["latency"][0], 3) == 0.2
+    assert rows["steady"][1] == "ok"
+    assert rows["zero"] == (0.0, "ok")
+    assert rows["gone"] == (None, "missing") and rows["added"] == (None, "new")
+
+
+def test_compare_exits_nonzero_only_on_regressions(tmp_path):
+    paths = {}
+    for label, latency in (("base", 10), ("same", 10.5), ("slow", 20)):
+        paths[label] = tmp_path / f"{label}.json"
+        paths[label].write_text(json.dumps(report(latency=(latency, "us", "lower"))))
+    assert suite.main(["compare", str(paths["base"]), str(paths["same"])]) == 0
+    assert suite.main(["compare", str(paths["base"]), str(paths["slow"])]) == 1
+    assert suite.main(["compare", str(paths["base"]), str(paths["slow"]), "--threshold", "2"]) == 0
+
+
+def test_run_writes_a_report_compare_accepts(tmp_path):
+    out = tmp_path / "results.json"
+    assert suite.main(["run", "--quick", "--only", "find_nearby", "--out", str(out)]) == 0
+    result = json.loads(out.read_text())
+    assert result["schema"] == suite.SCHEMA_VERSION
+    assert result["meta"]["cases"] == ["find_nearby"] and result["meta"]["repeats"] == 1
+    assert result["metrics"] and all(m["better"] in ("higher", "lower") and len(m["samples"]) == 1
+                                     for m in result["metrics"].values())
+    assert all(status == "ok" for *_, status in suite.compare(result, result))
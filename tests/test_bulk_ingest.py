@@ -0,0 +1,131 @@
+import json
+import os
+import random
+import resource
+import uuid
+
+from src import bulk_ingest
+from src.agents.receiver import ReceiverAgent
+from src.bulk_ingest import BulkIngestor, ingest_file, read_feed, to_utc
+from src.memory import memory_bank
+from src.tools.dedup import Deduplicator
+from src.utils import read_conn
+
+# the benchmark's 1M-line fixture takes about 15 minutes; the suite runs it
+# scaled down unless BULK_FIXTURE_LINES=1000000
+FIXTURE_LINES = int(os.getenv("BULK_FIXTURE_LINES", "20000"))
+
+
+def ingestor(dedup=False, **kwargs):
+    return BulkIngestor(receiver=ReceiverAgent(dedup=Deduplicator(enabled=dedup, **kwargs)))
+
+
+def stored(incident_id):
+    memory_bank.flush()
+    with read_conn() as conn:
+        row = conn.execute("SELECT created_at, raw_json FROM incidents WHERE id=?", (incident_id,)).fetchone()
+    return row["created_at"], memory_bank.decode_raw(row["raw_json"])
+
+
+def incident_id(source, key):
+    return str(uuid.uuid5(bulk_ingest._ID_NAMESPACE, f"bulk:{source}:{key}"))
+
+
+def test_timestamps_are_normalized_to_iso_utc():
+    assert to_utc("Sun, 01 Mar 2026 10:00:00 +0530") == "2026-03-01T04:30:00Z"
+    assert to_utc("2026-03-01T10:00:00+02:00") == "2026-03-01T08:00:00Z"
+    assert to_utc("2026-03-01T10:00:00Z") == "2026-03-01T10:00:00Z"
+    assert to_utc("1772359200") == "2026-03-01T10:00:00Z"
+    assert to_utc(1772359200.5) == "2026-03-01T10:00:00.500000Z"
+    assert to_utc("20240101") == "2024-01-01T00:00:00Z"
+    assert to_utc("2024-01-01") == "2024-01-01T00:00:00Z"
+    # a bare year, or a number too small to be a recent epoch, is not a time
+    assert to_utc("2024") is None
+    assert to_utc("86400") is None
+    assert to_utc("yesterday") is None
+
+
+def test_ragged_csv_rows_are_ingested(tmp_path):
+    path = tmp_path / f"export-{uuid.uuid4().hex}.csv"
+    path.write_text("id,text,place\n"
+                    "r1,flood water rising near the school,Ward 4\n"
+                    "r2,bridge collapsed on the river road,Ward 9,extra,cells\n"
+                    "r3,short row\n", encoding="utf-8")
+    stats = ingest_file(str(path), ingestor=ingestor())
+    assert (stats["rows"], stats["incidents"], stats["invalid"]) == (3, 3, 0)
+    _, raw = stored(incident_id(path.name, "r2"))
+    assert raw["_extra"] == ["extra", "cells"]
+
+
+def test_feed_items_keep_their_time_in_utc_and_are_released(tmp_path, monkeypatch):
+    items = "".join(
+        f"<item><guid>g{i}</guid><title>Flood {i}</title><description>water rising in ward {i}"
+        f"</description><pubDate>Sun, 01 Mar 2026 10:{i % 60:02d}:00 +0530</pubDate></item>"
+        for i in range(500))
+    path = tmp_path / f"feed-{uuid.uuid4().hex}.xml"
+    path.write_text(f"<rss><channel><title>alerts</title>{items}</channel></rss>", encoding="utf-8")
+
+    starts = []
+    iterparse = bulk_ingest.ET.iterparse
+
+    def spy(*args, **kwargs):
+        for event, elem in iterparse(*args, **kwargs):
+            if event == "start":
+                starts.append(elem)
+            yield event, elem
+    monkeypatch.setattr(bulk_ingest.ET, "iterparse", spy)
+    assert sum(1 for _ in read_feed(str(path))) == 500
+    channel = starts[1]
+    assert [child.tag for child in channel] == ["title"]
+
+    monkeypatch.undo()
+    ingest_file(str(path), ingestor=ingestor())
+    created_at, _ = stored(incident_id(path.name, "g7"))
+    assert created_at == "2026-03-01T04:37:00Z"
+
+
+def test_duplicates_are_judged_by_report_time(tmp_path):
+    lat, lon = random.uniform(40, 60), random.uniform(-10, 30)
+    text = "water entering houses near the old bridge road"
+    rows = [
+        {"id": "a", "text": text, "lat": lat, "lon": lon, "created_at": "2026-02-01T08:00:00Z"},
+        # same words an hour later: merged
+        {"id": "b", "text": text, "lat": lat, "lon": lon, "created_at": "2026-02-01T09:00:00Z"},
+        # two days later: outside the window, a new incident
+        {"id": "c", "text": text, "lat": lat, "lon": lon, "created_at": "2026-02-03T09:00:00Z"},
+    ]
+    path = tmp_path / f"reports-{uuid.uuid4().hex}.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    stats = ingest_file(str(path), ingestor=ingestor(dedup=True))
+    assert (stats["incidents"], stats["merged"]) == (2, 1)
+    memory_bank.flush()
+    merged = memory_bank.list_reports(incident_id(path.name, "a"))
+    assert [r["id"] for r in merged] == [incident_id(path.name, "b")]
+
+
+def test_fixture_imports_every_line_once_in_bounded_memory(tmp_path):
+    from benchmarks.bench_bulk_ingest import write_fixture
+    path = tmp_path / f"fixture-{uuid.uuid4().hex}.jsonl"
+    write_fixture(str(path), FIXTURE_LINES, random.Random(21))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+    # the deduplicator holds up to max_clusters clusters by design (50k by
+    # default); capped lower, nothing else may grow with the file
+    first = ingest_file(str(path), ingestor=ingestor(dedup=True, max_clusters=2000))
+    assert (first["rows"], first["invalid"], first["skipped"]) == (FIXTURE_LINES, 0, 0)
+    assert first["incidents"] + first["merged"] == FIXTURE_LINES
+    found = 0
+    with read_conn() as conn:
+        for start in range(0, FIXTURE_LINES, 500):
+            chunk = [incident_id(path.name, f"row-{i}") for i in range(start, min(start + 500, FIXTURE_LINES))]
+            marks = ",".join("?" * len(chunk))
+            found += conn.execute(f"SELECT COUNT(*) FROM incidents WHERE id IN ({marks})", chunk).fetchone()[0]
+            found += conn.execute(f"SELECT COUNT(*) FROM incident_reports WHERE id IN ({marks})",
+                                  chunk).fetchone()[0]
+    assert found == FIXTURE_LINES
+
+    # a re-run finds every line already imported and writes nothing
+    second = ingest_file(str(path), ingestor=ingestor(dedup=True, max_clusters=2000))
+    assert (second["skipped"], second["incidents"], second["merged"]) == (FIXTURE_LINES, 0, 0)
+    # rows stream through in chunks: memory does not grow with the file
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0 - rss_before < 128
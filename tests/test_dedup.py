@@ -0,0 +1,64 @@
+import random
+
+from src.agents.receiver import ReceiverAgent
+from src.memory import memory_bank
+from src.tools.dedup import Deduplicator
+
+
+def site():
+    # somewhere no other test reports, so warm-up never finds their clusters
+    rnd = random.Random()
+    return rnd.uniform(40.0, 60.0), rnd.uniform(-10.0, 30.0)
+
+
+def nearby(lat, lon, metres=100):
+    return lat + metres / 111_000, lon
+
+
+def test_loosely_similar_reports_stay_apart():
+    # true Jaccard 2/6 = 0.33, under the 0.4 threshold; the 16-value MinHash
+    # estimate of this pair is 0.44
+    dedup = Deduplicator()
+    lat, lon = site()
+    head, _ = dedup.observe("a", "Fire and people trapped", lat=lat, lon=lon)
+    other, _ = dedup.observe("b", "building collapsed people trapped", *nearby(lat, lon))
+    assert (head, other) == ("a", "b")
+
+
+def test_similar_reports_merge():
+    dedup = Deduplicator()
+    lat, lon = site()
+    dedup.observe("a", "water entering houses near the old bridge road", lat=lat, lon=lon)
+    head, reports = dedup.observe("b", "water entering houses near old bridge road now",
+                                  *nearby(lat, lon))
+    assert (head, reports) == ("a", 2)
+
+
+def test_more_severe_report_is_not_folded_into_a_milder_incident():
+    receiver = ReceiverAgent(dedup=Deduplicator())
+    lat, lon = site()
+    first, second = receiver.receive_many([
+        {"text": "smoke near the old market area", "lat": lat, "lon": lon},
+        {"text": "smoke near the old market area, building collapsed, people trapped",
+         "lat": nearby(lat, lon)[0], "lon": lon},
+    ])
+    assert not second.get("duplicate_of")
+    assert second["id"] != first["id"]
+
+
+def test_duplicates_are_stored_under_their_incident():
+    receiver = ReceiverAgent(dedup=Deduplicator())
+    lat, lon = site()
+    head, dup = receiver.receive_many([
+        {"text": "building collapsed near the old market, people trapped", "lat": lat, "lon": lon,
+         "reporter": "first"},
+        {"text": "old market building collapsed, people trapped inside", "lat": nearby(lat, lon)[0],
+         "lon": lon, "reporter": "second", "raw": {"source": "sms"}},
+    ])
+    assert dup["duplicate_of"] == head["id"]
+    memory_bank.flush()
+    reports = memory_bank.list_reports(head["id"])
+    assert [(r["id"], r["reporter"], r["text"]) for r in reports] == [
+        (dup["id"], "second", "old market building collapsed, people trapped inside")]
+    assert reports[0]["severity"] == "high"
+    assert reports[0]["raw_json"] == {"source": "sms"}
@@ -0,0 +1,69 @@
+import json
+import uuid
+
+import pytest
+
+from src.feed import EventFeed, FeedReset, SharedEventFeed
+
+
+def event(**fields):
+    return dict({"id": str(uuid.uuid4()), "stage": "Triaged", "timeline": [{"label": "Resource", "ts": None}]},
+                **fields)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def feed(request):
+    return EventFeed(maxlen=5) if request.param == "memory" else SharedEventFeed(maxlen=5)
+
+
+def test_update_publishes_a_copy(feed):
+    first = event()
+    feed.publish(first)
+    before = feed.get(first["id"])
+    listed = feed.events()
+    old_entries = feed.since(feed.last_seq - 1)
+
+    def allocated(ev):
+        ev["stage"] = "Resources ready"
+        ev["timeline"][-1]["ts"] = "now"
+    updated = feed.update(first["id"], allocated)
+
+    assert updated["stage"] == "Resources ready"
+    assert feed.get(first["id"])["timeline"][-1]["ts"] == "now"
+    # nothing handed out earlier changes underneath its reader
+    assert before["stage"] == listed[0]["stage"] == first["stage"] == "Triaged"
+    assert before["timeline"][-1]["ts"] is None
+    assert json.loads(old_entries[0].json)["stage"] == "Triaged"
+
+
+def test_readers_get_their_own_copies(feed):
+    first = event()
+    feed.publish(first)
+    feed.get(first["id"])["stage"] = "Changed"
+    feed.events()[0]["stage"] = "Changed"
+    first["stage"] = "Changed"
+    assert feed.get(first["id"])["stage"] == "Triaged"
+
+
+def test_gap_older_than_the_buffer_gets_a_reset(feed):
+    feed.publish(event())
+    start = feed.last_seq
+    ids = []
+    for _ in range(12):
+        ev = event()
+        ids.append(ev["id"])
+        feed.publish(ev)
+    # covered by the buffer: a plain delta
+    assert not isinstance(feed.since(feed.last_seq - 2)[0], FeedReset)
+    (reset,) = feed.since(start)
+    assert isinstance(reset, FeedReset) and reset.seq == feed.last_seq
+    body = json.loads(feed.encode([reset], start))
+    assert body["reset"] and body["last_id"] == feed.last_seq
+    assert [e["id"] for e in body["events"]] == ids[::-1][:5]
+    assert reset.frame.startswith(f"id: {feed.last_seq}\nevent: reset\n".encode())
+
+
+def test_unknown_future_position_gets_a_reset(feed):
+    feed.publish(event())
+    (reset,) = feed.since(feed.last_seq + 1000)
+    assert isinstance(reset, FeedReset)
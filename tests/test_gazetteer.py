@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from src.tools import gazetteer
+from src.tools.geocode import GeocodeService, TokenBucket
+from src.tools.geocode_cache import GeocodeCache
+
+PLACES = [("Ahmedabad", 23.0225, 72.5714, 5_570_000), ("Surat", 21.1702, 72.8311, 4_460_000),
+          ("Vadodara", 22.3072, 73.1812, 1_670_000), ("Rajkot", 22.3039, 70.8022, 1_290_000)]
+
+
+@pytest.fixture(scope="module")
+def gaz(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("gaz") / "gazetteer.idx")
+    gazetteer.build(PLACES, path)
+    return gazetteer.Gazetteer(path)
+
+
+class GatedFuzzy:
+    """The test index, with fuzzy lookups recorded and held until released."""
+
+    def __init__(self, gaz):
+        self.gaz = gaz
+        self.release = threading.Event()
+        self.threads = []
+
+    def __call__(self, place_text):
+        return self.gaz(place_text)
+
+    def fuzzy_geocode(self, place_text):
+        self.threads.append(threading.current_thread().name)
+        self.release.wait(5)
+        return self.gaz.fuzzy_geocode(place_text)
+
+
+def service(offline):
+    return GeocodeService(backend=None, limiter=TokenBucket(rate=1000.0, burst=100),
+                          cache=GeocodeCache(), offline=offline)
+
+
+def test_exact_names_answer_inline_and_typos_on_a_worker(gaz):
+    offline = GatedFuzzy(gaz)
+    svc = service(offline)
+    try:
+        assert svc.submit("Ward 4, Surat").result(0) == pytest.approx((21.1702, 72.8311), abs=1e-4)
+        typo = svc.submit("Vadodra")
+        assert not typo.done()
+        offline.release.set()
+        assert typo.result(5) == pytest.approx((22.3072, 73.1812), abs=1e-4)
+        assert offline.threads and offline.threads[0].startswith("geocode")
+        assert svc.stats["offline"] == 2
+    finally:
+        svc.shutdown()
+
+
+def test_truncated_names_resolve_by_prefix(gaz):
+    assert [m.name for m in gaz.prefix("ra")] == ["rajkot"]
+    assert gaz.fuzzy("Vado", limit=1, min_similarity=gazetteer.MATCH_MIN_SIMILARITY) == []
+    assert gaz.fuzzy_geocode("Vado") == pytest.approx((22.3072, 73.1812), abs=1e-4)
+    assert gaz.match("Ahmed").name == "ahmedabad"
+    # too little of any name to be a match
+    assert gaz.fuzzy_geocode("Va") is None
+    assert gaz("Vado") is None
+
+
+def test_missing_index_is_not_looked_up_on_every_call(monkeypatch, tmp_path):
+    calls = []
+    exists = gazetteer.os.path.exists
+    monkeypatch.setattr(gazetteer, "GAZETTEER_PATH", str(tmp_path / "missing.idx"))
+    monkeypatch.setattr(gazetteer, "_gazetteer", None)
+    monkeypatch.setattr(gazetteer, "_missing_until", 0.0)
+    monkeypatch.setattr(gazetteer.os.path, "exists", lambda p: calls.append(p) or exists(p))
+    for _ in range(100):
+        assert gazetteer.get_gazetteer() is None
+    assert len(calls) == 1
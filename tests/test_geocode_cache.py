@@ -0,0 +1,59 @@
+import time
+import uuid
+
+from src.memory import memory_bank
+from src.tools.geocode_cache import GeocodeCache, LRUCache, normalize_place
+
+
+def place():
+    return f"Ward {uuid.uuid4().hex[:8]}, Surat"
+
+
+def test_spellings_of_one_place_share_an_entry():
+    assert normalize_place("  Ward 4,\tSURAT. ") == normalize_place("ward 4, surat") == "ward 4, surat"
+    cache = GeocodeCache()
+    name = place()
+    cache.put(name, 21.17, 72.83)
+    assert cache.get(f"  {name.upper()}.") == (21.17, 72.83)
+
+
+def test_lru_evicts_the_least_recently_used_and_expires_entries():
+    lru = LRUCache(maxsize=2)
+    now = time.time()
+    lru.put("a", 1, now + 60)
+    lru.put("b", 2, now + 60)
+    assert lru.get("a", now) == 1
+    lru.put("c", 3, now + 60)
+    assert lru.get("b", now) is None and lru.evictions == 1
+    assert lru.get("a", now + 61) is None and lru.expired == 1
+    assert len(lru) == 1
+
+
+def test_second_tier_survives_a_new_process():
+    name = place()
+    GeocodeCache().put(name, 21.17, 72.83)
+    memory_bank.flush()
+    fresh = GeocodeCache()
+    assert fresh.get(name) == (21.17, 72.83)
+    assert fresh.db_hits == 1 and fresh.lru.hits == 0
+    assert fresh.get(name) == (21.17, 72.83) and fresh.lru.hits == 1
+    # past its TTL the table row no longer answers
+    assert GeocodeCache(ttl_s=0).get(name) is None
+    warmed = GeocodeCache()
+    assert warmed.warm() >= 1 and warmed.get(name) == (21.17, 72.83) and warmed.db_hits == 0
+
+
+def test_misses_and_stubs_are_kept_briefly():
+    name = place()
+    cache = GeocodeCache(retry_ttl_s=60)
+    cache.put_miss(name)
+    assert cache.get(name) == (None, None)
+    memory_bank.flush()
+    # misses stay in memory; another process looks the place up again
+    assert GeocodeCache().get(name) is None
+
+    stub = place()
+    cache.put(stub, 1.0, 2.0, source="stub")
+    memory_bank.flush()
+    assert GeocodeCache(retry_ttl_s=60).get(stub) == (1.0, 2.0)
+    assert GeocodeCache(retry_ttl_s=0).get(stub) is None
@@ -0,0 +1,70 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.memory import memory_bank
+
+
+@pytest.fixture(scope="module")
+def db():
+    """A populated, ANALYZEd incidents table with the production schema."""
+    rnd = random.Random(1)
+    conn = sqlite3.connect(":memory:")
+    conn.execute(memory_bank.INCIDENTS_TABLE)
+    for index in memory_bank.INCIDENT_INDEXES:
+        conn.execute(index)
+    base = datetime(2026, 1, 1)
+    rows = []
+    for i in range(20_000):
+        created = base + timedelta(seconds=i * 8)
+        triaged = None if i % 10 == 0 else (created + timedelta(seconds=3)).isoformat() + "Z"
+        rows.append((f"inc-{i:08d}", created.isoformat() + "Z", "test", "report text",
+                     rnd.uniform(8.0, 32.0), rnd.uniform(68.0, 88.0),
+                     rnd.choice(["high", "medium", "low", "low"]), triaged, "{}"))
+    conn.executemany("INSERT INTO incidents(id, created_at, reporter, text, lat, lon, "
+                     "severity, triage_ts, raw_json) VALUES (?,?,?,?,?,?,?,?,?)", rows)
+    conn.execute("ANALYZE")
+    yield conn
+    conn.close()
+
+
+def plan(conn, **kwargs):
+    sql, params = memory_bank._incident_query(25, **kwargs)
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"since": "2026-01-02T00:00:00Z"},
+    {"since": "2026-01-01T06:00:00Z", "until": "2026-01-01T07:00:00Z"},
+    {"cursor": "2026-01-02T00:00:00Z|inc-00010000"},
+    {"raw": False},
+])
+def test_keyset_queries_walk_the_sort_index(db, kwargs):
+    steps = plan(db, **kwargs)
+    assert any("idx_incidents_sort" in step for step in steps), steps
+    assert not any("TEMP B-TREE" in step for step in steps), steps
+
+
+def test_severity_filter_uses_the_severity_index(db):
+    steps = plan(db, severity="high")
+    assert any("idx_incidents_severity_sort" in step for step in steps), steps
+    assert not any("TEMP B-TREE" in step for step in steps), steps
+
+
+def test_bbox_is_narrowed_by_an_index(db):
+    steps = plan(db, bbox=(20.0, 72.0, 21.0, 73.0))
+    assert any("USING INDEX" in step for step in steps), steps
+
+
+def test_keyset_pages_do_not_overlap(db):
+    seen, cursor = set(), None
+    for _ in range(5):
+        sql, params = memory_bank._incident_query(25, cursor=cursor)
+        rows = db.execute(sql, params).fetchall()
+        ids = [row[0] for row in rows]
+        assert len(ids) == 25 and not seen.intersection(ids)
+        seen.update(ids)
+        cursor = f"{rows[-1][-1]}|{rows[-1][0]}"
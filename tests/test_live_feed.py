@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+import uuid
+
+import pytest
+
+from src import app as app_module
+from src.utils import now_iso
+
+
+@pytest.fixture
+def client():
+    return app_module.create_app(profiler=False).test_client()
+
+
+def publish(text="road flooded near the school"):
+    incident = {"id": str(uuid.uuid4()), "reporter": "test", "text": text, "severity": "medium",
+                "created_at": now_iso(), "triage_ts": now_iso()}
+    return app_module._record_event(incident, {}, source="test")
+
+
+def test_since_returns_only_newer_events(client):
+    client.get("/")  # boots the feed
+    last = client.get("/api/stream").get_json()["last_id"]
+    first, second = publish(), publish()
+    body = client.get(f"/api/stream?since={last}").get_json()
+    assert [e["id"] for e in body["events"]] == [second["id"], first["id"]]
+    assert body["last_id"] == last + 2
+    # EventSource reconnects send Last-Event-ID instead of `since`
+    body = client.get("/api/stream", headers={"Last-Event-ID": str(last + 1)}).get_json()
+    assert [e["id"] for e in body["events"]] == [second["id"]]
+    assert client.get(f"/api/stream?since={last + 2}").get_json() == {"events": [], "last_id": last + 2}
+
+
+def test_long_poll_returns_as_soon_as_an_event_arrives(client):
+    client.get("/")
+    last = client.get("/api/stream").get_json()["last_id"]
+    timer = threading.Timer(0.2, publish)
+    timer.start()
+    start = time.monotonic()
+    body = client.get(f"/api/stream?since={last}&wait=10").get_json()
+    assert time.monotonic() - start < 5
+    assert len(body["events"]) == 1 and body["last_id"] == last + 1
+    timer.join()
+
+
+def test_sse_sends_frames_after_the_given_id(client):
+    client.get("/")
+    last = client.get("/api/stream").get_json()["last_id"]
+    event = publish()
+    response = client.get(f"/api/stream/sse?since={last}", buffered=False)
+    try:
+        assert response.mimetype == "text/event-stream"
+        frames = iter(response.response)
+        assert next(frames) == b"retry: 3000\n\n"
+        frame = next(frames).decode()
+        assert frame.startswith(f"id: {last + 1}\n")
+        data = [line[len("data: "):] for line in frame.splitlines() if line.startswith("data: ")]
+        assert json.loads("".join(data))["id"] == event["id"]
+    finally:
+        response.close()
+
+
+def test_dashboard_etag_changes_only_with_the_feed(client):
+    first = client.get("/")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag
+    again = client.get("/", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag and not again.data
+    publish()
+    changed = client.get("/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
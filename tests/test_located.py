@@ -0,0 +1,87 @@
+import threading
+import uuid
+
+import pytest
+
+from src import app as app_module
+from src.memory import memory_bank
+from src.tools import geocode
+from src.tools.allocator import get_engine
+from src.tools.dedup import Deduplicator
+
+SITE = (20.5, 72.5)
+
+
+class GatedGeocoder:
+    """Local stand-in for the upstream geocoder that answers once released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def __call__(self, place_text):
+        self.release.wait(5)
+        return SITE
+
+
+@pytest.fixture
+def deferred(inventory, monkeypatch):
+    inventory([{"id": "vol-1", "type": "volunteer", "lat": SITE[0], "lon": SITE[1],
+                "available": True, "capacity": 4}])
+    get_engine().reset()
+    backend = GatedGeocoder()
+    saved = geocode.get_service()
+    geocode.set_service(geocode.GeocodeService(
+        backend=backend, offline=lambda place: None,
+        limiter=geocode.TokenBucket(rate=1000.0, burst=100)))
+    monkeypatch.setattr(app_module.receiver_agent, "dedup", Deduplicator(enabled=False))
+    located = threading.Event()
+    app_module.receiver_agent.located_listeners.append(lambda inc: located.set())
+    yield backend, located
+    app_module.receiver_agent.located_listeners.pop()
+    geocode.get_service().shutdown()
+    geocode.set_service(saved)
+    get_engine().reset()
+
+
+def report():
+    # a fresh place every time, so the geocode cache never answers inline
+    return {"reporter": "test", "text": "building collapsed, people trapped",
+            "place_text": f"Ward {uuid.uuid4().hex}, Surat"}
+
+
+def stored_allocation(incident_id):
+    memory_bank.flush()
+    for row in memory_bank.list_incidents(limit=200, raw=False):
+        if row["id"] == incident_id:
+            return row["allocation"]
+    return None
+
+
+def wait(located):
+    # listeners run in order on the geocode thread, so the app's is done
+    assert located.wait(5)
+
+
+def test_allocation_follows_late_coordinates(deferred):
+    backend, located = deferred
+    event = app_module._process_incident(report())
+    assert event["lat"] is None and not event["allocation"]
+    backend.release.set()
+    wait(located)
+    live = app_module.FEED.get(event["id"])
+    assert (live["lat"], live["lon"]) == SITE
+    assert live["stage"] == "Resources ready"
+    assert [r["id"] for r in live["allocation"]["volunteer"]] == ["vol-1", "vol-1"]
+    assert stored_allocation(event["id"]) == live["allocation"]
+
+
+def test_allocation_saved_after_event_left_the_feed(deferred):
+    backend, located = deferred
+    event = app_module._process_incident(report())
+    for i in range(80):
+        app_module.FEED.publish({"id": f"filler-{uuid.uuid4().hex}", "stage": "Triaged", "timeline": []})
+    assert app_module.FEED.get(event["id"]) is None
+    backend.release.set()
+    wait(located)
+    allocation = stored_allocation(event["id"])
+    assert [r["id"] for r in allocation["volunteer"]] == ["vol-1", "vol-1"]
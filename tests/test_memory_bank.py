@@ -0,0 +1,40 @@
+import json
+import uuid
+
+from src.memory import memory_bank
+from src.utils import read_conn
+
+
+def incident():
+    return {"id": str(uuid.uuid4()), "reporter": "test", "text": "road flooded", "severity": "medium"}
+
+
+def stored_allocation(incident_id):
+    memory_bank.flush()
+    with read_conn() as conn:
+        row = conn.execute("SELECT allocation_json FROM incidents WHERE id=?", (incident_id,)).fetchone()
+    return json.loads(row["allocation_json"]) if row["allocation_json"] else None
+
+
+def test_allocation_folds_into_a_pending_insert():
+    inc = incident()
+    memory_bank.save_incident(inc)
+    memory_bank.save_allocation(inc["id"], {"volunteer": ["vol-1"]})
+    assert stored_allocation(inc["id"]) == {"volunteer": ["vol-1"]}
+
+
+def test_resaved_incident_keeps_a_pending_allocation():
+    inc = incident()
+    memory_bank.save_incident(inc)
+    memory_bank.flush()
+    memory_bank.save_allocation(inc["id"], {"volunteer": ["vol-2"]})
+    memory_bank.save_incident(dict(inc, severity="high"))
+    assert stored_allocation(inc["id"]) == {"volunteer": ["vol-2"]}
+
+
+def test_newer_allocation_wins_over_a_pending_one():
+    inc = dict(incident(), allocation={"volunteer": ["vol-1"]})
+    memory_bank.save_incident(inc)
+    memory_bank.save_allocation(inc["id"], {"shelter": ["sh-1"]})
+    memory_bank.save_incident(dict(inc, allocation=None))
+    assert stored_allocation(inc["id"]) == {"shelter": ["sh-1"]}
@@ -0,0 +1,47 @@
+import re
+import uuid
+
+from src import app as app_module
+from src import metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+def scrape():
+    response = app_module.create_app(profiler=False).test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    return response.get_data(as_text=True)
+
+
+def test_metrics_are_valid_prometheus_text():
+    families = {}
+    for line in scrape().splitlines():
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            kind, name = line.split(" ", 3)[1:3]
+            families.setdefault(name, set()).add(kind)
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name = match.group(1)
+        if name not in families:  # histogram series
+            name = re.sub(r"_(bucket|sum|count)$", "", name)
+        assert families.get(name) == {"HELP", "TYPE"}, line
+        float(match.group(3))
+    assert "crelief_scheduler_queue_depth" in families and "crelief_queue_wait_seconds" in families
+
+
+def test_queue_wait_histogram_is_cumulative():
+    queue = f'q-{uuid.uuid4().hex[:6]}"x'
+    child = metrics.QUEUE_SECONDS.labels(queue, "high")
+    for seconds in (0.0002, 0.002, 0.002, 45.0):
+        child.observe(seconds)
+    labels = 'queue="%s",severity="high"' % queue.replace('"', '\\"')
+    lines = [line for line in scrape().splitlines() if labels in line]
+    buckets = {re.search(r'le="([^"]+)"', line).group(1): int(line.rsplit(" ", 1)[1])
+               for line in lines if "_bucket" in line}
+    assert buckets["0.0001"] == 0 and buckets["0.00025"] == 1 and buckets["0.0025"] == 3
+    assert buckets["30.0"] == 3 and buckets["60.0"] == 4 and buckets["+Inf"] == 4
+    assert f"crelief_queue_wait_seconds_count{{{labels}}} 4" in lines
+    total = next(float(line.rsplit(" ", 1)[1]) for line in lines if "_sum" in line)
+    assert abs(total - 45.0042) < 1e-9
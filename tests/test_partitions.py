@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+import time
+import uuid
+
+from src.memory import memory_bank, partitions
+from src.tools.dedup import Deduplicator
+from src.utils import read_conn
+
+
+def seen(item_hash):
+    with read_conn() as conn:
+        return conn.execute("SELECT 1 FROM seen_items WHERE item_hash=?", (item_hash,)).fetchone() is not None
+
+
+def test_bulk_markers_outlive_seen_markers():
+    marker = f"{memory_bank.BULK_SEEN_PREFIX}export.csv:{uuid.uuid4().hex}"
+    plain = uuid.uuid4().hex
+    memory_bank.mark_seen(marker)
+    memory_bank.mark_seen(plain)
+    memory_bank.flush()
+
+    partitions.apply_retention(now=time.time() + partitions.SEEN_TTL_S + 60)
+    assert seen(marker) and not seen(plain)
+    pruned = partitions.apply_retention(now=time.time() + partitions.BULK_SEEN_TTL_S + 60)
+    assert pruned["bulk_markers"] >= 1 and not seen(marker)
+
+
+def test_dedup_leaves_old_bulk_markers_alone():
+    marker = f"{memory_bank.BULK_SEEN_PREFIX}export.csv:{uuid.uuid4().hex}"
+    old = time.time() - 30 * 24 * 3600
+    memory_bank.mark_seen(marker)
+    memory_bank.flush()
+    memory_bank.writer.commit_with(lambda conn: conn.execute(
+        "UPDATE seen_items SET seen_at=? WHERE item_hash=?", (partitions._iso(old), marker)))
+    # observing reports never prunes seen_items; retention is maintain()'s job
+    dedup = Deduplicator()
+    for i in range(3):
+        dedup.observe(uuid.uuid4().hex, f"road {i} flooded near the market", lat=45.0, lon=10.0)
+    memory_bank.flush()
+    assert memory_bank.is_seen(marker)
+
+
+def test_archive_loads_do_not_block_other_archives(monkeypatch):
+    cache = partitions.ArchiveCache(size=2)
+    release = threading.Event()
+
+    def load(name):
+        if name == "slow":
+            release.wait(5)
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute("CREATE TABLE t (name TEXT)")
+        conn.execute("INSERT INTO t VALUES (?)", (name,))
+        return conn
+    monkeypatch.setattr(cache, "_load", load)
+
+    query = "SELECT name FROM t"
+    assert cache.query("fast", 1, query, ()) == [("fast",)]
+    slow = threading.Thread(target=cache.query, args=("slow", 1, query, ()))
+    slow.start()
+    try:
+        start = time.monotonic()
+        assert cache.query("fast", 1, query, ()) == [("fast",)]
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        slow.join()
+    assert cache.loads == 2
+
+    # a third archive evicts the least recently used one ("fast")
+    cache.query("other", 1, query, ())
+    cache.query("fast", 1, query, ())
+    assert cache.loads == 4
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from src import app as app_module
+from src.metrics import PROFILE_MIN_INTERVAL_S, PROFILE_OTHER, SamplingProfiler
+
+
+def busy(stop, depth):
+    if depth:
+        return busy(stop, depth - 1)
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_debug_routes_are_opt_in():
+    assert app_module.create_app(profiler=False).test_client().get("/debug/profiler").status_code == 404
+    client = app_module.create_app(profiler=True).test_client()
+    assert client.get("/debug/profiler?format=json").status_code == 200
+
+
+def test_profiler_stops_itself_and_bounds_its_stacks():
+    stop = threading.Event()
+    workers = [threading.Thread(target=busy, args=(stop, depth), daemon=True) for depth in range(6)]
+    for worker in workers:
+        worker.start()
+    profiler = SamplingProfiler(max_duration=0.3, max_stacks=3)
+    try:
+        assert profiler.start(interval=0.0001, duration=60)
+        assert profiler.interval == PROFILE_MIN_INTERVAL_S
+        assert profiler.duration == 0.3
+        deadline = time.monotonic() + 5
+        while profiler.running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not profiler.running and profiler.stopped_at
+    finally:
+        profiler.stop()
+        stop.set()
+    assert profiler.samples > 0
+    assert len(profiler.stacks) <= 4
+    assert profiler.stacks[PROFILE_OTHER] > 0
+
+
+def test_collapsed_reads_while_sampling():
+    stop = threading.Event()
+    workers = [threading.Thread(target=busy, args=(stop, depth), daemon=True) for depth in range(20)]
+    for worker in workers:
+        worker.start()
+    profiler = SamplingProfiler(max_duration=0.5)
+    try:
+        profiler.start(interval=PROFILE_MIN_INTERVAL_S)
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            profiler.collapsed(limit=5)
+            profiler.status()
+    finally:
+        profiler.stop()
+        stop.set()
+    lines = profiler.collapsed().splitlines()
+    assert lines and sum(int(line.rsplit(" ", 1)[1]) for line in lines) >= profiler.samples
@@ -0,0 +1,70 @@
+import json
+import time
+import uuid
+
+from src.memory import memory_bank, partitions
+from src.memory.memory_bank import decode_raw, encode_raw
+from src.utils import now_iso, read_conn
+
+BIG = {"text": "water rising " * 200, "media": ["https://example.org/%d.jpg" % i for i in range(50)]}
+
+
+def incident(raw, ts=None):
+    ts = ts or now_iso()
+    return {"id": str(uuid.uuid4()), "reporter": "test", "text": "road flooded", "severity": "medium",
+            "created_at": ts, "triage_ts": ts, "raw_json": encode_raw(raw)}
+
+
+def test_payloads_round_trip_through_their_stored_form():
+    small = encode_raw({"text": "flood", "place": "Ward 4"})
+    assert isinstance(small.stored, str) and decode_raw(small.stored) == {"text": "flood", "place": "Ward 4"}
+    big = encode_raw(BIG)
+    assert isinstance(big.stored, bytes) and len(big.stored) < len(json.dumps(BIG))
+    assert decode_raw(big.stored) == BIG
+    # strings are already serialized; text that is not JSON comes back as is
+    assert decode_raw(encode_raw('{"a": 1}').stored) == {"a": 1}
+    assert decode_raw(encode_raw("plain sms text").stored) == "plain sms text"
+    assert encode_raw(small) is small and encode_raw(None) is None
+
+
+def test_oversized_payloads_keep_their_small_fields():
+    raw = {"text": "bridge down", "blob": "x" * (memory_bank.RAW_MAX_BYTES + 10)}
+    kept = decode_raw(encode_raw(raw).stored)
+    assert kept["text"] == "bridge down" and "blob" not in kept
+    assert kept["_truncated"]["dropped"] == ["blob"]
+
+
+def test_listing_without_raw_leaves_the_payload_out():
+    inc = incident(BIG)
+    memory_bank.save_incident(inc)
+    memory_bank.flush()
+    with_raw = memory_bank.list_incidents(limit=50)
+    without = memory_bank.list_incidents(limit=50, raw=False)
+    row = next(r for r in with_raw if r["id"] == inc["id"])
+    assert row["raw_json"] == BIG
+    row = next(r for r in without if r["id"] == inc["id"])
+    assert "raw_json" not in row and row["text"] == "road flooded"
+    sql, _ = memory_bank._incident_query(10, raw=False)
+    assert "NULL AS raw_json" in sql
+
+
+def test_archived_weeks_return_payloads_and_reports():
+    old = partitions._iso(time.time() - 60 * 86400)
+    inc = incident(BIG, ts=old)
+    memory_bank.save_incident(inc)
+    memory_bank.save_report({"id": str(uuid.uuid4()), "duplicate_of": inc["id"], "created_at": old,
+                             "reporter": "test", "text": "same flood", "raw_json": {"sms": "again"}})
+    memory_bank.flush()
+
+    moved = partitions.archive_closed()
+    assert partitions.week_of(old)[0] in moved
+    with read_conn() as conn:
+        assert conn.execute("SELECT 1 FROM incidents WHERE id=?", (inc["id"],)).fetchone() is None
+
+    week_end = partitions.week_of(old)[2]
+    found = memory_bank.list_incidents(limit=5, until=week_end)
+    assert [r for r in found if r["id"] == inc["id"]][0]["raw_json"] == BIG
+    found = memory_bank.list_incidents(limit=5, until=week_end, raw=False)
+    assert "raw_json" not in [r for r in found if r["id"] == inc["id"]][0]
+    assert [r["raw_json"] for r in memory_bank.list_reports(inc["id"])] == [{"sms": "again"}]
+    assert memory_bank.list_reports(inc["id"], archived=False) == []
@@ -0,0 +1,53 @@
+import sqlite3
+import threading
+import time
+import uuid
+
+import pytest
+
+from src.utils import ReadPool, open_conn, read_conn
+
+
+@pytest.fixture
+def table():
+    name = f"t_{uuid.uuid4().hex[:8]}"
+    conn = open_conn()
+    conn.execute(f"CREATE TABLE {name} (k TEXT PRIMARY KEY)")
+    conn.commit()
+    yield name, conn
+    conn.close()
+
+
+def test_pool_is_bounded_and_read_only(table):
+    name, _ = table
+    pool = ReadPool(size=2)
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        first.execute(f"INSERT INTO {name} VALUES ('x')")
+
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.1)
+    assert not got  # a third reader waits for a free connection
+    pool.release(second)
+    waiter.join(5)
+    assert got == [second]
+    pool.release(first)
+    pool.release(got[0])
+    assert pool._created == 2
+
+
+def test_readers_do_not_wait_on_an_open_write(table):
+    name, writer = table
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute(f"INSERT INTO {name} VALUES ('pending')")
+    try:
+        start = time.monotonic()
+        with read_conn() as conn:
+            assert conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] == 0
+        assert time.monotonic() - start < 1
+    finally:
+        writer.commit()
+    with read_conn() as conn:
+        assert [row["k"] for row in conn.execute(f"SELECT k FROM {name}")] == ["pending"]
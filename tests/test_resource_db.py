@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from src.tools import resource_db
+from src.tools.spatial_index import haversine_km
+
+
+def scattered(n, seed=7):
+    rnd = random.Random(seed)
+    centres = [(20.5, 72.5), (23.0, 72.6), (-33.9, 151.2), (64.1, -21.9), (0.0, 179.9)]
+    out = []
+    for i in range(n):
+        lat, lon = rnd.choice(centres)
+        lon = (lon + rnd.uniform(-1.5, 1.5) + 180) % 360 - 180
+        out.append({"id": f"r-{i}", "type": rnd.choice(["volunteer", "shelter"]),
+                    "lat": lat + rnd.uniform(-1.5, 1.5), "lon": lon,
+                    "available": rnd.random() < 0.7, "capacity": 1})
+    return out
+
+
+def linear(resources, lat, lon, radius_km, limit, available_only=False):
+    scored = sorted((haversine_km(lat, lon, r["lat"], r["lon"]), r["id"]) for r in resources
+                    if r["available"] or not available_only)
+    return [rid for d, rid in scored if d <= radius_km][:limit]
+
+
+QUERIES = [(20.5, 72.5, 50, 5), (23.1, 72.4, 120, 20), (-34.0, 151.0, 10, 3),
+           (64.0, -22.0, 300, 50), (0.2, -179.8, 80, 10), (45.0, 10.0, 50, 5)]
+
+
+@pytest.mark.parametrize("lat, lon, radius_km, limit", QUERIES)
+def test_find_nearby_matches_a_linear_scan(inventory, lat, lon, radius_km, limit):
+    resources = scattered(3000)
+    inventory(resources)
+    for available_only in (False, True):
+        found = resource_db.find_nearby(lat, lon, radius_km=radius_km, limit=limit,
+                                        available_only=available_only)
+        assert [r["id"] for r in found] == linear(resources, lat, lon, radius_km, limit, available_only)
+
+
+def test_inventory_updates_are_seen_by_the_next_query(inventory):
+    inventory(scattered(200))
+    resource_db.add_resource({"id": "new-1", "type": "shelter", "lat": 45.0, "lon": 10.0,
+                              "available": True, "capacity": 5})
+    assert [r["id"] for r in resource_db.find_nearby(45.0, 10.0, radius_km=1)] == ["new-1"]
+    resource_db.move_resource("new-1", 45.5, 10.0)
+    assert resource_db.find_nearby(45.0, 10.0, radius_km=1) == []
+    resource_db.set_available("new-1", False)
+    assert resource_db.find_nearby(45.5, 10.0, radius_km=1, available_only=True) == []
+    resource_db.remove_resource("new-1")
+    assert resource_db.find_nearby(45.5, 10.0, radius_km=1) == []
+
+
+def test_find_nearby_many_matches_single_queries(inventory):
+    inventory(scattered(3000))
+    points = [(lat, lon) for lat, lon, _, _ in QUERIES] + [(None, 72.5), ("x", "y")]
+    # a tiny cell budget forces many chunks
+    batch = resource_db.find_nearby_many(points, radius_km=100, limit=8, max_cells=500)
+    assert len(batch) == len(points)
+    for (lat, lon), hits in zip(points, batch):
+        single = resource_db.find_nearby(lat, lon, radius_km=100, limit=8)
+        assert [r["id"] for r in hits] == [r["id"] for r in single]
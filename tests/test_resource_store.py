@@ -0,0 +1,61 @@
+import random
+
+from src.tools.resource_store import ResourceStore
+
+
+def inventory(n=500, seed=3):
+    rnd = random.Random(seed)
+    return [{"id": f"r-{i}", "type": rnd.choice(["volunteer", "shelter", "medical_kit"]),
+             "lat": 20.0 + rnd.uniform(-2, 2), "lon": 72.0 + rnd.uniform(-2, 2),
+             "available": rnd.random() < 0.8, "capacity": rnd.randint(1, 20)} for i in range(n)]
+
+
+def nearest_ids(snap, lat=20.0, lon=72.0, **kwargs):
+    return [r["id"] for d, r in snap.nearest(lat, lon, k=10, radius_km=150, **kwargs)]
+
+
+def test_snapshots_do_not_see_later_writes():
+    store = ResourceStore.from_dicts(inventory())
+    before = store.current
+    ids, near = sorted(r["id"] for r in before.records()), nearest_ids(before)
+    victim = near[0]
+
+    store.set_available(victim, not before.get(victim)["available"])
+    store.move(near[1], 10.0, 10.0)
+    store.remove(near[2])
+    store.add({"id": "new-1", "type": "shelter", "lat": 20.0, "lon": 72.0, "available": True, "capacity": 1})
+
+    assert sorted(r["id"] for r in before.records()) == ids
+    assert nearest_ids(before) == near and "new-1" not in before
+    after = store.current
+    assert len(after) == len(before) and near[2] not in after
+    assert after.get(victim)["available"] != before.get(victim)["available"]
+    assert nearest_ids(after)[0] == "new-1" and near[1] not in nearest_ids(after)
+    compacted = store.compact()
+    assert sorted(r["id"] for r in compacted.records()) == sorted(r["id"] for r in after.records())
+    assert nearest_ids(compacted) == nearest_ids(after)
+
+
+def test_persist_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "resources.store")
+    store = ResourceStore.from_dicts(inventory())
+    store.remove("r-1")
+    store.persist(path)
+    loaded = ResourceStore.load(path)
+
+    def by_id(snap):
+        return {r["id"]: r for r in snap.records()}
+    assert by_id(loaded.current) == by_id(store.current)
+    for available_only in (False, True):
+        assert (nearest_ids(loaded.current, available_only=available_only)
+                == nearest_ids(store.current, available_only=available_only))
+
+    # the mapping is read-only; writes go to new columns and leave the file alone
+    size = (tmp_path / "resources.store").stat().st_size
+    mapped = loaded.current
+    loaded.set_available("r-2", not mapped.get("r-2")["available"])
+    loaded.add({"id": "new-1", "type": "shelter", "lat": 21.0, "lon": 73.0, "available": True, "capacity": 1})
+    assert loaded.current.get("new-1") is not None and "new-1" not in mapped
+    assert mapped.get("r-2")["available"] == store.current.get("r-2")["available"]
+    assert by_id(ResourceStore.load(path).current) == by_id(store.current)
+    assert (tmp_path / "resources.store").stat().st_size == size
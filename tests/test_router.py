@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from src.router import MessageRouter, QueueFull
+
+
+class BlockedAgent:
+    """Takes one message and holds it until released."""
+
+    name = "triage"
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def receive(self, msg):
+        self.started.set()
+        self.release.wait(5)
+
+
+class ListLog:
+
+    def __init__(self):
+        self.messages = []
+
+    def append(self, msg, at=None):
+        self.messages.append(msg["id"])
+
+
+def message(i):
+    return {"id": f"m{i}", "receiver": "triage", "kind": "report", "payload": {}}
+
+
+def test_rejected_messages_are_not_logged():
+    log = ListLog()
+    agent = BlockedAgent()
+    router = MessageRouter(queue_size=1, log=log)
+    router.register(agent)
+    router.start()
+    try:
+        router.route_message(message(0))
+        assert agent.started.wait(5)
+        router.route_message(message(1))
+        with pytest.raises(QueueFull):
+            router.route_message(message(2), block=False)
+        with pytest.raises(QueueFull):
+            router.route_message(message(3), timeout=0.01)
+        assert log.messages == ["m0", "m1"]
+        assert router.stats()["triage"]["rejected"] == 2
+    finally:
+        agent.release.set()
+        router.stop()
@@ -0,0 +1,54 @@
+import time
+
+from src.scheduler import SeverityScheduler, incident_severity, parse_ms
+
+
+def msg(severity, name):
+    return {"payload": {"incident": {"id": name, "severity": severity}}}
+
+
+def drain(sched):
+    out = []
+    while sched:
+        out.append(sched.popleft()[1]["payload"]["incident"]["id"])
+    return out
+
+
+def test_severe_work_goes_first_until_older_work_has_aged_past_it():
+    sched = SeverityScheduler("test", head_start={"high": 60, "medium": 10, "low": 0})
+    now = time.perf_counter()
+    sched.append((now - 120, msg("low", "old-low")))       # waited longer than high's head start
+    sched.append((now - 5, msg("low", "low")))
+    sched.append((now - 4, msg("medium", "medium")))
+    sched.append((now, msg("high", "high")))
+    sched.append((now, msg("critical?", "unknown")))      # scheduled as low
+    assert sched.depth == {"high": 1, "medium": 1, "low": 3}
+    assert drain(sched) == ["old-low", "high", "medium", "low", "unknown"]
+
+
+def test_equal_head_starts_are_fifo():
+    sched = SeverityScheduler("test", head_start={"high": 0, "medium": 0, "low": 0})
+    now = time.perf_counter()
+    for i, severity in enumerate(["low", "high", "medium", "high"]):
+        sched.append((now + i * 1e-6, msg(severity, f"m{i}")))
+    assert drain(sched) == ["m0", "m1", "m2", "m3"]
+
+
+def test_slo_misses_are_counted_per_severity():
+    sched = SeverityScheduler("test", slo={"high": 1.0, "medium": 5.0, "low": 60.0})
+    now = time.perf_counter()
+    sched.append((now - 2, msg("high", "late")))
+    sched.append((now, msg("high", "on-time")))
+    sched.append((now - 2, msg("medium", "medium")))
+    drain(sched)
+    stats = sched.stats()
+    assert stats["high"]["started"] == 2 and stats["high"]["slo_missed"] == 1
+    assert stats["medium"]["slo_missed"] == 0 and stats["medium"]["depth"] == 0
+    assert stats["high"]["wait_p99_ms"] >= 2000 and stats["high"]["slo_ms"] == 1000
+
+
+def test_settings_parse_from_milliseconds():
+    assert parse_ms("high=500, low=120000,bogus") == {"high": 0.5, "low": 120.0}
+    assert incident_severity(msg("high", "x")) == "high"
+    assert incident_severity({"payload": {"severity": "low"}}) == "low"
+    assert incident_severity({"payload": {"incident": "not a dict"}}) is None
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run in a fresh interpreter: this process has long since opened everything
+_CHILD = r"""
+import contextlib, io, json, os, sys
+with contextlib.redirect_stdout(io.StringIO()):
+    import src.app as app_mod
+from src import utils
+from src.tools import geocode
+state = {"db_file": os.path.exists(os.environ["MEMORY_DB"]), "conn": utils._conn is not None,
+         "service": geocode._service is not None, "geopy": "geopy" in sys.modules,
+         "started": app_mod._STARTED.is_set()}
+calls = []
+bootstrap = app_mod._bootstrap_feed
+app_mod._bootstrap_feed = lambda: calls.append(1) or bootstrap()
+with contextlib.redirect_stdout(io.StringIO()):
+    statuses = [app_mod.create_app(profiler=False).test_client().get("/healthz").status_code
+                for _ in range(3)]
+print(json.dumps({"import": state, "statuses": statuses, "bootstraps": len(calls),
+                  "after": {"db_file": os.path.exists(os.environ["MEMORY_DB"]),
+                            "conn": utils._conn is not None, "started": app_mod._STARTED.is_set()}}))
+"""
+
+
+def test_import_is_lazy_and_the_first_request_boots_once(tmp_path):
+    env = dict(os.environ, MEMORY_DB=str(tmp_path / "memory.db"), GEOCODE_UPSTREAM="1")
+    out = subprocess.run([sys.executable, "-c", _CHILD], cwd=ROOT, env=env,
+                         capture_output=True, text=True, timeout=60, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert not any(result["import"].values()), result["import"]
+    assert result["statuses"] == [200, 200, 200]
+    assert result["bootstraps"] == 1
+    assert all(result["after"].values()), result["after"]
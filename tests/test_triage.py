@@ -0,0 +1,48 @@
+import pytest
+
+from src.agents.triage import DEFAULT_KEYWORDS, KeywordMatcher, TriageRules
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(DEFAULT_KEYWORDS)
+
+
+@pytest.mark.parametrize("text, level", [
+    ("Deadly flood near the river", "high"),
+    ("Floods cut off the village", "high"),
+    ("flooding in ward 4", "high"),
+    ("FIRE on the 3rd floor", "high"),
+    ("two people trapped, one injured", "high"),
+    ("इमारत ढही", "high"),
+    ("मकान ढहा, लोग फंसे हैं", "high"),
+    ("बाढ़ आई", "high"),
+    ("લોકો ફસાયા", "high"),
+    ("muertos en el derrumbe", "high"),
+    ("two injuries reported", "medium"),
+    ("we are helpless here", "medium"),
+    ("families evacuated to the school", "medium"),
+    ("तीन लोग घायल", "medium"),
+    ("heridos leves", "medium"),
+    ("road closed for repairs", "low"),
+    ("सड़क बंद है", "low"),
+])
+def test_severity_levels(matcher, text, level):
+    assert matcher.classify(text) == level
+
+
+@pytest.mark.parametrize("text", [
+    "firework show tonight",
+    "call the helpline for passes",
+    "deadline for forms is tomorrow",
+    "smokers corner moved",
+])
+def test_keywords_inside_other_words_do_not_count(matcher, text):
+    assert matcher.classify(text) == "low"
+
+
+def test_custom_keywords_replace_the_defaults():
+    rules = TriageRules(path=None)
+    rules.set_keywords({"high": ["gas leak"], "medium": []})
+    assert rules.matcher.classify("gas leak at the depot") == "high"
+    assert rules.matcher.classify("fire at the depot") == "low"
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from src.memory.writer import GroupCommitWriter
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("CREATE TABLE t (k TEXT PRIMARY KEY, v INTEGER NOT NULL)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def make_writer(conn):
+    return GroupCommitWriter(conn_factory=lambda: conn, max_batch=1000, window_ms=10_000)
+
+
+def rows(conn):
+    return conn.execute("SELECT k, v FROM t ORDER BY k").fetchall()
+
+
+def test_bad_statement_is_dropped_and_the_rest_committed(db):
+    w = make_writer(db)
+    w.submit(("t", "a"), "INSERT INTO t VALUES (?, ?)", ("a", 1))
+    w.submit(("t", "b"), "INSERT INTO t VALUES (?, ?)", ("b", None))  # NOT NULL
+    w.submit(("t", "c"), "INSERT INTO t VALUES (?, ?)", ("c", 3))
+    assert w.flush() == 2
+    assert rows(db) == [("a", 1), ("c", 3)]
+    assert w.stats["dropped"] == 1
+    assert w.pending(("t", "b")) is None
+    # later writes are not held back by the dropped one
+    w.submit(("t", "d"), "INSERT INTO t VALUES (?, ?)", ("d", 4))
+    assert w.flush() == 1
+
+
+def test_statements_replay_in_submission_order(db):
+    w = make_writer(db)
+    w.submit(("t", "a"), "INSERT INTO t VALUES (?, ?)", ("a", 1))
+    w.submit(("t", "bad"), "INSERT INTO t VALUES (?, ?)", ("bad", None))
+    w.submit(("t", "a2"), "UPDATE t SET v = v + 10 WHERE k = ?", ("a",))
+    w.flush()
+    assert rows(db) == [("a", 11)]
+
+
+def test_commit_with_error_still_commits_the_batch(db):
+    w = make_writer(db)
+    w.submit(("t", "a"), "INSERT INTO t VALUES (?, ?)", ("a", 1))
+
+    calls = []
+
+    def fail(conn):
+        calls.append(1)
+        conn.execute("INSERT INTO t VALUES ('z', 9)")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        w.commit_with(fail)
+    assert rows(db) == [("a", 1)]
+    assert len(calls) == 1
+    assert w.stats["dropped"] == 0